@@ -1,14 +1,13 @@
 import os
 import re
 import time
-import zipfile
 import requests
 import numpy as np
 import pandas as pd
 import urllib.parse
 from datetime import datetime
 
-from flask import Flask, request, render_template, url_for, send_file, jsonify, redirect
+from flask import Flask, Response, request, render_template, url_for, send_file, jsonify, redirect
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
@@ -17,12 +16,14 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from selenium.webdriver.common.keys import Keys
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from mlxtend.frequent_patterns import fpgrowth, association_rules
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from nltk.sentiment import SentimentIntensityAnalyzer
 import atexit
+import base64
+import gzip
+import itertools
+import multiprocessing
 
 from collections import Counter, defaultdict
 import json
@@ -33,19 +34,39 @@ from typing import List
 # Import our modular functions
 from nlp_utils import (
     analyze_sentiment, extract_packaging_keywords, build_component_condition_cooccurrence,
-    update_packaging_library, filter_packaging_keywords, map_keyword_to_images,
-    build_keyword_sentence_map, build_cooccurrence_data, determine_category,
+    update_packaging_library, filter_packaging_keywords, build_keyword_maps,
+    build_cooccurrence_data, determine_category,
     get_related_words, summarize_text, analyze_recursive_packaging_reviews,
     get_packaging_related_reviews, get_reviews_by_sentiment, get_packaging_reviews_by_sentiment,
-    classify_reviews_as_packaging, get_packaging_classification_summary
+    classify_reviews_as_packaging, get_packaging_classification_summary,
+    build_term_cooccurrence, analyze_sentiment_batch, analyze_reviews_with_tfidf,
+    PACKAGING_SCORE_THRESHOLD
 )
 from scraper import (
     amazon_sign_in, ensure_signed_in, get_product_name, download_image,
     extract_reviews_from_page, scrape_all_amazon_reviews, scrape_reviews_for_keywords,
-    get_product_main_image_url, generate_defect_overlay, build_defect_coords_map,
+    get_product_main_image_url, generate_defect_overlay, build_defect_coords_map, cached_defect_overlay,
     handle_captcha, sanitize_filename, click_next_if_available, scrape_recursive_packaging_reviews
 )
 from config import components_list, conditions_list
+from cache_utils import (
+    artifact_key, artifact_path, atomic_write_bytes, cached_file_digest, load_artifact,
+    remove_stale_artifacts, save_artifact, save_compressed_artifact
+)
+from jobs import get_job, init_job_store, submit_job
+from image_utils import (
+    ensure_image_manifest, image_archive_key, image_archive_path, stream_image_archive, unique_image_files
+)
+from review_store import (
+    iter_json_reviews, iter_reviews, load_analysis_data, load_reviews_at,
+    read_review_columns, review_store_summary
+)
+
+# Optional: brotli-encoded analysis sections for clients that accept br
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 #############################################
 # NLTK Imports and Resource Check
@@ -69,33 +90,6 @@ except LookupError:
     
 sia = SentimentIntensityAnalyzer()
 
-#############################################
-# Co-occurrence & TF-IDF Analysis
-#############################################
-def analyze_reviews_with_tfidf(reviews, threshold=0.05, min_support=0.05):
-    vectorizer = TfidfVectorizer(stop_words='english')
-    tfidf_matrix = vectorizer.fit_transform(reviews)
-    feature_names = vectorizer.get_feature_names_out()
-    # top words from first review
-    if tfidf_matrix.shape[0]>0:
-        scores = tfidf_matrix[0].toarray().flatten()
-        idxs = np.argsort(scores)[::-1][:5]
-        top_words = [(feature_names[i],scores[i]) for i in idxs]
-    else:
-        top_words=[]
-    # fpgrowth
-    transactions = [[1 if s>threshold else 0 for s in row] for row in tfidf_matrix.toarray()]
-    df_trans = pd.DataFrame(transactions,columns=feature_names).astype(bool)
-    fi = fpgrowth(df_trans, min_support=min_support, use_colnames=True)
-    fi['itemsets']=fi['itemsets'].apply(lambda x:list(x))
-    if fi.empty:
-        rules=pd.DataFrame()
-    else:
-        rules = association_rules(fi,metric="confidence",min_threshold=0.05)
-        rules['antecedents']=rules['antecedents'].apply(lambda x:list(x))
-        rules['consequents']=rules['consequents'].apply(lambda x:list(x))
-    return top_words, df_trans, fi, rules
-
 #############################################
 # Flask App
 #############################################
@@ -542,93 +536,188 @@ def index():
         if not review_url or not email or not password:
             return "Missing required fields", 400
 
-        try:
-            # Use new recursive scraping function with integrated logic
-            print("Starting Recursive Review Extraction Strategy...")
-            reviews_data = scrape_recursive_packaging_reviews(
-                review_url=review_url,
-                email=email,
-                password=password,
-                use_headless=use_headless
-            )
-            
-            if not reviews_data:
-                return "Failed to extract reviews. Please check your credentials and URL.", 400
-
-            # Perform NLP-based analysis
-            print("Performing NLP-based analysis...")
-            analysis_results = analyze_recursive_packaging_reviews(reviews_data)
-            
-            # Save analysis results
-            product_folder = reviews_data['product_folder']
-            analysis_file = os.path.join("static", product_folder, "recursive_analysis.json")
-            os.makedirs(os.path.dirname(analysis_file), exist_ok=True)
-            
-            with open(analysis_file, 'w') as f:
-                json.dump(analysis_results, f, indent=2, default=str)
-            
-            print(f"Recursive analysis completed. Results saved to {analysis_file}")
-            
-            # Redirect to the product overview page first, then user can navigate to analysis
-            return redirect(f"/product_overview/{product_folder}")
-            
-        except Exception as e:
-            print(f"Error in recursive analysis: {e}")
-            return """
-            <!DOCTYPE html>
-            <html lang="en">
-            <head>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <title>PackSense - Live Scraping Temporarily Paused</title>
-                <style>
-                    body { font-family: Arial, sans-serif; background: #000; color: #fff; margin: 0; padding: 20px; text-align: center; }
-                    .container { max-width: 800px; margin: 0 auto; padding: 50px 20px; }
-                    .header { margin-bottom: 40px; }
-                    .message { background: #222; padding: 30px; border-radius: 15px; margin-bottom: 30px; }
-                    .options { background: #333; padding: 30px; border-radius: 15px; margin-bottom: 30px; }
-                    .btn { display: inline-block; background: #007bff; color: #fff; padding: 15px 30px; text-decoration: none; border-radius: 8px; margin: 10px; font-weight: bold; }
-                    .btn:hover { background: #0056b3; }
-                    .btn-demo { background: #28a745; }
-                    .btn-demo:hover { background: #1e7e34; }
-                    .btn-github { background: #6f42c1; }
-                    .btn-github:hover { background: #5a32a3; }
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="header">
-                        <h1>🚫 Live Scraping Temporarily Paused</h1>
-                    </div>
-                    
-                    <div class="message">
-                        <h2>Amazon has detected automated activity from our service</h2>
-                        <p>We're working with their team to align on a compliant path forward. During this review, live scraping is disabled.</p>
-                    </div>
-                    
-                    <div class="options">
-                        <h3>What you can do now:</h3>
-                        <p><strong>Explore Demo Mode</strong> — full UI with sample data (no scraping required)</p>
-                        <p><strong>Run Locally</strong> — clone the repo and run on your machine</p>
-                        
-                        <div style="margin-top: 30px;">
-                            <a href="/demo" class="btn btn-demo">🎯 Try Demo Mode</a>
-                            <a href="https://github.com/packsense394-cyber/PackSense_app" class="btn btn-github" target="_blank">📁 View on GitHub</a>
-                        </div>
-                    </div>
-                    
-                    <p><em>We'll restore live functionality as soon as the review wraps.</em></p>
-                </div>
-            </body>
-            </html>
-            """, 503
+        # Scraping takes minutes, so it runs in the job pool and the browser polls for it
+        job_id = submit_job(
+            "recursive_analysis",
+            {"review_url": review_url, "review_type": review_type, "use_headless": use_headless},
+            secrets={"email": email, "password": password}
+        )
+        print(f"Queued recursive analysis job {job_id}")
+        return job_submitted_response(job_id)
 
     # GET request - show form
     return render_template("index.html")
 
+# Bump whenever build_analysis_context changes what it computes so cached
+# contexts produced by older code are not served.
+ANALYSIS_CACHE_VERSION = "5"
+
+def review_images_mtime(product_folder):
+    try:
+        return str(os.stat(os.path.join("static", product_folder, "review_images")).st_mtime_ns)
+    except OSError:
+        return ""
+
+def analysis_cache_key(product_folder):
+    """
+    Cache key for a product's analysis context: source data + packaging library
+    + code version. Files are only re-hashed after their mtime or size changes.
+    """
+    folder = os.path.join("static", product_folder)
+    source_path = os.path.join(folder, "recursive_analysis.json")
+    if not os.path.exists(source_path):
+        source_path = os.path.join(folder, f"{product_folder}_reviews_keywords_and_relationships.xlsx")
+    library_path = os.path.join("static", "packaging_library.xlsx")
+    return artifact_key(
+        ANALYSIS_CACHE_VERSION,
+        product_folder,
+        cached_file_digest(source_path),
+        cached_file_digest(library_path),
+        # the defect overlay in the context is rendered from the product image
+        cached_file_digest(os.path.join(folder, "product.jpg")),
+        # image listings and thumbnail URLs follow the review_images folder
+        review_images_mtime(product_folder)
+    )
+
+# Heavy parts of the analysis context. The page is rendered without them and
+# fetches each one from /api/analysis/<product_folder>/<section> when needed.
+ANALYSIS_SECTIONS = ("reviews", "keyword_sentence_map", "keyword_image_map", "cooccurrence_data")
+_ANALYSIS_KEY_RE = re.compile(r"^[0-9a-f]{32}$")
+
+def analysis_section_path(product_folder, section, cache_key):
+    return artifact_path(product_folder, f"analysis_{section}", cache_key, "json.gz")
+
+def load_analysis_shell(product_folder, cache_key):
+    """
+    Page context minus ANALYSIS_SECTIONS. On a miss the full context is built
+    once and each section is written as a gzip artifact next to the shell.
+    """
+    shell = load_artifact(product_folder, "analysis_shell", cache_key)
+    if shell is not None and all(
+        os.path.exists(analysis_section_path(product_folder, section, cache_key))
+        for section in ANALYSIS_SECTIONS
+    ):
+        print(f"Serving cached analysis context for {product_folder}")
+        return shell
+    
+    shell = build_analysis_context(product_folder)
+    shell['review_count'] = len(shell['reviews'])
+    sections = {section: shell.pop(section) for section in ANALYSIS_SECTIONS}
+    try:
+        for section, payload in sections.items():
+            save_compressed_artifact(product_folder, f"analysis_{section}", cache_key, payload)
+        save_artifact(product_folder, "analysis_shell", cache_key, shell)
+    except Exception as e:
+        print(f"Error caching analysis context: {e}")
+        return None
+    return shell
+
 @app.route("/analysis/<product_folder>")
 def analysis(product_folder):
     """Detailed analysis page with all the review data and features - now supports enhanced recursive data"""
+    cache_key = analysis_cache_key(product_folder)
+    shell = load_analysis_shell(product_folder, cache_key)
+    if shell is None:
+        return "Error preparing analysis data", 500
+    return render_template("results_enhanced.html", analysis_key=cache_key, **shell)
+
+@app.route("/api/analysis/<product_folder>/<section>")
+def api_analysis_section(product_folder, section):
+    """
+    One section of the analysis page as JSON. Served from the precompressed
+    artifact (gzip, or brotli when available and accepted) with an ETag tied
+    to the analysis cache key, so unchanged data revalidates with a 304.
+    The page passes the key it was rendered with (?key=); the key is only
+    recomputed when that section is no longer cached.
+    """
+    if section not in ANALYSIS_SECTIONS:
+        return jsonify({'error': f'Unknown section: {section}'}), 404
+    cache_key = request.args.get('key', '')
+    path = analysis_section_path(product_folder, section, cache_key) if _ANALYSIS_KEY_RE.match(cache_key) else None
+    if path is None or not os.path.exists(path):
+        cache_key = analysis_cache_key(product_folder)
+        path = analysis_section_path(product_folder, section, cache_key)
+    if not os.path.exists(path) and load_analysis_shell(product_folder, cache_key) is None:
+        return jsonify({'error': 'Analysis data not available'}), 500
+    
+    if brotli is not None and 'br' in request.accept_encodings:
+        encoding = 'br'
+        br_path = path[:-len(".gz")] + ".br"
+        if not os.path.exists(br_path):
+            with open(path, 'rb') as f:
+                atomic_write_bytes(br_path, brotli.compress(gzip.decompress(f.read())))
+            remove_stale_artifacts(product_folder, f"analysis_{section}", cache_key, "json.br")
+        with open(br_path, 'rb') as f:
+            body = f.read()
+    else:
+        with open(path, 'rb') as f:
+            body = f.read()
+        if 'gzip' in request.accept_encodings:
+            encoding = 'gzip'
+        else:
+            encoding = None
+            body = gzip.decompress(body)
+    
+    response = Response(body, mimetype='application/json')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.set_etag(f"{cache_key}-{section}-{encoding or 'identity'}")
+    # Always revalidate; the ETag makes that a cheap 304
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def existing_keyword_image_urls(kw_img, product_folder, manifest=None):
+    """
+    Static URLs of the keyword images that exist in the product's review_images
+    folder. Names are looked up in the image manifest (or one folder listing)
+    instead of stat-ing every image per keyword, and a file the manifest marks
+    as a copy of another (duplicate_of) is shown once under the first name.
+    """
+    img_dir = os.path.join("static", product_folder, "review_images")
+    if manifest is not None:
+        images = manifest.get("images", {})
+        existing = set(images)
+        canonical = {name: entry["duplicate_of"] for name, entry in images.items() if "duplicate_of" in entry}
+    else:
+        try:
+            existing = set(os.listdir(img_dir))
+        except OSError:
+            existing = set()
+        canonical = {}
+    kw_img_trans = {}
+    for kw, imgs in kw_img.items():
+        valid_images = []
+        for img_filename in imgs:
+            name = img_filename.strip()
+            if not name:
+                continue
+            # Plain file names are looked up in the listing; anything path-like is checked directly
+            if os.path.basename(name) == name:
+                found = name in existing
+                name = canonical.get(name, name)
+            else:
+                found = os.path.exists(os.path.join(img_dir, name))
+            if found:
+                url = url_for('static', filename=f"{product_folder}/review_images/{name}")
+                if url not in valid_images:
+                    valid_images.append(url)
+        if valid_images:
+            kw_img_trans[kw] = valid_images
+    return kw_img_trans
+
+def review_image_thumbnails(manifest, product_folder):
+    """{full-size image URL: thumbnail URL} for every image the manifest has a thumbnail for"""
+    if not manifest:
+        return {}
+    return {
+        url_for('static', filename=f"{product_folder}/review_images/{name}"): url_for('static', filename=entry["thumbnail"])
+        for name, entry in manifest.get("images", {}).items()
+        if entry.get("thumbnail")
+    }
+
+def build_analysis_context(product_folder):
+    """Compute the full template context for the analysis page"""
     # Load data from the product folder
     folder = os.path.join("static", product_folder)
     
@@ -636,9 +725,7 @@ def analysis(product_folder):
     recursive_analysis_file = os.path.join(folder, "recursive_analysis.json")
     if os.path.exists(recursive_analysis_file):
         print("Loading enhanced recursive analysis data...")
-        import json as json_module
-        with open(recursive_analysis_file, 'r') as f:
-            recursive_data = json_module.load(f)
+        recursive_data = load_analysis_data(product_folder)
         
         # Use enhanced data
         all_reviews = recursive_data.get('all_reviews', [])
@@ -692,8 +779,9 @@ def analysis(product_folder):
         
         # Calculate metrics
         total_reviews = len(reviews)
-        positive_count = sum(1 for r in reviews if analyze_sentiment(str(r.get("review_text", ""))) == "positive")
-        negative_count = sum(1 for r in reviews if analyze_sentiment(str(r.get("review_text", ""))) == "negative")
+        sentiment_counts = analyze_sentiment_batch([str(r.get("review_text", "")) for r in reviews]).counts()
+        positive_count = sentiment_counts["positive"]
+        negative_count = sentiment_counts["negative"]
         neutral_count = total_reviews - positive_count - negative_count
         
         # Process review images to ensure they have proper URLs
@@ -722,23 +810,10 @@ def analysis(product_folder):
     excel_url = url_for('static', filename=f"{product_folder}/{product_folder}_reviews_keywords_and_relationships.xlsx")
     lib_url = url_for('static', filename="packaging_library.xlsx")
     
-    # Load image files
-    img_folder = os.path.join(folder, "review_images")
-    image_files = []
-    unique_images = set()  # Track unique image files
-    
-    if os.path.exists(img_folder):
-        for fname in os.listdir(img_folder):
-            if fname.lower().endswith(('.jpg', '.png', '.gif')):
-                # Get the real file path (resolve symbolic links)
-                real_path = os.path.realpath(os.path.join(img_folder, fname))
-                # Use the real filename as the key for deduplication
-                real_filename = os.path.basename(real_path)
-                
-                # Only add if we haven't seen this real file before
-                if real_filename not in unique_images:
-                    unique_images.add(real_filename)
-                    image_files.append(fname)
+    # Review images: one manifest read lists, dedupes and thumbnails them
+    image_manifest = ensure_image_manifest(product_folder)
+    image_files = unique_image_files(image_manifest)
+    image_thumbnails = review_image_thumbnails(image_manifest, product_folder)
     
     # Load packaging data (enhanced if available)
     if os.path.exists(recursive_analysis_file):
@@ -812,25 +887,14 @@ def analysis(product_folder):
         unique_keys = set(packaging_keywords_flat)
         print(f"Building keyword maps for {len(unique_keys)} unique keys: {list(unique_keys)[:10]}")
         
-        kw_img = map_keyword_to_images(reviews, unique_keys)
+        # Both keyword maps come from one pass over the reviews
+        kw_img, kw_sent = build_keyword_maps(reviews, unique_keys)
         print(f"Raw keyword image map has {len(kw_img)} keywords")
         if kw_img:
             print(f"Sample raw keyword image map: {list(kw_img.items())[:3]}")
         
         # Fix image paths to ensure they exist
-        kw_img_trans = {}
-        for kw, imgs in kw_img.items():
-            valid_images = []
-            for img_filename in imgs:
-                if img_filename.strip():
-                    # Check if the image file actually exists
-                    img_path = os.path.join(folder, "review_images", img_filename.strip())
-                    if os.path.exists(img_path):
-                        valid_images.append(
-                            url_for('static', filename=f"{product_folder}/review_images/{img_filename.strip()}")
-                        )
-            if valid_images:
-                kw_img_trans[kw] = valid_images
+        kw_img_trans = existing_keyword_image_urls(kw_img, product_folder, image_manifest)
         
         print(f"Built keyword image map with {len(kw_img_trans)} keywords")
         if kw_img_trans:
@@ -840,8 +904,6 @@ def analysis(product_folder):
         else:
             print("No keyword image map data found")
         
-        # Build keyword sentence map
-        kw_sent = build_keyword_sentence_map(reviews, unique_keys)
         print(f"Built keyword sentence map with {len(kw_sent)} keywords")
         if kw_sent:
             print(f"Sample keyword sentence map keys: {list(kw_sent.keys())[:5]}")
@@ -856,10 +918,6 @@ def analysis(product_folder):
         print("Building co-occurrence data from words found in reviews...")
         cooccurrence_data = {}
         
-        # Extract all packaging-related words from reviews
-        from collections import Counter
-        import re
-        
         # Define packaging-related keywords to look for
         packaging_keywords_to_find = [
             'bottle', 'package', 'packaging', 'container', 'box', 'bag', 'can', 'jar', 'tube', 'pouch',
@@ -871,43 +929,18 @@ def analysis(product_folder):
             'transparent', 'clear', 'opaque', 'color', 'colored', 'design', 'shape', 'size', 'large', 'small'
         ]
         
-        # Find all packaging words that actually appear in reviews
-        found_packaging_words = set()
-        word_frequency = Counter()
-        
-        for review in reviews:
-            review_text = str(review.get("review_text", "")).lower()
-            # Find all packaging keywords in this review
-            for keyword in packaging_keywords_to_find:
-                if keyword in review_text:
-                    found_packaging_words.add(keyword)
-                    word_frequency[keyword] += 1
-        
-        # Only include words that appear at least 2 times
+        # Tokenize every review once and derive all pair counts from the
+        # sparse term-document matrix; only words in 2+ reviews become nodes
+        review_texts = [str(review.get("review_text", "")) for review in reviews]
+        cooccurrence_data, word_frequency = build_term_cooccurrence(
+            review_texts, packaging_keywords_to_find, min_count=2
+        )
         frequent_packaging_words = [word for word, count in word_frequency.items() if count >= 2]
         
-        print(f"Found {len(found_packaging_words)} packaging words in reviews")
+        print(f"Found {len(word_frequency)} packaging words in reviews")
         print(f"Words appearing 2+ times: {frequent_packaging_words}")
         
-        # Build co-occurrence matrix from actual words found in reviews
         if frequent_packaging_words:
-            print(f"Building co-occurrence matrix for {len(frequent_packaging_words)} frequently occurring terms")
-            
-            for i, term1 in enumerate(frequent_packaging_words):
-                for j, term2 in enumerate(frequent_packaging_words):
-                    if i != j:
-                        # Count co-occurrences in reviews
-                        cooccurrence_count = 0
-                        for review in reviews:
-                            review_text = str(review.get("review_text", "")).lower()
-                            if term1 in review_text and term2 in review_text:
-                                cooccurrence_count += 1
-                        
-                        if cooccurrence_count > 0:
-                            if term1 not in cooccurrence_data:
-                                cooccurrence_data[term1] = {}
-                            cooccurrence_data[term1][term2] = cooccurrence_count
-            
             print(f"Built co-occurrence data with {len(cooccurrence_data)} terms")
             if cooccurrence_data:
                 print("Sample co-occurrence relationships:")
@@ -923,24 +956,11 @@ def analysis(product_folder):
             unique_keys = set(cooccurrence_data.keys())
             print(f"Updated unique_keys to match co-occurrence network: {list(unique_keys)[:10]}")
             
-            # Rebuild keyword maps with the correct keys
-            kw_img = map_keyword_to_images(reviews, unique_keys)
-            kw_sent = build_keyword_sentence_map(reviews, unique_keys)
+            # Build keyword maps with the correct keys, both in one pass
+            kw_img, kw_sent = build_keyword_maps(reviews, unique_keys)
             
             # Fix image paths to ensure they exist
-            kw_img_trans = {}
-            for kw, imgs in kw_img.items():
-                valid_images = []
-                for img_filename in imgs:
-                    if img_filename.strip():
-                        # Check if the image file actually exists
-                        img_path = os.path.join(folder, "review_images", img_filename.strip())
-                        if os.path.exists(img_path):
-                            valid_images.append(
-                                url_for('static', filename=f"{product_folder}/review_images/{img_filename.strip()}")
-                            )
-                if valid_images:
-                    kw_img_trans[kw] = valid_images
+            kw_img_trans = existing_keyword_image_urls(kw_img, product_folder, image_manifest)
             
             print(f"Rebuilt keyword maps with {len(kw_img_trans)} image keywords and {len(kw_sent)} sentence keywords")
         else:
@@ -977,7 +997,7 @@ def analysis(product_folder):
                             if comp_lower in review_text:
                                 defect_pairs.append((comp, term))
         
-        defect_pairs = list(set(defect_pairs))  # Remove duplicates
+        defect_pairs = sorted(set(defect_pairs))  # Remove duplicates; a stable order keeps overlay numbers and cache keys stable
         print(f"Found {len(defect_pairs)} defect pairs")
         
         # If no defect pairs found with the above logic, try a more general approach
@@ -992,7 +1012,7 @@ def analysis(product_folder):
                     for cond in review_conditions:
                         defect_pairs.append((comp, cond))
             
-            defect_pairs = list(set(defect_pairs))  # Remove duplicates
+            defect_pairs = sorted(set(defect_pairs))  # Remove duplicates
             print(f"Found {len(defect_pairs)} defect pairs with general approach")
     else:
         # Original defect analysis logic
@@ -1011,28 +1031,27 @@ def analysis(product_folder):
             if df_co.loc[cond, comp] > 0
         ]
     
-    # Generate defect overlay image if we have defect pairs and a product image
+    # Defect overlay, rendered once per (image, pairs, coordinates) under a content-addressed name
     defect_image_url = url_for('static', filename=f"{product_folder}/defects_overlay.png")
+    defect_overlay = None
     product_image_path = os.path.join(folder, "product.jpg")
     
     if defect_pairs and os.path.exists(product_image_path):
-        print(f"Generating defect overlay for {len(defect_pairs)} defect pairs...")
+        print(f"Preparing defect overlay for {len(defect_pairs)} defect pairs...")
         try:
-            # Build coordinates map for defect locations
-            coords_map = build_defect_coords_map(product_image_path, defect_pairs)
-            
-            # Generate the defect overlay
-            overlay_path = os.path.join(folder, "defects_overlay.png")
-            generate_defect_overlay(product_image_path, defect_pairs, coords_map, overlay_path)
-            
-            print(f"Defect overlay generated successfully: {overlay_path}")
+            overlay = cached_defect_overlay(product_image_path, defect_pairs, folder)
+            defect_overlay = {
+                'png': url_for('static', filename=f"{product_folder}/{overlay['png']}"),
+                'webp': url_for('static', filename=f"{product_folder}/{overlay['webp']}"),
+                'thumb': url_for('static', filename=f"{product_folder}/{overlay['thumb']}"),
+                'width': overlay['width'],
+                'thumb_width': overlay['thumb_width'],
+            }
+            defect_image_url = defect_overlay['png']
         except Exception as e:
             print(f"Error generating defect overlay: {e}")
-            # Fallback to default defect image URL
-            defect_image_url = url_for('static', filename=f"{product_folder}/defects_overlay.png")
     else:
         print("No defect pairs found or product image missing, skipping defect overlay generation")
-        defect_image_url = url_for('static', filename=f"{product_folder}/defects_overlay.png")
     
     # Enhanced metrics for template
     enhanced_metrics = {
@@ -1060,8 +1079,9 @@ def analysis(product_folder):
     reviews = all_reviews
     
     # Add sentiment analysis to each review and ensure rating is an integer
-    for review in reviews:
-        review['sentiment'] = analyze_sentiment(str(review.get("review_text", "")))
+    sentiment_batch = analyze_sentiment_batch([str(review.get("review_text", "")) for review in reviews])
+    for review, sentiment in zip(reviews, sentiment_batch.labels):
+        review['sentiment'] = sentiment
         
         # Ensure rating is properly processed
         if 'rating' in review and review['rating'] is not None:
@@ -1093,12 +1113,13 @@ def analysis(product_folder):
             review['rating'] = None
     
     # Prepare review filtering data for sidebar using classification summary
+    sentiment_counts = sentiment_batch.counts()
     review_filters = {
         'all_reviews': classification_summary['total_reviews'],
         'packaging_reviews': classification_summary['packaging_reviews'],
-        'positive_reviews': len([r for r in reviews if r.get('sentiment') == "positive"]),
-        'neutral_reviews': len([r for r in reviews if r.get('sentiment') == "neutral"]),
-        'negative_reviews': len([r for r in reviews if r.get('sentiment') == "negative"])
+        'positive_reviews': sentiment_counts['positive'],
+        'neutral_reviews': sentiment_counts['neutral'],
+        'negative_reviews': sentiment_counts['negative']
     }
     
     # Update enhanced metrics with comprehensive classification results
@@ -1114,9 +1135,9 @@ def analysis(product_folder):
     packaging_percentage = classification_summary['packaging_percentage']
     
     # Recalculate sentiment counts from classified reviews
-    positive_count = len([r for r in reviews if r.get('sentiment') == "positive"])
-    negative_count = len([r for r in reviews if r.get('sentiment') == "negative"])
-    neutral_count = len([r for r in reviews if r.get('sentiment') == "neutral"])
+    positive_count = sentiment_counts['positive']
+    negative_count = sentiment_counts['negative']
+    neutral_count = sentiment_counts['neutral']
     
     print(f"Comprehensive packaging classification: {classification_summary['packaging_reviews']} packaging-related out of {len(reviews)} total reviews")
     print(f"Average confidence: {classification_summary['avg_packaging_confidence']:.2f}")
@@ -1229,8 +1250,7 @@ def analysis(product_folder):
     
 
     
-    return render_template(
-        "results_enhanced.html",
+    return dict(
         product_name=product_folder.replace('_', ' ').replace('-', ' '),
         packaging_keywords=packaging_keywords_flat,
         packaging_dropdown_data=dropdown_data_flat,
@@ -1243,6 +1263,8 @@ def analysis(product_folder):
         packaging_library_url=lib_url,
         keyword_sentence_map=cleaned_kw_sent,
         defect_image_url=defect_image_url,
+        defect_overlay=defect_overlay,
+        image_thumbnails=image_thumbnails,
         defect_pairs=defect_pairs,
         total_reviews=total_reviews,
         positive_count=positive_count,
@@ -1264,7 +1286,41 @@ def product_overview(product_folder):
     
     # Check if enhanced recursive analysis data exists
     recursive_analysis_file = os.path.join(folder, "recursive_analysis.json")
+    review_columns = None
     if os.path.exists(recursive_analysis_file):
+        try:
+            review_columns = read_review_columns(product_folder, "all", ["sentiment", "packaging_score"])
+        except Exception as e:
+            print(f"Error reading review store: {e}")
+    
+    if review_columns is not None:
+        # Metrics come straight from the stored sentiment and packaging_score
+        # columns; only the sample reviews are materialized
+        recursive_data = review_store_summary(product_folder)
+        total_reviews = recursive_data.get('total_reviews_extracted', 0)
+        packaging_related = recursive_data.get('packaging_related_reviews', 0)
+        packaging_percentage = recursive_data.get('packaging_percentage', 0)
+        
+        sentiment_breakdown = recursive_data.get('sentiment_breakdown', {})
+        positive_count = sentiment_breakdown.get('positive', 0)
+        negative_count = sentiment_breakdown.get('negative', 0)
+        neutral_count = sentiment_breakdown.get('neutral', 0)
+        
+        if review_columns.num_rows:
+            scores = review_columns["packaging_score"].to_numpy(zero_copy_only=False)
+            packaging_related = int((scores >= PACKAGING_SCORE_THRESHOLD).sum())
+            packaging_percentage = packaging_related / review_columns.num_rows * 100
+            
+            sentiment_counts = Counter(review_columns["sentiment"].to_pylist())
+            positive_count = sentiment_counts["positive"]
+            negative_count = sentiment_counts["negative"]
+            neutral_count = sentiment_counts["neutral"]
+            
+            print(f"Product overview metrics from review store: {packaging_related} packaging-related out of {total_reviews} total reviews")
+        
+        all_reviews = []
+        sample_reviews = load_reviews_at(product_folder, "all", range(min(5, review_columns.num_rows)))
+    elif os.path.exists(recursive_analysis_file):
         with open(recursive_analysis_file, 'r') as f:
             recursive_data = json.load(f)
         
@@ -1290,8 +1346,9 @@ def product_overview(product_folder):
         
         # Calculate metrics
         total_reviews = len(all_reviews)
-        positive_count = sum(1 for r in all_reviews if analyze_sentiment(str(r.get("review_text", ""))) == "positive")
-        negative_count = sum(1 for r in all_reviews if analyze_sentiment(str(r.get("review_text", ""))) == "negative")
+        sentiment_counts = analyze_sentiment_batch([str(r.get("review_text", "")) for r in all_reviews]).counts()
+        positive_count = sentiment_counts["positive"]
+        negative_count = sentiment_counts["negative"]
         neutral_count = total_reviews - positive_count - negative_count
         
         # Default values for enhanced features
@@ -1323,7 +1380,8 @@ def product_overview(product_folder):
 
     
     # Load sample reviews (first 5)
-    sample_reviews = all_reviews[:5] if all_reviews else []
+    if review_columns is None:
+        sample_reviews = all_reviews[:5] if all_reviews else []
     
     return render_template(
         "product_overview.html",
@@ -1357,91 +1415,52 @@ def enhanced_analyze():
         if initial_count < 10 or initial_count > 500:
             initial_count = 100
 
-        try:
-            # Use enhanced scraping function
-            print("Starting enhanced packaging review analysis...")
-            reviews_data = scrape_enhanced_packaging_reviews(
-                review_url=review_url,
-                email=email,
-                password=password,
-                initial_count=initial_count,
-                use_headless=use_headless
-            )
-            
-            if not reviews_data:
-                return "Failed to extract reviews. Please check your credentials and URL.", 400
-
-            # Perform comprehensive analysis
-            print("Performing comprehensive analysis...")
-            analysis_results = analyze_packaging_reviews_comprehensive(reviews_data)
-            
-            # Save analysis results
-            product_folder = reviews_data['product_folder']
-            analysis_file = os.path.join("static", product_folder, "enhanced_analysis.json")
-            os.makedirs(os.path.dirname(analysis_file), exist_ok=True)
-            
-            with open(analysis_file, 'w') as f:
-                json.dump(analysis_results, f, indent=2, default=str)
-            
-            print(f"Enhanced analysis completed. Results saved to {analysis_file}")
-            
-            # Redirect to enhanced results page
-            return redirect(f"/enhanced_results/{product_folder}")
-            
-        except Exception as e:
-            print(f"Error in enhanced analysis: {e}")
-            return """
-            <!DOCTYPE html>
-            <html lang="en">
-            <head>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <title>PackSense - Live Scraping Temporarily Paused</title>
-                <style>
-                    body { font-family: Arial, sans-serif; background: #000; color: #fff; margin: 0; padding: 20px; text-align: center; }
-                    .container { max-width: 800px; margin: 0 auto; padding: 50px 20px; }
-                    .header { margin-bottom: 40px; }
-                    .message { background: #222; padding: 30px; border-radius: 15px; margin-bottom: 30px; }
-                    .options { background: #333; padding: 30px; border-radius: 15px; margin-bottom: 30px; }
-                    .btn { display: inline-block; background: #007bff; color: #fff; padding: 15px 30px; text-decoration: none; border-radius: 8px; margin: 10px; font-weight: bold; }
-                    .btn:hover { background: #0056b3; }
-                    .btn-demo { background: #28a745; }
-                    .btn-demo:hover { background: #1e7e34; }
-                    .btn-github { background: #6f42c1; }
-                    .btn-github:hover { background: #5a32a3; }
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="header">
-                        <h1>🚫 Live Scraping Temporarily Paused</h1>
-                    </div>
-                    
-                    <div class="message">
-                        <h2>Amazon has detected automated activity from our service</h2>
-                        <p>We're working with their team to align on a compliant path forward. During this review, live scraping is disabled.</p>
-                    </div>
-                    
-                    <div class="options">
-                        <h3>What you can do now:</h3>
-                        <p><strong>Explore Demo Mode</strong> — full UI with sample data (no scraping required)</p>
-                        <p><strong>Run Locally</strong> — clone the repo and run on your machine</p>
-                        
-                        <div style="margin-top: 30px;">
-                            <a href="/demo" class="btn btn-demo">🎯 Try Demo Mode</a>
-                            <a href="https://github.com/packsense394-cyber/PackSense_app" class="btn btn-github" target="_blank">📁 View on GitHub</a>
-                        </div>
-                    </div>
-                    
-                    <p><em>We'll restore live functionality as soon as the review wraps.</em></p>
-                </div>
-            </body>
-            </html>
-            """, 503
+        job_id = submit_job(
+            "enhanced_analysis",
+            {"review_url": review_url, "initial_count": initial_count, "use_headless": use_headless},
+            secrets={"email": email, "password": password}
+        )
+        print(f"Queued enhanced analysis job {job_id}")
+        return job_submitted_response(job_id)
 
     # GET request - show form
     return render_template("enhanced_analyze.html")
 
+def job_submitted_response(job_id):
+    """202 + job id for API clients, otherwise the polling page"""
+    if request.accept_mimetypes.best == "application/json":
+        return jsonify({
+            'job_id': job_id,
+            'status_url': url_for('api_job_status', job_id=job_id)
+        }), 202
+    return redirect(url_for('job_status_page', job_id=job_id))
+
+@app.route("/jobs/<job_id>")
+def job_status_page(job_id):
+    """Progress page for a queued scrape; polls /api/jobs/<job_id>"""
+    job = get_job(job_id)
+    if job is None:
+        return "Job not found", 404
+    return render_template("job_status.html", job=job)
+
+@app.route("/api/jobs/<job_id>")
+def api_job_status(job_id):
+    """Current status, progress message and result of a background job"""
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({
+        'job_id': job['id'],
+        'kind': job['kind'],
+        'status': job['status'],
+        'progress': job['progress'],
+        'result': job['result'],
+        'error': job['error'],
+        'created_at': job['created_at'],
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at']
+    })
+
 @app.route("/enhanced_results/<product_folder>")
 def enhanced_results(product_folder):
     """Enhanced results page with sidebar and comprehensive analysis"""
@@ -1462,41 +1481,85 @@ def enhanced_results(product_folder):
         print(f"Error loading enhanced results: {e}")
         return f"Error loading results: {str(e)}", 500
 
+# Page size of /api/filter_reviews; ?limit= may raise it up to the maximum
+FILTER_PAGE_SIZE = 50
+FILTER_PAGE_MAX = 500
+
+def encode_review_cursor(index: int) -> str:
+    """Opaque resume token: the group position of the next review to scan"""
+    return base64.urlsafe_b64encode(json.dumps({'start': index}).encode('utf-8')).decode('ascii')
+
+def decode_review_cursor(cursor: str) -> int:
+    try:
+        start = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))['start']
+    except (ValueError, KeyError, TypeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(start, int) or start < 0:
+        raise ValueError('Invalid cursor')
+    return start
+
+def iter_filtered_reviews(product_folder, review_type, sentiment, keyword, start=0):
+    """
+    (index, review) pairs of a product's reviews matching the filters, streamed
+    from enhanced_analysis.json, the review store, or recursive_analysis.json.
+    Returns None when the product has no analysis.
+    """
+    group = 'initial' if review_type == 'initial' else 'packaging'
+    sentiment = None if sentiment == 'all' else sentiment
+    folder = os.path.join("static", product_folder)
+    analysis_file = os.path.join(folder, "enhanced_analysis.json")
+    if os.path.exists(analysis_file):
+        return iter_json_reviews(analysis_file, group, sentiment, keyword or None, start)
+    matches = iter_reviews(product_folder, group, sentiment, keyword or None, start)
+    if matches is None:
+        recursive_analysis_file = os.path.join(folder, "recursive_analysis.json")
+        if os.path.exists(recursive_analysis_file):
+            matches = iter_json_reviews(recursive_analysis_file, group, sentiment, keyword or None, start)
+    return matches
+
 @app.route("/api/filter_reviews/<product_folder>")
 def api_filter_reviews(product_folder):
-    """API endpoint for filtering reviews by sentiment and keyword"""
+    """
+    API endpoint for filtering reviews by sentiment and keyword. Returns one
+    page plus a next_cursor to pass back as ?cursor=; with ?format=ndjson the
+    matching reviews are streamed one JSON object per line instead.
+    """
     try:
         sentiment = request.args.get('sentiment', 'all')
         keyword = request.args.get('keyword', '')
         review_type = request.args.get('type', 'packaging')  # 'initial' or 'packaging'
+        stream = (request.args.get('format') == 'ndjson'
+                  or request.accept_mimetypes.best == 'application/x-ndjson')
+        try:
+            start = decode_review_cursor(request.args['cursor']) if request.args.get('cursor') else 0
+            limit = request.args.get('limit', type=int)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Load analysis results
-        analysis_file = os.path.join("static", product_folder, "enhanced_analysis.json")
-        if not os.path.exists(analysis_file):
+        matches = iter_filtered_reviews(product_folder, review_type, sentiment, keyword, start)
+        if matches is None:
             return jsonify({'error': 'Analysis results not found'}), 404
-            
-        with open(analysis_file, 'r') as f:
-            analysis_results = json.load(f)
         
-        # Get reviews based on type
-        if review_type == 'initial':
-            reviews = analysis_results['initial_reviews']['reviews']
-        else:
-            reviews = analysis_results['packaging_reviews']['reviews']
-        
-        # Apply filters
-        if sentiment != 'all':
-            reviews = filter_reviews_by_sentiment(reviews, sentiment)
-        
-        if keyword:
-            reviews = filter_reviews_by_keyword(reviews, keyword)
+        if stream:
+            if limit is not None:
+                matches = itertools.islice(matches, max(limit, 0))
+            
+            def generate():
+                for _, review in matches:
+                    yield json.dumps(review, default=str) + "\n"
+            
+            return Response(generate(), mimetype='application/x-ndjson')
         
-        # Limit results for performance
-        reviews = reviews[:50]  # Limit to 50 reviews for display
+        limit = min(max(limit or FILTER_PAGE_SIZE, 1), FILTER_PAGE_MAX)
+        # One extra match tells whether another page exists
+        page = list(itertools.islice(matches, limit + 1))
+        next_cursor = encode_review_cursor(page[limit - 1][0] + 1) if len(page) > limit else None
+        reviews = [review for _, review in page[:limit]]
         
         return jsonify({
             'reviews': reviews,
             'count': len(reviews),
+            'next_cursor': next_cursor,
             'filters': {
                 'sentiment': sentiment,
                 'keyword': keyword,
@@ -1510,16 +1573,32 @@ def api_filter_reviews(product_folder):
 
 @app.route("/download_images/<product_folder>")
 def download_images(product_folder):
-    img_dir = os.path.join("static", product_folder, "review_images")
-    if not os.path.exists(img_dir): 
+    """
+    ZIP of the snapshot's review images. The archive is cached per image set
+    (see image_archive_key): a cached one is served with Range and ETag
+    support, otherwise it is streamed to the client while being cached.
+    """
+    manifest = ensure_image_manifest(product_folder)
+    if manifest is None:
         return "No images", 404
-    zip_name = f"{product_folder}_images.zip"
-    zip_path = os.path.join("static", product_folder, zip_name)
-    with zipfile.ZipFile(zip_path, 'w') as z:
-        for root, _, files in os.walk(img_dir):
-            for f in files:
-                z.write(os.path.join(root, f), arcname=f)
-    return send_file(zip_path, as_attachment=True)
+    key = image_archive_key(product_folder, manifest)
+    archive_path = image_archive_path(product_folder, key)
+    download_name = f"{product_folder}_images.zip"
+
+    if not os.path.exists(archive_path) and request.range:
+        # Resuming needs the finished archive to seek into
+        for _ in stream_image_archive(product_folder, manifest, key):
+            pass
+    if os.path.exists(archive_path):
+        return send_file(
+            archive_path, mimetype="application/zip", as_attachment=True,
+            download_name=download_name, etag=key, max_age=0
+        )
+
+    response = Response(stream_image_archive(product_folder, manifest, key), mimetype="application/zip")
+    response.headers.set("Content-Disposition", "attachment", filename=download_name)
+    response.set_etag(key)
+    return response
 
 @app.route("/chat", methods=["POST"])
 def chat():
@@ -1574,10 +1653,7 @@ def chat():
     # 4) Sentiment summary
     elif "sentiment summary" in lm:
         # count positives, negatives, neutrals
-        counts = {"positive": 0, "negative": 0, "neutral": 0}
-        for r in reviews:
-            s = analyze_sentiment(str(r.get("review_text", "")))
-            counts[s] += 1
+        counts = analyze_sentiment_batch([str(r.get("review_text", "")) for r in reviews]).counts()
         reply = (
             f"Sentiment breakdown:\n"
             f"Positive: {counts['positive']}\n"
@@ -1642,10 +1718,7 @@ def chat():
     # 10) Show sentiment bar chart
     elif lm == "show sentiment chart":
         # count positives, negatives, neutrals
-        counts = {"positive": 0, "negative": 0, "neutral": 0}
-        for r in reviews:
-            s = analyze_sentiment(str(r.get("review_text", "")))
-            counts[s] += 1
+        counts = analyze_sentiment_batch([str(r.get("review_text", "")) for r in reviews]).counts()
         return jsonify(
             reply="__chart__",
             chart_type="sentiment_bar",
@@ -1679,10 +1752,15 @@ def scheduled_scrape():
     name, revs = scrape_all_amazon_reviews(review_url, email, password, review_type="all", use_headless=True)
     print(f"Scheduled scrape found {len(revs)} reviews for {name}" if revs else "No new reviews")
 
-scheduler = BackgroundScheduler()
-scheduler.add_job(scheduled_scrape, 'cron', hour=10, minute=0)
-scheduler.start()
-atexit.register(lambda: scheduler.shutdown())
+# Job pool workers are spawned processes that may re-import this module;
+# only the web process runs the scheduler and reconciles the job table.
+if multiprocessing.parent_process() is None:
+    init_job_store()
+    
+    scheduler = BackgroundScheduler()
+    scheduler.add_job(scheduled_scrape, 'cron', hour=10, minute=0)
+    scheduler.start()
+    atexit.register(lambda: scheduler.shutdown())
 
 @app.route('/demo_cooccurrence')
 def demo_cooccurrence():
@@ -1757,8 +1835,8 @@ def neo4j_cooccurrence(product_folder):
     try:
         from neo4j_utils import get_neo4j_network_data
         
-        # Try to get data from Neo4j
-        network_data = get_neo4j_network_data()
+        # Try to get this product's graph from Neo4j
+        network_data = get_neo4j_network_data(product_folder)
         
         if network_data:
             return jsonify(network_data)
@@ -1768,32 +1846,31 @@ def neo4j_cooccurrence(product_folder):
             recursive_analysis_file = os.path.join(folder, "recursive_analysis.json")
             
             if os.path.exists(recursive_analysis_file):
-                with open(recursive_analysis_file, 'r') as f:
-                    recursive_data = json.load(f)
+                # Only the packaging review texts are needed, read just that column when possible
+                text_column = None
+                try:
+                    text_column = read_review_columns(product_folder, "packaging", ["review_text"])
+                except Exception as e:
+                    print(f"Error reading review store: {e}")
                 
-                packaging_reviews_data = recursive_data.get('packaging_reviews', {})
-                if isinstance(packaging_reviews_data, dict):
-                    reviews = packaging_reviews_data.get('reviews', [])
+                if text_column is not None:
+                    packaging_keywords_flat = review_store_summary(product_folder).get('packaging_terms_searched', [])
+                    review_texts = [str("" if text is None else text) for text in text_column["review_text"].to_pylist()]
                 else:
-                    reviews = []
+                    with open(recursive_analysis_file, 'r') as f:
+                        recursive_data = json.load(f)
                     
-                packaging_keywords_flat = recursive_data.get('packaging_terms_searched', [])
+                    packaging_reviews_data = recursive_data.get('packaging_reviews', {})
+                    if isinstance(packaging_reviews_data, dict):
+                        reviews = packaging_reviews_data.get('reviews', [])
+                    else:
+                        reviews = []
+                        
+                    packaging_keywords_flat = recursive_data.get('packaging_terms_searched', [])
+                    review_texts = [str(review.get("review_text", "")) for review in reviews]
                 
-                # Build co-occurrence data
-                cooccurrence_data = {}
-                for i, term1 in enumerate(packaging_keywords_flat):
-                    for j, term2 in enumerate(packaging_keywords_flat):
-                        if i != j:
-                            cooccurrence_count = 0
-                            for review in reviews:
-                                review_text = str(review.get("review_text", "")).lower()
-                                if term1.lower() in review_text and term2.lower() in review_text:
-                                    cooccurrence_count += 1
-                            
-                            if cooccurrence_count > 0:
-                                if term1 not in cooccurrence_data:
-                                    cooccurrence_data[term1] = {}
-                                cooccurrence_data[term1][term2] = cooccurrence_count
+                # Build co-occurrence data in a single pass over the reviews
+                cooccurrence_data, _ = build_term_cooccurrence(review_texts, packaging_keywords_flat)
                 
                 # Convert to network format
                 nodes = [{'id': term, 'name': term} for term in cooccurrence_data.keys()]
@@ -1816,15 +1893,22 @@ def neo4j_cooccurrence(product_folder):
     except Exception as e:
         return jsonify({'error': str(e)})
 
+@app.route('/neo4j_term_details/<product_folder>/<term_name>')
 @app.route('/neo4j_term_details/<term_name>')
-def neo4j_term_details(term_name):
-    """Get detailed information about a term from Neo4j"""
+def neo4j_term_details(term_name, product_folder=None):
+    """
+    Get detailed information about a term of one product from Neo4j. Without a
+    product (the old /neo4j_term_details/<term> form) the most recently scraped
+    snapshot with a graph is used, as the single graph used to be.
+    """
     try:
-        from neo4j_utils import Neo4jCooccurrenceGraph
+        from neo4j_utils import get_neo4j_term_details, latest_neo4j_product
+        
+        product_folder = product_folder or request.args.get('product') or latest_neo4j_product()
+        if not product_folder:
+            return jsonify({'error': 'Term not found'})
         
-        graph = Neo4jCooccurrenceGraph()
-        details = graph.get_term_details(term_name)
-        graph.close()
+        details = get_neo4j_term_details(product_folder, term_name)
         
         if details:
             return jsonify(details)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Optional
+
+# Root directory for computed artifacts. Kept outside of "static" so cached
+# template contexts are never served directly.
+CACHE_ROOT = os.environ.get("PACKSENSE_CACHE_DIR", "cache")
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> Optional[str]:
+    """Return the SHA-256 hex digest of a file, or None if it does not exist"""
+    if not path or not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# path -> (mtime_ns, size, digest); a file is only re-hashed after it changes
+_file_digests = {}
+_file_digests_lock = threading.Lock()
+
+def cached_file_digest(path: str) -> Optional[str]:
+    """file_digest memoized on the file's mtime and size, for keys computed per request"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    with _file_digests_lock:
+        cached = _file_digests.get(path)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    digest = file_digest(path)
+    with _file_digests_lock:
+        _file_digests[path] = (stat.st_mtime_ns, stat.st_size, digest)
+    return digest
+
+def artifact_key(*parts) -> str:
+    """Combine version strings and file digests into a single cache key"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()[:32]
+
+def artifact_path(namespace: str, name: str, key: str, ext: str = "json") -> str:
+    """Content-addressed location of an artifact: cache/<namespace>/<name>-<key>.<ext>"""
+    return os.path.join(CACHE_ROOT, namespace, f"{name}-{key}.{ext}")
+
+def atomic_write_bytes(path: str, data: bytes):
+    """Write bytes to a temporary file next to `path` and rename it into place"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def remove_stale_artifacts(namespace: str, name: str, keep_key: str, ext: str = "json"):
+    """Delete older versions of an artifact once a new one has been written"""
+    folder = os.path.join(CACHE_ROOT, namespace)
+    if not os.path.isdir(folder):
+        return
+    keep = f"{name}-{keep_key}.{ext}"
+    for fname in os.listdir(folder):
+        if fname.startswith(f"{name}-") and fname.endswith(f".{ext}") and fname != keep:
+            try:
+                os.remove(os.path.join(folder, fname))
+            except OSError:
+                pass
+
+def load_artifact(namespace: str, name: str, key: str) -> Optional[Any]:
+    """Load a cached JSON artifact, returning None on a miss or unreadable file"""
+    path = artifact_path(namespace, name, key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable cache artifact {path}: {e}")
+        return None
+
+def save_artifact(namespace: str, name: str, key: str, payload: Any) -> str:
+    """Atomically store a JSON artifact and drop any stale versions of it"""
+    path = artifact_path(namespace, name, key)
+    data = json.dumps(payload, default=str).encode('utf-8')
+    atomic_write_bytes(path, data)
+    remove_stale_artifacts(namespace, name, key)
+    return path
+
+def save_compressed_artifact(namespace: str, name: str, key: str, payload: Any) -> str:
+    """Store a JSON artifact gzip-compressed (<name>-<key>.json.gz) so it can be served as-is"""
+    path = artifact_path(namespace, name, key, "json.gz")
+    data = json.dumps(payload, default=str).encode('utf-8')
+    atomic_write_bytes(path, gzip.compress(data, compresslevel=6))
+    remove_stale_artifacts(namespace, name, key, "json.gz")
+    return path
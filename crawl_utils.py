@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+
+import os
+import queue
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+# Browsers crawling keyword terms at once, including the signed-in one
+CRAWL_WORKERS = int(os.environ.get("PACKSENSE_CRAWL_WORKERS", "3"))
+
+# Page loads per second across every browser, and how many may go back to back
+CRAWL_RATE = float(os.environ.get("PACKSENSE_CRAWL_RATE", "1.0"))
+CRAWL_BURST = int(os.environ.get("PACKSENSE_CRAWL_BURST", "3"))
+
+class RateBudget:
+    """
+    Token bucket shared by every crawl worker. acquire() blocks until one more
+    page load fits in the budget; a rate of 0 or less disables the limit.
+    """
+
+    def __init__(self, rate: float = CRAWL_RATE, burst: int = CRAWL_BURST):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited = 0.0
+        self.acquired = 0
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            # A negative balance is this caller's place in the queue
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.acquired += 1
+            self.waited += delay
+        if delay:
+            time.sleep(delay)
+
+def copy_session_cookies(cookies: list, target_driver, origin: str) -> int:
+    """Load `origin` in `target_driver` and install `cookies` there; returns how many were set"""
+    # Cookies can only be added for the domain currently loaded
+    target_driver.get(origin)
+    copied = 0
+    for cookie in cookies:
+        cookie = {key: value for key, value in cookie.items() if key != "sameSite"}
+        try:
+            target_driver.add_cookie(cookie)
+            copied += 1
+        except Exception as e:
+            print(f"Could not copy cookie {cookie.get('name')}: {e}")
+    return copied
+
+class CrawlCoordinator:
+    """
+    Shards keyword terms across a bounded pool of browsers. The first worker
+    is the caller's signed-in driver; the others are started by
+    `driver_factory` and handed its cookies, so no one signs in again.
+    `crawl_term(driver, term, budget)` does the per-term work and must only
+    draw page loads through `budget`. Results are merged by the callee (the
+    scraper adds every page to the shared review index).
+    """
+
+    def __init__(self, driver, driver_factory: Callable, crawl_term: Callable, origin: str,
+                 workers: int = CRAWL_WORKERS, budget: Optional[RateBudget] = None):
+        self.driver = driver
+        self.driver_factory = driver_factory
+        self.crawl_term = crawl_term
+        self.origin = origin
+        self.workers = max(workers, 1)
+        self.budget = budget or RateBudget()
+        self.results = {}
+        self.errors = {}
+        self._cookies = []
+        self._lock = threading.Lock()
+
+    def _start_driver(self, worker: int):
+        try:
+            driver = self.driver_factory()
+        except Exception as e:
+            print(f"Crawl worker {worker}: could not start a browser: {e}")
+            return None
+        try:
+            self.budget.acquire()
+            copied = copy_session_cookies(self._cookies, driver, self.origin)
+            print(f"Crawl worker {worker}: started with {copied} session cookies")
+            return driver
+        except Exception as e:
+            print(f"Crawl worker {worker}: could not share the session: {e}")
+            driver.quit()
+            return None
+
+    def _work(self, worker: int, driver, terms: queue.Queue):
+        while True:
+            try:
+                term = terms.get_nowait()
+            except queue.Empty:
+                return
+            started = time.perf_counter()
+            try:
+                result = self.crawl_term(driver, term, self.budget)
+            except Exception as e:
+                # The browser may be gone; leave the remaining terms to the others
+                print(f"Crawl worker {worker}: error on term '{term}', stopping this browser: {e}")
+                with self._lock:
+                    self.errors[term] = str(e)
+                return
+            with self._lock:
+                self.results[term] = result
+            print(f"Crawl worker {worker}: term '{term}' done in {time.perf_counter() - started:.1f}s")
+
+    def run(self, terms: Iterable[str]) -> dict:
+        """
+        Crawl every term and return {term: crawl_term result}. Terms that still
+        fail after a retry on the caller's browser are in self.errors.
+        """
+        pending = queue.Queue()
+        terms = list(terms)
+        for term in terms:
+            pending.put(term)
+        size = min(self.workers, len(terms))
+        if size == 0:
+            return {}
+
+        # Read once up front: the signed-in driver is busy crawling once workers start
+        self._cookies = self.driver.get_cookies() if size > 1 else []
+        extra_drivers = []
+        threads = []
+        started = time.perf_counter()
+        try:
+            # The caller's browser starts on the queue straight away while the others boot
+            threads.append(threading.Thread(target=self._work, args=(0, self.driver, pending),
+                                            name="crawl-worker-0", daemon=True))
+            threads[0].start()
+            for worker in range(1, size):
+                driver = self._start_driver(worker)
+                if driver is None:
+                    continue
+                extra_drivers.append(driver)
+                thread = threading.Thread(target=self._work, args=(worker, driver, pending),
+                                          name=f"crawl-worker-{worker}", daemon=True)
+                thread.start()
+                threads.append(thread)
+            for thread in threads:
+                thread.join()
+        finally:
+            for driver in extra_drivers:
+                try:
+                    driver.quit()
+                except Exception as e:
+                    print(f"Error closing crawl browser: {e}")
+
+        # Terms that failed, or were left when every browser stopped, get one
+        # more try on the caller's browser
+        leftover = [term for term in terms if term not in self.results]
+        if leftover:
+            print(f"Retrying {len(leftover)} terms on the signed-in browser: {leftover}")
+            for term in leftover:
+                try:
+                    self.results[term] = self.crawl_term(self.driver, term, self.budget)
+                    self.errors.pop(term, None)
+                except Exception as e:
+                    print(f"Crawl retry: error on term '{term}': {e}")
+                    self.errors[term] = str(e)
+
+        print(f"Crawled {len(self.results)}/{len(terms)} terms with {len(threads)} browsers "
+              f"in {time.perf_counter() - started:.1f}s "
+              f"({self.budget.acquired} page loads, {self.budget.waited:.1f}s rate-limited)")
+        return self.results
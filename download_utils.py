@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from cache_utils import atomic_write_bytes
+
+# Headers that mimic a real browser fetching an image
+DEFAULT_IMAGE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Referer': 'https://www.amazon.com/',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'image',
+    'Sec-Fetch-Mode': 'no-cors',
+    'Sec-Fetch-Site': 'cross-site',
+}
+
+DOWNLOAD_WORKERS = int(os.environ.get("PACKSENSE_DOWNLOAD_WORKERS", "8"))
+DOWNLOAD_TIMEOUT = 20
+
+# Per-folder record of which URL was saved as which file, so later runs reuse it
+DOWNLOAD_INDEX_FILENAME = ".download_index.json"
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_shared_session(pool_size: int = DOWNLOAD_WORKERS) -> requests.Session:
+    """Process-wide keep-alive session shared by every downloader"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(pool_size, 4))
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(DEFAULT_IMAGE_HEADERS)
+            _session = session
+        return _session
+
+def candidate_image_urls(image_url: str) -> list:
+    """The original URL followed by the larger/alternate-host Amazon variants worth trying"""
+    urls_to_try = [image_url]
+    if 'amazon.com' in image_url:
+        # Try to get a larger version by modifying the URL
+        if '_SY88' in image_url:
+            urls_to_try.extend([
+                image_url.replace('_SY88', '_AC_SL1500'),
+                image_url.replace('_SY88', '_AC_SL1000'),
+                image_url.replace('_SY88', '_AC_UL1500')
+            ])
+        if '_AC_SL1500' in image_url:
+            urls_to_try.extend([
+                image_url.replace('_AC_SL1500', '_AC_SL1000'),
+                image_url.replace('_AC_SL1500', '_AC_UL1500')
+            ])
+        if 'images-na.ssl-images-amazon.com' in image_url:
+            urls_to_try.append(image_url.replace('images-na.ssl-images-amazon.com', 'm.media-amazon.com'))
+        if 'm.media-amazon.com' in image_url:
+            urls_to_try.append(image_url.replace('m.media-amazon.com', 'images-na.ssl-images-amazon.com'))
+    return urls_to_try
+
+class DownloadStats:
+    """Thread-safe counters for one downloader run"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requested = 0
+        self.downloaded = 0
+        self.reused = 0
+        self.failed = 0
+        self.attempts = 0
+        self.bytes = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def add(self, **counts):
+        with self._lock:
+            for key, value in counts.items():
+                setattr(self, key, getattr(self, key) + value)
+
+    def record_latency(self, seconds: float):
+        with self._lock:
+            self.latency_total += seconds
+            self.latency_max = max(self.latency_max, seconds)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                'requested': self.requested,
+                'downloaded': self.downloaded,
+                'reused': self.reused,
+                'failed': self.failed,
+                'attempts': self.attempts,
+                'bytes': self.bytes,
+                'avg_latency_s': round(self.latency_total / self.downloaded, 3) if self.downloaded else 0.0,
+                'max_latency_s': round(self.latency_max, 3),
+            }
+
+class ImageDownloader:
+    """
+    Bounded thread pool that downloads review images while the scraper keeps
+    walking the page. URLs are deduplicated within a run and, through a small
+    index file per folder, across runs. submit() returns a Future resolving
+    to the saved path (possibly an earlier file for the same URL) or None.
+    """
+
+    def __init__(self, max_workers: int = DOWNLOAD_WORKERS, timeout: float = DOWNLOAD_TIMEOUT,
+                 session: Optional[requests.Session] = None):
+        self.timeout = timeout
+        self.session = session or get_shared_session(max_workers)
+        self.stats = DownloadStats()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-download")
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._indexes = {}
+        self._dirty = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _index(self, folder: str) -> dict:
+        # caller holds self._lock
+        if folder not in self._indexes:
+            index = {}
+            path = os.path.join(folder, DOWNLOAD_INDEX_FILENAME)
+            if os.path.exists(path):
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        index = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"Ignoring unreadable download index {path}: {e}")
+            self._indexes[folder] = index
+        return self._indexes[folder]
+
+    def submit(self, image_url: str, folder: str, filename: str) -> Future:
+        self.stats.add(requested=1)
+        key = (folder, image_url)
+        with self._lock:
+            # A finished download is found through the index, and only while its file is still there
+            known = self._index(folder).get(image_url)
+            if known and os.path.exists(os.path.join(folder, known)) and os.path.getsize(os.path.join(folder, known)) > 0:
+                self.stats.add(reused=1)
+                future = Future()
+                future.set_result(os.path.join(folder, known))
+                return future
+            if key in self._inflight:
+                self.stats.add(reused=1)
+                return self._inflight[key]
+            future = self._executor.submit(self._download, image_url, folder, filename)
+            self._inflight[key] = future
+        # Only pending downloads are shared; a failed URL is tried again on its next submit
+        future.add_done_callback(lambda f: self._forget(key, f))
+        return future
+
+    def _forget(self, key, future: Future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def download(self, image_url: str, folder: str, filename: str) -> Optional[str]:
+        """Blocking download through the pool"""
+        return self.submit(image_url, folder, filename).result()
+
+    def _download(self, image_url: str, folder: str, filename: str) -> Optional[str]:
+        print(f"Attempting to download: {image_url}")
+        start = time.perf_counter()
+        for url in candidate_image_urls(image_url):
+            self.stats.add(attempts=1)
+            try:
+                resp = self.session.get(url, timeout=self.timeout)
+            except requests.exceptions.Timeout:
+                print(f"Timeout downloading from {url}")
+                continue
+            except requests.exceptions.ConnectionError:
+                print(f"Connection error downloading from {url}")
+                continue
+            except Exception as e:
+                print(f"Exception downloading from {url}: {e}")
+                continue
+
+            if resp.status_code != 200:
+                if resp.status_code == 403:
+                    print(f"Access forbidden (403) for {url} - Amazon may be blocking")
+                else:
+                    print(f"HTTP {resp.status_code} for {url}")
+                continue
+            # Check if the response is actually an image
+            content_type = resp.headers.get('content-type', '')
+            if not content_type.startswith('image/') or not resp.content:
+                print(f"Not an image: {content_type}")
+                continue
+
+            path = os.path.join(folder, filename)
+            try:
+                atomic_write_bytes(path, resp.content)
+            except OSError as e:
+                print(f"Error saving {path}: {e}")
+                break
+            elapsed = time.perf_counter() - start
+            self.stats.add(downloaded=1, bytes=len(resp.content))
+            self.stats.record_latency(elapsed)
+            with self._lock:
+                self._index(folder)[image_url] = filename
+                self._dirty.add(folder)
+            print(f"Successfully downloaded: {path}")
+            return path
+
+        self.stats.add(failed=1)
+        print(f"All download attempts failed for {filename}")
+        return None
+
+    def flush_index(self):
+        """Persist the URL -> filename index of every folder written to"""
+        with self._lock:
+            dirty = [(folder, dict(self._indexes[folder])) for folder in self._dirty]
+            self._dirty.clear()
+        for folder, index in dirty:
+            try:
+                atomic_write_bytes(
+                    os.path.join(folder, DOWNLOAD_INDEX_FILENAME),
+                    json.dumps(index, indent=2, sort_keys=True).encode('utf-8')
+                )
+            except OSError as e:
+                print(f"Error saving download index for {folder}: {e}")
+
+    def close(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+        self.flush_index()
+        print(f"Image download stats: {self.stats.as_dict()}")
+
+_default_downloader = None
+_default_lock = threading.Lock()
+
+def get_default_downloader() -> ImageDownloader:
+    """Long-lived downloader for one-off blocking downloads such as the product image"""
+    global _default_downloader
+    with _default_lock:
+        if _default_downloader is None:
+            _default_downloader = ImageDownloader(max_workers=2)
+        return _default_downloader
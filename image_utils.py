@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
+
+import numpy as np
+from PIL import Image, features
+
+from cache_utils import artifact_key, artifact_path, atomic_write_bytes, remove_stale_artifacts
+
+# Per-snapshot record of the review images: content hash, perceptual hash,
+# dimensions and thumbnails of every file in static/<folder>/review_images.
+# While the folder is unchanged (same mtime) listing and deduping the images
+# is a single read of this file.
+IMAGE_MANIFEST_FILENAME = "image_manifest.json"
+# Bump when manifest entries, thumbnail rendering or duplicate matching change
+IMAGE_MANIFEST_VERSION = 2
+
+# A dHash with fewer bits than this set (or clear) describes a near-flat image:
+# blank, white or single-colour photos all hash to about 0000000000000000, so
+# such hashes never mark one image a near-copy of another
+DHASH_MIN_BITS = 8
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif')
+
+# Thumbnails of every snapshot share one tree keyed by content hash, so a photo
+# scraped again for a later snapshot is resized only once
+DERIVATIVE_ROOT = os.path.join("static", "derivatives")
+THUMBNAIL_WIDTH = int(os.environ.get("PACKSENSE_THUMBNAIL_WIDTH", "320"))
+THUMBNAIL_FORMAT = "webp" if features.check("webp") else "jpg"
+
+THUMB_WORKERS = int(os.environ.get("PACKSENSE_THUMB_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Below this many new images the pool start-up costs more than it saves
+THUMB_POOL_MIN_IMAGES = 8
+
+def image_manifest_path(product_folder: str) -> str:
+    return os.path.join("static", product_folder, IMAGE_MANIFEST_FILENAME)
+
+def thumbnail_path(content_hash: str, width: int = THUMBNAIL_WIDTH, fmt: str = THUMBNAIL_FORMAT) -> str:
+    """Location of a thumbnail relative to static/"""
+    return os.path.relpath(
+        os.path.join(DERIVATIVE_ROOT, content_hash[:2], f"{content_hash}-{width}.{fmt}"),
+        "static"
+    ).replace(os.sep, "/")
+
+def difference_hash(img: Image.Image) -> str:
+    """64-bit dHash: survives recompression, so re-encoded copies of a photo match"""
+    gray = np.asarray(img.convert("L").resize((9, 8), Image.LANCZOS), dtype=np.int16)
+    bits = (gray[:, 1:] > gray[:, :-1]).flatten()
+    return f"{int(''.join('1' if b else '0' for b in bits), 2):016x}"
+
+def _near_duplicate_key(entry: dict) -> Optional[tuple]:
+    """dHash and dimensions of an image detailed enough to be matched on its dHash alone"""
+    dhash = entry.get("dhash")
+    if dhash is None:
+        return None
+    bits = bin(int(dhash, 16)).count("1")
+    if bits < DHASH_MIN_BITS or bits > 64 - DHASH_MIN_BITS:
+        return None
+    return (dhash, entry.get("width"), entry.get("height"))
+
+def describe_image(path: str, width: int = THUMBNAIL_WIDTH, fmt: str = THUMBNAIL_FORMAT) -> dict:
+    """
+    Manifest entry for one image file, writing its thumbnail when no snapshot
+    has produced it yet. Runs in the thumbnail process pool.
+    """
+    stat = os.stat(path)
+    entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        entry["sha256"] = hashlib.sha256(data).hexdigest()
+        with Image.open(io.BytesIO(data)) as img:
+            img.load()
+            entry["width"], entry["height"] = img.size
+            entry["dhash"] = difference_hash(img)
+            thumb = thumbnail_path(entry["sha256"], width, fmt)
+            target = os.path.join("static", thumb)
+            if not os.path.exists(target):
+                copy = img.convert("RGBA" if fmt == "webp" and img.mode in ("RGBA", "LA", "P") else "RGB")
+                copy.thumbnail((width, max(1, width * img.height // max(img.width, 1))), Image.LANCZOS)
+                buf = io.BytesIO()
+                copy.save(buf, format="WEBP" if fmt == "webp" else "JPEG", quality=80)
+                atomic_write_bytes(target, buf.getvalue())
+            entry["thumbnail"] = thumb
+    except Exception as e:
+        entry["error"] = str(e)
+    return entry
+
+def _describe_all(paths: list) -> list:
+    if len(paths) < THUMB_POOL_MIN_IMAGES or THUMB_WORKERS <= 1:
+        return [describe_image(path) for path in paths]
+    # spawn: the web process runs threads that must not be forked
+    with ProcessPoolExecutor(max_workers=THUMB_WORKERS, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return list(pool.map(describe_image, paths, chunksize=4))
+
+def _load_manifest(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable image manifest {path}: {e}")
+        return None
+    if manifest.get("version") != IMAGE_MANIFEST_VERSION or manifest.get("thumbnail_width") != THUMBNAIL_WIDTH:
+        return None
+    return manifest
+
+def ensure_image_manifest(product_folder: str) -> Optional[dict]:
+    """
+    The snapshot's image manifest, refreshed when review_images has changed.
+    Only new or modified files are hashed and thumbnailed. A file with the
+    same bytes (sha256) as an earlier one, or a re-encoded copy of it (same
+    dHash and dimensions, for images that are not near-flat), is marked with
+    duplicate_of the first file showing it.
+    Returns None when the snapshot has no review_images folder.
+    """
+    img_dir = os.path.join("static", product_folder, "review_images")
+    try:
+        dir_mtime = os.stat(img_dir).st_mtime_ns
+    except OSError:
+        return None
+    path = image_manifest_path(product_folder)
+    manifest = _load_manifest(path)
+    if manifest and manifest.get("dir_mtime_ns") == dir_mtime:
+        return manifest
+
+    known = (manifest or {}).get("images", {})
+    images, stale = {}, []
+    for fname in sorted(os.listdir(img_dir)):
+        if not fname.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        stat = os.stat(os.path.join(img_dir, fname))
+        entry = known.get(fname)
+        if entry and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+            images[fname] = entry
+        else:
+            images[fname] = None
+            stale.append(fname)
+    if stale:
+        print(f"Describing {len(stale)} new review images for {product_folder}...")
+        for fname, entry in zip(stale, _describe_all([os.path.join(img_dir, f) for f in stale])):
+            images[fname] = entry
+
+    first_by_sha, first_by_dhash = {}, {}
+    for fname, entry in images.items():
+        entry.pop("duplicate_of", None)
+        sha, near = entry.get("sha256"), _near_duplicate_key(entry)
+        if sha is None or "error" in entry:
+            continue
+        original = first_by_sha.get(sha) or (first_by_dhash.get(near) if near else None)
+        if original is not None:
+            entry["duplicate_of"] = original
+            continue
+        first_by_sha[sha] = fname
+        if near:
+            first_by_dhash[near] = fname
+
+    manifest = {
+        "version": IMAGE_MANIFEST_VERSION,
+        "thumbnail_width": THUMBNAIL_WIDTH,
+        "dir_mtime_ns": dir_mtime,
+        "images": images,
+    }
+    try:
+        atomic_write_bytes(path, json.dumps(manifest, indent=1).encode("utf-8"))
+    except OSError as e:
+        print(f"Error saving image manifest {path}: {e}")
+    return manifest
+
+def unique_image_files(manifest: Optional[dict]) -> list:
+    """Readable images of a snapshot, one per distinct photo, in file name order"""
+    if not manifest:
+        return []
+    return [fname for fname, entry in manifest.get("images", {}).items()
+            if "error" not in entry and "duplicate_of" not in entry]
+
+# Bump when the archive layout changes so cached ZIPs are rebuilt
+IMAGE_ARCHIVE_VERSION = "1"
+ARCHIVE_CHUNK_SIZE = 1 << 16
+
+def image_archive_key(product_folder: str, manifest: dict) -> str:
+    """Key of a snapshot's image ZIP: the file names and content hashes in its manifest"""
+    contents = [(name, entry.get("sha256") or entry.get("size")) for name, entry in manifest.get("images", {}).items()]
+    return artifact_key(IMAGE_ARCHIVE_VERSION, product_folder, json.dumps(contents))
+
+def image_archive_path(product_folder: str, key: str) -> str:
+    return artifact_path(product_folder, "review_images", key, "zip")
+
+class _ArchiveStream:
+    """Write-only file for the ZIP writer: bytes are teed to `sink` and queued for the response"""
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.pending = []
+
+    def write(self, data) -> int:
+        self.sink.write(data)
+        self.pending.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.pending)
+        self.pending = []
+        return data
+
+def stream_image_archive(product_folder: str, manifest: dict, key: str) -> Iterator[bytes]:
+    """
+    Yield a ZIP of the snapshot's review images while it is written, with
+    entries stored as-is since JPEG/PNG data does not compress further. The
+    same bytes go to a temporary file that becomes the cached archive once
+    complete; a client that disconnects early leaves no partial archive.
+    """
+    img_dir = os.path.join("static", product_folder, "review_images")
+    archive_path = image_archive_path(product_folder, key)
+    folder = os.path.dirname(archive_path)
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    completed = False
+    try:
+        with os.fdopen(fd, "wb") as sink:
+            stream = _ArchiveStream(sink)
+            # The stream cannot seek, so entries carry data descriptors instead of patched headers
+            with zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_STORED) as archive:
+                for name in manifest.get("images", {}):
+                    path = os.path.join(img_dir, name)
+                    try:
+                        info = zipfile.ZipInfo.from_file(path, arcname=name)
+                        source = open(path, "rb")
+                    except OSError as e:
+                        print(f"Skipping {path} in image archive: {e}")
+                        continue
+                    with source, archive.open(info, "w") as entry:
+                        for chunk in iter(lambda: source.read(ARCHIVE_CHUNK_SIZE), b""):
+                            entry.write(chunk)
+                            yield stream.drain()
+            yield stream.drain()
+        # Concurrent first downloads each write their own file; the last rename wins with identical bytes
+        os.replace(tmp_path, archive_path)
+        completed = True
+        remove_stale_artifacts(product_folder, "review_images", key, "zip")
+    finally:
+        if not completed and os.path.exists(tmp_path):
+            os.remove(tmp_path)
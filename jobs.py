@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+
+import atexit
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+# Scrape + analysis jobs run in a separate process pool so HTTP workers only
+# submit and poll. Job state lives in a small SQLite table; credentials (Amazon
+# email and password) are handed to the worker in memory and never written to it.
+JOBS_DB_PATH = os.environ.get("PACKSENSE_JOBS_DB", os.path.join("instance", "jobs.sqlite3"))
+
+# Each scrape drives a full browser, so keep the pool small
+JOB_WORKERS = int(os.environ.get("PACKSENSE_JOB_WORKERS", "1"))
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress TEXT,
+    params TEXT,
+    result TEXT,
+    error TEXT,
+    owner_pid INTEGER,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+)
+"""
+
+_executor = None
+_executor_lock = threading.Lock()
+_initialized_paths = set()
+
+def _connect(db_path: Optional[str] = None) -> sqlite3.Connection:
+    path = db_path or JOBS_DB_PATH
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    if path not in _initialized_paths:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(_SCHEMA)
+        conn.commit()
+        _initialized_paths.add(path)
+    return conn
+
+def _pid_alive(pid) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def init_job_store(db_path: Optional[str] = None):
+    """
+    Create the job table and fail unfinished jobs whose web process is gone;
+    their credentials were never persisted, so they cannot be resumed.
+    """
+    conn = _connect(db_path)
+    try:
+        rows = conn.execute("SELECT id, owner_pid FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+        orphaned = [row["id"] for row in rows if not _pid_alive(row["owner_pid"])]
+        conn.executemany(
+            "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+            [("Interrupted by a server restart, please resubmit", time.time(), job_id) for job_id in orphaned]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+def _row_to_job(row) -> dict:
+    job = dict(row)
+    for key in ("params", "result"):
+        job[key] = json.loads(job[key]) if job[key] else None
+    return job
+
+def get_job(job_id: str, db_path: Optional[str] = None) -> Optional[dict]:
+    conn = _connect(db_path)
+    try:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    finally:
+        conn.close()
+    return _row_to_job(row) if row else None
+
+def update_job(job_id: str, db_path: Optional[str] = None, **fields):
+    """Persist status/progress/result/error changes for a job"""
+    if not fields:
+        return
+    if "result" in fields and fields["result"] is not None:
+        fields["result"] = json.dumps(fields["result"], default=str)
+    assignments = ", ".join(f"{key} = ?" for key in fields)
+    conn = _connect(db_path)
+    try:
+        conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: the web process runs scheduler/driver threads that must not be forked
+            _executor = ProcessPoolExecutor(
+                max_workers=JOB_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+def _discard_executor(broken: ProcessPoolExecutor):
+    """Forget a pool whose worker died so the next submit starts a fresh one"""
+    global _executor
+    with _executor_lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+def shutdown_job_workers():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+atexit.register(shutdown_job_workers)
+
+def submit_job(kind: str, params: dict, secrets: Optional[dict] = None, db_path: Optional[str] = None) -> str:
+    """
+    Record a queued job and hand it to the worker pool. `params` are stored;
+    `secrets` (e.g. the Amazon password) only travel to the worker process.
+    """
+    if kind not in JOB_RUNNERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    job_id = uuid.uuid4().hex
+    conn = _connect(db_path)
+    try:
+        conn.execute(
+            "INSERT INTO jobs (id, kind, status, progress, params, owner_pid, created_at) "
+            "VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+            (job_id, kind, "Waiting for a worker", json.dumps(params, default=str), os.getpid(), time.time())
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    executor = _get_executor()
+    try:
+        future = executor.submit(run_job, job_id, kind, params, secrets or {}, db_path)
+    except BrokenProcessPool:
+        # A worker died (e.g. the browser took it down); later jobs get a new pool
+        print("Job worker pool is broken, starting a new one")
+        _discard_executor(executor)
+        future = _get_executor().submit(run_job, job_id, kind, params, secrets or {}, db_path)
+
+    def _record_crash(f):
+        # run_job records its own failures; this only catches a dead worker process or a cancelled job
+        if f.cancelled():
+            print(f"Job {job_id} was cancelled before it ran")
+            update_job(job_id, db_path, status="failed", error="Cancelled by a server shutdown, please resubmit",
+                       finished_at=time.time())
+            return
+        error = f.exception()
+        if error is not None:
+            print(f"Job {job_id} worker crashed: {error}")
+            update_job(job_id, db_path, status="failed", error=str(error), finished_at=time.time())
+            if isinstance(error, BrokenProcessPool):
+                _discard_executor(executor)
+
+    future.add_done_callback(_record_crash)
+    return job_id
+
+def run_job(job_id: str, kind: str, params: dict, secrets: dict, db_path: Optional[str] = None):
+    """Worker-process entry point: run one job and persist its outcome"""
+    update_job(job_id, db_path, status="running", progress="Starting", started_at=time.time())
+
+    def progress(message):
+        print(f"[job {job_id[:8]}] {message}")
+        update_job(job_id, db_path, progress=message)
+
+    try:
+        result = JOB_RUNNERS[kind](params, secrets, progress)
+    except Exception as e:
+        print(f"Job {job_id} failed: {e}")
+        traceback.print_exc()
+        update_job(job_id, db_path, status="failed", error=str(e), finished_at=time.time())
+        return
+    update_job(job_id, db_path, status="succeeded", progress="Done", result=result, finished_at=time.time())
+
+def run_recursive_analysis(params: dict, secrets: dict, progress) -> dict:
+    """Recursive review scrape followed by the NLP analysis used by /analyze"""
+    from scraper import scrape_recursive_packaging_reviews
+    from nlp_utils import analyze_recursive_packaging_reviews
+    from review_store import load_snapshot_results, previous_snapshot, save_recursive_analysis
+
+    progress("Scraping reviews")
+    reviews_data = scrape_recursive_packaging_reviews(
+        review_url=params["review_url"],
+        email=secrets.get("email", ""),
+        password=secrets.get("password", ""),
+        use_headless=params.get("use_headless", False)
+    )
+    if not reviews_data:
+        raise RuntimeError("Failed to extract reviews. Please check your credentials and URL.")
+
+    # Reviews unchanged since the product's previous snapshot reuse its results
+    product_folder = reviews_data['product_folder']
+    previous = load_snapshot_results(previous_snapshot(product_folder))
+    if previous:
+        progress(f"Comparing with snapshot {previous['folder']}")
+
+    progress("Analyzing reviews")
+    analysis_results = analyze_recursive_packaging_reviews(reviews_data, previous)
+
+    progress("Saving results")
+    save_recursive_analysis(product_folder, analysis_results, previous)
+
+    # Thumbnails are built here so the first page view only reads the manifest
+    progress("Preparing review image thumbnails")
+    from image_utils import ensure_image_manifest
+    ensure_image_manifest(product_folder)
+    return {"product_folder": product_folder, "redirect": f"/product_overview/{product_folder}"}
+
+def run_enhanced_analysis(params: dict, secrets: dict, progress) -> dict:
+    """Enhanced packaging scrape + comprehensive analysis used by /enhanced_analyze"""
+    # These entry points are resolved at run time; a missing one fails the job, not the web process
+    import scraper
+    import nlp_utils
+
+    progress("Scraping reviews")
+    reviews_data = scraper.scrape_enhanced_packaging_reviews(
+        review_url=params["review_url"],
+        email=secrets.get("email", ""),
+        password=secrets.get("password", ""),
+        initial_count=params.get("initial_count", 100),
+        use_headless=params.get("use_headless", False)
+    )
+    if not reviews_data:
+        raise RuntimeError("Failed to extract reviews. Please check your credentials and URL.")
+
+    progress("Analyzing reviews")
+    analysis_results = nlp_utils.analyze_packaging_reviews_comprehensive(reviews_data)
+
+    progress("Saving results")
+    product_folder = reviews_data['product_folder']
+    analysis_file = os.path.join("static", product_folder, "enhanced_analysis.json")
+    os.makedirs(os.path.dirname(analysis_file), exist_ok=True)
+    with open(analysis_file, 'w') as f:
+        json.dump(analysis_results, f, indent=2, default=str)
+    return {"product_folder": product_folder, "redirect": f"/enhanced_results/{product_folder}"}
+
+JOB_RUNNERS = {
+    "recursive_analysis": run_recursive_analysis,
+    "enhanced_analysis": run_enhanced_analysis,
+}
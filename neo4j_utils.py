@@ -1,158 +1,388 @@
 #!/usr/bin/env python3
 
 from neo4j import GraphDatabase
+from neo4j.exceptions import ServiceUnavailable
+import atexit
+import hashlib
 import json
 import os
+import re
+import threading
+import time
 from typing import Dict, List, Tuple
 
+from cache_utils import artifact_key
+from nlp_utils import term_review_membership
+
+# Rows per UNWIND statement / write transaction
+NEO4J_BATCH_SIZE = int(os.environ.get("NEO4J_BATCH_SIZE", "1000"))
+
+NEO4J_URI = os.environ.get("NEO4J_URI", "bolt://localhost:7687")
+NEO4J_USER = os.environ.get("NEO4J_USER", "neo4j")
+NEO4J_PASSWORD = os.environ.get("NEO4J_PASSWORD", "password")
+
+# Connection pool settings for the shared drivers
+NEO4J_POOL_SIZE = int(os.environ.get("NEO4J_POOL_SIZE", "50"))
+NEO4J_ACQUISITION_TIMEOUT = float(os.environ.get("NEO4J_ACQUISITION_TIMEOUT", "30"))
+# Idle connections older than this are pinged before being handed out
+NEO4J_LIVENESS_CHECK_TIMEOUT = float(os.environ.get("NEO4J_LIVENESS_CHECK_TIMEOUT", "30"))
+NEO4J_MAX_CONNECTION_LIFETIME = float(os.environ.get("NEO4J_MAX_CONNECTION_LIFETIME", "3600"))
+
+# Every Term node carries a `product` property holding the product folder name.
+# Folder names end in the scrape date, so each snapshot gets its own graph and
+# several products/snapshots can live in one database side by side.
+_SNAPSHOT_DATE_RE = re.compile(r"_(\d{4}-\d{2}-\d{2})$")
+
+# After a failed connectivity check, calls fail fast for this many seconds
+# instead of each waiting out the connect timeout again
+NEO4J_RETRY_BACKOFF = float(os.environ.get("NEO4J_RETRY_BACKOFF", "30"))
+
+# One long-lived driver (and connection pool) per (uri, user, password digest),
+# shared by every request; a changed password gets a new driver
+_drivers = {}
+# key -> (retry_after, error message) for the last failed connection attempt
+_driver_failures = {}
+_drivers_lock = threading.Lock()
+
+def get_driver(uri=None, user=None, password=None):
+    """
+    Shared driver for uri/user/password, created and connectivity-checked on
+    first use. The check runs outside the registry lock; a failure is cached
+    for NEO4J_RETRY_BACKOFF seconds and raised as ServiceUnavailable meanwhile.
+    """
+    uri = uri or NEO4J_URI
+    user = user or NEO4J_USER
+    password = password if password is not None else NEO4J_PASSWORD
+    key = (uri, user, hashlib.sha256(password.encode("utf-8")).hexdigest())
+    with _drivers_lock:
+        driver = _drivers.get(key)
+        if driver is not None:
+            return driver
+        failure = _driver_failures.get(key)
+        if failure and failure[0] > time.monotonic():
+            raise ServiceUnavailable(f"Neo4j at {uri} unavailable, retrying later: {failure[1]}")
+
+    driver = GraphDatabase.driver(
+        uri,
+        auth=(user, password),
+        max_connection_pool_size=NEO4J_POOL_SIZE,
+        connection_acquisition_timeout=NEO4J_ACQUISITION_TIMEOUT,
+        liveness_check_timeout=NEO4J_LIVENESS_CHECK_TIMEOUT,
+        max_connection_lifetime=NEO4J_MAX_CONNECTION_LIFETIME
+    )
+    try:
+        driver.verify_connectivity()
+    except Exception as e:
+        driver.close()
+        with _drivers_lock:
+            _driver_failures[key] = (time.monotonic() + NEO4J_RETRY_BACKOFF, str(e))
+        raise
+
+    with _drivers_lock:
+        _driver_failures.pop(key, None)
+        existing = _drivers.get(key)
+        if existing is None:
+            _drivers[key] = driver
+            return driver
+    # Another request connected first; keep its pool
+    driver.close()
+    return existing
+
+def close_drivers():
+    """Close every shared driver; registered to run at interpreter exit"""
+    with _drivers_lock:
+        drivers = list(_drivers.values())
+        _drivers.clear()
+        _driver_failures.clear()
+    for driver in drivers:
+        try:
+            driver.close()
+        except Exception as e:
+            print(f"Error closing Neo4j driver: {e}")
+
+atexit.register(close_drivers)
+
+def execute_read(work, *args, uri=None, user=None, password=None, **kwargs):
+    """Run work(tx, *args, **kwargs) in a managed read transaction on a pooled connection"""
+    with get_driver(uri, user, password).session() as session:
+        return session.execute_read(work, *args, **kwargs)
+
+def execute_write(work, *args, uri=None, user=None, password=None, **kwargs):
+    """Run work(tx, *args, **kwargs) in a managed write transaction on a pooled connection"""
+    with get_driver(uri, user, password).session() as session:
+        return session.execute_write(work, *args, **kwargs)
+
+def _batches(rows: List, size: int):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+def _read_product_state(tx, product: str):
+    """Current term digests and edge weights stored for one product"""
+    terms = {
+        record['name']: record['digest']
+        for record in tx.run(
+            "MATCH (t:Term {product: $product}) RETURN t.name as name, t.reviews_digest as digest",
+            product=product
+        )
+    }
+    edges = {
+        (record['source'], record['target']): record['weight']
+        for record in tx.run(
+            """
+            MATCH (t1:Term {product: $product})-[r:COOCCURS_WITH]->(t2:Term)
+            RETURN t1.name as source, t2.name as target, r.weight as weight
+            """,
+            product=product
+        )
+    }
+    return terms, edges
+
+def _write_terms(tx, product: str, rows: List[Dict]):
+    tx.run(
+        """
+        UNWIND $rows AS row
+        MERGE (t:Term {product: $product, name: row.name})
+        SET t.reviews = row.reviews, t.reviews_digest = row.digest
+        """,
+        product=product, rows=rows
+    )
+
+def _write_edges(tx, product: str, rows: List[Dict]):
+    tx.run(
+        """
+        UNWIND $rows AS row
+        MATCH (t1:Term {product: $product, name: row.source})
+        MATCH (t2:Term {product: $product, name: row.target})
+        MERGE (t1)-[r:COOCCURS_WITH]->(t2)
+        SET r.weight = row.weight
+        """,
+        product=product, rows=rows
+    )
+
+def _delete_terms(tx, product: str, names: List[str]):
+    tx.run(
+        """
+        UNWIND $names AS name
+        MATCH (t:Term {product: $product, name: name})
+        DETACH DELETE t
+        """,
+        product=product, names=names
+    )
+
+def _delete_edges(tx, product: str, rows: List[Dict]):
+    tx.run(
+        """
+        UNWIND $rows AS row
+        MATCH (:Term {product: $product, name: row.source})-[r:COOCCURS_WITH]->(:Term {product: $product, name: row.target})
+        DELETE r
+        """,
+        product=product, rows=rows
+    )
+
+def _read_term_details(tx, product: str, term_name: str):
+    result = tx.run(
+        """
+        MATCH (t:Term {product: $product, name: $name})
+        OPTIONAL MATCH (t)-[r:COOCCURS_WITH]->(related:Term)
+        RETURN t.name as name, t.reviews as reviews, 
+               collect({name: related.name, weight: r.weight}) as connections
+        """,
+        product=product, name=term_name
+    )
+    return result.single()
+
+def _read_network(tx, product: str):
+    # Get all nodes
+    nodes_result = tx.run("MATCH (t:Term {product: $product}) RETURN t.name as name", product=product)
+    nodes = [{'id': record['name'], 'name': record['name']} for record in nodes_result]
+    
+    # Get all relationships
+    relationships_result = tx.run(
+        """
+        MATCH (t1:Term {product: $product})-[r:COOCCURS_WITH]->(t2:Term)
+        RETURN t1.name as source, t2.name as target, r.weight as weight
+        """,
+        product=product
+    )
+    relationships = [
+        {
+            'source': record['source'],
+            'target': record['target'],
+            'weight': record['weight']
+        }
+        for record in relationships_result
+    ]
+    return {
+        'nodes': nodes,
+        'relationships': relationships
+    }
+
+def _read_products(tx):
+    return [record['product'] for record in tx.run("MATCH (t:Term) RETURN DISTINCT t.product as product")]
+
+def _read_related_terms(tx, product: str, term_name: str, max_terms: int):
+    result = tx.run(
+        """
+        MATCH (t:Term {product: $product, name: $name})-[r:COOCCURS_WITH]->(related:Term)
+        RETURN related.name as name, r.weight as weight
+        ORDER BY r.weight DESC
+        LIMIT $limit
+        """,
+        product=product, name=term_name, limit=max_terms
+    )
+    return [
+        {'name': record['name'], 'weight': record['weight']}
+        for record in result
+    ]
+
 class Neo4jCooccurrenceGraph:
-    def __init__(self, uri="bolt://localhost:7687", user="neo4j", password="password"):
-        """Initialize Neo4j connection"""
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+    def __init__(self, uri=None, user=None, password=None):
+        """Attach to the shared, pooled driver for uri/user (defaults from NEO4J_* env vars)"""
+        self.driver = get_driver(uri, user, password)
         
     def close(self):
-        """Close the database connection"""
-        self.driver.close()
+        """No-op: the pooled driver is shared and closed at process exit (close_drivers)"""
+        pass
         
     def clear_database(self):
         """Clear all nodes and relationships from the database"""
         with self.driver.session() as session:
             session.run("MATCH (n) DETACH DELETE n")
             
-    def create_cooccurrence_graph(self, cooccurrence_data: Dict, reviews: List[Dict]):
-        """Create co-occurrence graph in Neo4j"""
+    def clear_product(self, product: str):
+        """Remove one product's graph, leaving the others untouched"""
         with self.driver.session() as session:
-            # Clear existing data
-            session.run("MATCH (n) DETACH DELETE n")
-            
-            # Create nodes for each term
-            for term in cooccurrence_data.keys():
-                session.run(
-                    "CREATE (t:Term {name: $name})",
-                    name=term
-                )
+            session.run("MATCH (t:Term {product: $product}) DETACH DELETE t", product=product)
             
-            # Create relationships for co-occurrences
-            for term1, connections in cooccurrence_data.items():
-                for term2, weight in connections.items():
-                    if weight > 0:
-                        session.run(
-                            """
-                            MATCH (t1:Term {name: $term1})
-                            MATCH (t2:Term {name: $term2})
-                            CREATE (t1)-[:COOCCURS_WITH {weight: $weight}]->(t2)
-                            """,
-                            term1=term1, term2=term2, weight=weight
-                        )
-            
-            # Add review data as properties to terms
-            for term in cooccurrence_data.keys():
-                # Find reviews containing this term
-                term_reviews = []
-                for review in reviews:
-                    if term.lower() in str(review.get('review_text', '')).lower():
-                        term_reviews.append({
-                            'title': review.get('review_title', ''),
-                            'text': review.get('review_text', ''),
-                            'reviewer': review.get('reviewer_name', ''),
-                            'rating': review.get('rating', ''),
-                            'sentiment': review.get('sentiment', '')
-                        })
-                
-                # Update term with review data
-                session.run(
-                    """
-                    MATCH (t:Term {name: $name})
-                    SET t.reviews = $reviews
-                    """,
-                    name=term, reviews=json.dumps(term_reviews)
-                )
-    
-    def get_term_details(self, term_name: str) -> Dict:
-        """Get detailed information about a term including related reviews"""
+    def ensure_schema(self):
+        """
+        Composite uniqueness constraint on (product, name); its backing index
+        serves every product-scoped lookup. Replaces the old global name constraint.
+        """
         with self.driver.session() as session:
-            result = session.run(
-                """
-                MATCH (t:Term {name: $name})
-                OPTIONAL MATCH (t)-[:COOCCURS_WITH]->(related:Term)
-                RETURN t.name as name, t.reviews as reviews, 
-                       collect({name: related.name, weight: related.weight}) as connections
-                """,
-                name=term_name
+            session.run("DROP CONSTRAINT term_name_unique IF EXISTS")
+            session.run(
+                "CREATE CONSTRAINT term_product_name_unique IF NOT EXISTS "
+                "FOR (t:Term) REQUIRE (t.product, t.name) IS UNIQUE"
             )
-            
-            record = result.single()
-            if record:
-                return {
-                    'name': record['name'],
-                    'reviews': json.loads(record['reviews']) if record['reviews'] else [],
-                    'connections': record['connections']
+
+    def create_cooccurrence_graph(self, cooccurrence_data: Dict, reviews: List[Dict], product: str,
+                                  batch_size: int = NEO4J_BATCH_SIZE):
+        """
+        Create or update the co-occurrence graph of one product in Neo4j. The
+        stored graph is diffed against the new data and only new/changed terms
+        and edges are upserted with MERGE; vanished ones are deleted. Writes
+        go out as UNWIND batches, one write transaction each.
+        """
+        terms = list(cooccurrence_data.keys())
+        
+        # Term -> reviews mentioning it, in a single pass over the reviews
+        membership = term_review_membership(
+            [str(review.get('review_text', '')) for review in reviews], terms
+        )
+        term_rows = []
+        for term in terms:
+            reviews_json = json.dumps([
+                {
+                    'title': reviews[i].get('review_title', ''),
+                    'text': reviews[i].get('review_text', ''),
+                    'reviewer': reviews[i].get('reviewer_name', ''),
+                    'rating': reviews[i].get('rating', ''),
+                    'sentiment': reviews[i].get('sentiment', '')
                 }
-            return None
-    
-    def get_network_data(self) -> Dict:
-        """Get all network data for visualization"""
+                for i in membership[term]
+            ])
+            term_rows.append({'name': term, 'reviews': reviews_json, 'digest': artifact_key(reviews_json)})
+        edge_weights = {
+            (term1, term2): weight
+            for term1, connections in cooccurrence_data.items()
+            for term2, weight in connections.items()
+            if weight > 0
+        }
+        
+        self.ensure_schema()
         with self.driver.session() as session:
-            # Get all nodes
-            nodes_result = session.run("MATCH (t:Term) RETURN t.name as name")
-            nodes = [{'id': record['name'], 'name': record['name']} for record in nodes_result]
+            stored_terms, stored_edges = session.execute_read(_read_product_state, product)
             
-            # Get all relationships
-            relationships_result = session.run(
-                """
-                MATCH (t1:Term)-[r:COOCCURS_WITH]->(t2:Term)
-                RETURN t1.name as source, t2.name as target, r.weight as weight
-                """
-            )
-            relationships = [
-                {
-                    'source': record['source'],
-                    'target': record['target'],
-                    'weight': record['weight']
-                }
-                for record in relationships_result
+            current_names = set(terms)
+            stale_terms = [name for name in stored_terms if name not in current_names]
+            # Edges of deleted terms go with DETACH DELETE
+            stale_edges = [
+                {'source': source, 'target': target}
+                for source, target in stored_edges
+                if (source, target) not in edge_weights
+                and source in current_names and target in current_names
+            ]
+            changed_terms = [row for row in term_rows if stored_terms.get(row['name']) != row['digest']]
+            changed_edges = [
+                {'source': source, 'target': target, 'weight': weight}
+                for (source, target), weight in edge_weights.items()
+                if stored_edges.get((source, target)) != weight
             ]
             
+            for batch in _batches(stale_terms, batch_size):
+                session.execute_write(_delete_terms, product, batch)
+            for batch in _batches(stale_edges, batch_size):
+                session.execute_write(_delete_edges, product, batch)
+            for batch in _batches(changed_terms, batch_size):
+                session.execute_write(_write_terms, product, batch)
+            for batch in _batches(changed_edges, batch_size):
+                session.execute_write(_write_edges, product, batch)
+        print(f"Neo4j graph for {product}: {len(changed_terms)}/{len(term_rows)} terms and "
+              f"{len(changed_edges)}/{len(edge_weights)} edges upserted, "
+              f"{len(stale_terms)} terms and {len(stale_edges)} edges removed")
+    
+    def get_term_details(self, product: str, term_name: str) -> Dict:
+        """Get detailed information about a term including related reviews"""
+        with self.driver.session() as session:
+            record = session.execute_read(_read_term_details, product, term_name)
+        if record:
             return {
-                'nodes': nodes,
-                'relationships': relationships
+                'name': record['name'],
+                'reviews': json.loads(record['reviews']) if record['reviews'] else [],
+                'connections': record['connections']
             }
+        return None
+    
+    def get_network_data(self, product: str) -> Dict:
+        """Get one product's network data for visualization"""
+        with self.driver.session() as session:
+            return session.execute_read(_read_network, product)
     
-    def get_related_terms(self, term_name: str, max_terms: int = 5) -> List[Dict]:
+    def get_related_terms(self, product: str, term_name: str, max_terms: int = 5) -> List[Dict]:
         """Get terms most related to a given term"""
         with self.driver.session() as session:
-            result = session.run(
-                """
-                MATCH (t:Term {name: $name})-[r:COOCCURS_WITH]->(related:Term)
-                RETURN related.name as name, r.weight as weight
-                ORDER BY r.weight DESC
-                LIMIT $limit
-                """,
-                name=term_name, limit=max_terms
-            )
-            
-            return [
-                {'name': record['name'], 'weight': record['weight']}
-                for record in result
-            ]
+            return session.execute_read(_read_related_terms, product, term_name, max_terms)
 
-def create_neo4j_cooccurrence_graph(cooccurrence_data: Dict, reviews: List[Dict], 
-                                   uri="bolt://localhost:7687", user="neo4j", password="password"):
-    """Convenience function to create Neo4j co-occurrence graph"""
+def create_neo4j_cooccurrence_graph(cooccurrence_data: Dict, reviews: List[Dict], product: str,
+                                   uri=None, user=None, password=None):
+    """Convenience function to create or update a product's Neo4j co-occurrence graph"""
     try:
         graph = Neo4jCooccurrenceGraph(uri, user, password)
-        graph.create_cooccurrence_graph(cooccurrence_data, reviews)
+        graph.create_cooccurrence_graph(cooccurrence_data, reviews, product)
         return graph
     except Exception as e:
         print(f"Error connecting to Neo4j: {e}")
         print("Make sure Neo4j is running and accessible at the specified URI")
         return None
 
-def get_neo4j_network_data(uri="bolt://localhost:7687", user="neo4j", password="password"):
-    """Get network data from existing Neo4j database"""
+def get_neo4j_network_data(product: str, uri=None, user=None, password=None):
+    """Get a product's network data from the Neo4j database; None if unreachable or not loaded"""
     try:
-        graph = Neo4jCooccurrenceGraph(uri, user, password)
-        return graph.get_network_data()
+        network_data = execute_read(_read_network, product, uri=uri, user=user, password=password)
     except Exception as e:
         print(f"Error connecting to Neo4j: {e}")
         return None
+    return network_data if network_data['nodes'] else None
+
+def latest_neo4j_product(uri=None, user=None, password=None):
+    """Most recently scraped snapshot that has a graph in Neo4j, or None; errors propagate"""
+    def snapshot_order(product):
+        match = _SNAPSHOT_DATE_RE.search(product or "")
+        return (match.group(1) if match else "", product or "")
+    products = [p for p in execute_read(_read_products, uri=uri, user=user, password=password) if p]
+    return max(products, key=snapshot_order) if products else None
+
+def get_neo4j_term_details(product: str, term_name: str, uri=None, user=None, password=None):
+    """Get term details over the pooled driver; errors propagate to the caller"""
+    return Neo4jCooccurrenceGraph(uri, user, password).get_term_details(product, term_name)
@@ -1,44 +1,154 @@
 import re
+from bisect import bisect_right
+import hashlib
+import threading
 import numpy as np
 import pandas as pd
-from collections import Counter, defaultdict
+from collections import Counter, OrderedDict, defaultdict, namedtuple
 from datetime import datetime
+from functools import lru_cache
 import math
 
 from sklearn.feature_extraction.text import TfidfVectorizer
 from mlxtend.frequent_patterns import fpgrowth, association_rules
 
 from nltk.corpus import wordnet as wn
+from nltk.corpus.reader.wordnet import POS_LIST
 from nltk.stem import WordNetLemmatizer
 
 from config import sia, components_list, conditions_list
+from packaging_library import get_packaging_library
 
-def get_related_words(word):
-    related = set()
-    lemmatizer = WordNetLemmatizer()
-    related.add(lemmatizer.lemmatize(word.lower()))
+# Process-wide WordNet caches. determine_category is called once per token by
+# extract_packaging_keywords, update_packaging_library and the scraper, so the
+# lemmatizer is shared and every lookup is memoized.
+CATEGORY_CACHE_SIZE = 65536
+_VOCABULARY_REGISTRY_SIZE = 16
+
+_lemmatizer = WordNetLemmatizer()
+
+@lru_cache(maxsize=CATEGORY_CACHE_SIZE)
+def _lemmatize(word):
+    return _lemmatizer.lemmatize(word)
+
+@lru_cache(maxsize=CATEGORY_CACHE_SIZE)
+def _related_words(word):
+    related = {_lemmatize(word.lower())}
     for syn in wn.synsets(word):
         for l in syn.lemmas():
             related.add(l.name().replace('_', ' ').lower())
             for ant in l.antonyms():
                 related.add(ant.name().replace('_', ' ').lower())
-    return related
+    return frozenset(related)
 
-def determine_category(word, comps, conds):
-    lemmatizer = WordNetLemmatizer()
+def get_related_words(word):
+    return set(_related_words(word))
+
+@lru_cache(maxsize=CATEGORY_CACHE_SIZE)
+def _has_other_base_form(word):
+    """
+    Whether wn.synsets(word) also returns synsets of another lemma, e.g. the
+    verb "seal" for "sealed" or "break" for "broken". Uses the same per-POS
+    morphy analysis as wn.synsets, which wn.morphy reduces to one form.
+    """
+    return any(form != word for pos in POS_LIST for form in wn._morphy(word, pos))
+
+class _CategoryVocabulary:
+    """Component/condition vocabulary plus a reverse WordNet lookup table"""
+
+    def __init__(self, comps, conds):
+        self.components = frozenset(comps)
+        self.conditions = frozenset(conds)
+        self.version = hash((self.components, self.conditions))
+        self._related_index = None
+
+    # Hash and compare by content version so the category LRU below is keyed
+    # by (word, vocabulary version) regardless of which list objects were passed
+    def __hash__(self):
+        return self.version
+
+    def __eq__(self, other):
+        return isinstance(other, _CategoryVocabulary) and (
+            self.components == other.components and self.conditions == other.conditions
+        )
+
+    @property
+    def related_index(self):
+        """
+        Map every WordNet lemma name (lowercased, as wn.synsets looks it up)
+        that shares a synset with (or is an antonym of) a vocabulary term to
+        the categories that term belongs to. Covers only the synsets the word
+        itself names, not those of its base forms.
+        """
+        if self._related_index is None:
+            index = defaultdict(set)
+            for category, terms in (("component", self.components), ("condition", self.conditions)):
+                for term in terms:
+                    # get_related_words yields lowercase names, so only lowercase terms can match
+                    if term != term.lower():
+                        continue
+                    for syn in wn.synsets(term.replace(' ', '_')):
+                        term_lemmas = [l for l in syn.lemmas()
+                                       if l.name().replace('_', ' ').lower() == term]
+                        if not term_lemmas:
+                            continue
+                        for l in syn.lemmas():
+                            index[l.name().lower()].add(category)
+                        for l in term_lemmas:
+                            for ant in l.antonyms():
+                                for al in ant.synset().lemmas():
+                                    index[al.name().lower()].add(category)
+            self._related_index = {word: frozenset(cats) for word, cats in index.items()}
+        return self._related_index
+
+# (tuple(comps), tuple(conds)) -> vocabulary. Keyed on the list contents, so a
+# list edited in place (even at the same length) gets a fresh vocabulary.
+_VOCABULARIES = OrderedDict()
+
+def _get_category_vocabulary(comps, conds):
+    key = (tuple(comps), tuple(conds))
+    vocab = _VOCABULARIES.get(key)
+    if vocab is not None:
+        _VOCABULARIES.move_to_end(key)
+    else:
+        vocab = _CategoryVocabulary(comps, conds)
+        # reuse an equal vocabulary so its reverse index is only built once
+        for known in _VOCABULARIES.values():
+            if known == vocab:
+                vocab = known
+                break
+        _VOCABULARIES[key] = vocab
+        if len(_VOCABULARIES) > _VOCABULARY_REGISTRY_SIZE:
+            _VOCABULARIES.popitem(last=False)
+    return vocab
+
+@lru_cache(maxsize=CATEGORY_CACHE_SIZE)
+def _resolve_category(word, vocab):
     w = word.lower()
-    lemma = lemmatizer.lemmatize(w)
-    in_c = (w in comps) or (lemma in comps)
-    in_d = (w in conds) or (lemma in conds)
+    lemma = _lemmatize(w)
+    in_c = (w in vocab.components) or (lemma in vocab.components)
+    in_d = (w in vocab.conditions) or (lemma in vocab.conditions)
     if not in_c and not in_d:
-        rels = get_related_words(w)
-        in_c = any(r in comps for r in rels)
-        in_d = any(r in conds for r in rels)
+        cats = vocab.related_index.get(w)
+        if cats is not None:
+            in_c = "component" in cats
+            in_d = "condition" in cats
+        # The index is complete only for words with no other base form; an
+        # inflected lemma name ("sealed", "broken") or a word missing from the
+        # index still needs its own synset walk
+        if not (in_c and in_d) and (cats is None or _has_other_base_form(w)):
+            rels = _related_words(w)
+            in_c = in_c or not rels.isdisjoint(vocab.components)
+            in_d = in_d or not rels.isdisjoint(vocab.conditions)
     if in_c and in_d: return "both"
     if in_c: return "component"
     if in_d: return "condition"
     return None
 
+def determine_category(word, comps, conds):
+    vocab = _get_category_vocabulary(comps, conds)
+    return _resolve_category(word, vocab)
+
 # Summarization & Sentiment & Packaging-extraction
 _SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
 
@@ -83,6 +193,114 @@ def summarize_text(text, max_sentences=1):
 
 NEG_OVERRIDE = {"disappointed", "mess", "leak", "broken", "crack", "damage", "spill"}
 
+SENTIMENT_LABELS = ("negative", "neutral", "positive")
+_SENTIMENT_CODES = {label: code for code, label in enumerate(SENTIMENT_LABELS)}
+_NEUTRAL_CODE = _SENTIMENT_CODES["neutral"]
+
+# VADER results per text digest, shared by every caller in the process
+SENTIMENT_CACHE_SIZE = 100000
+_SENTIMENT_CACHE = OrderedDict()
+_SENTIMENT_CACHE_LOCK = threading.Lock()
+
+# Below this many uncached texts, scoring in-process beats pool start-up cost
+SENTIMENT_POOL_THRESHOLD = 2000
+
+def _sentiment_digest(text):
+    return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+def _score_sentiment(text):
+    """Return (label_code, compound) for a non-empty text"""
+    compound = sia.polarity_scores(text)['compound']
+    lowered = text.lower()
+    if any(tok in lowered for tok in NEG_OVERRIDE):
+        label = "negative"
+    elif compound >= 0.05:
+        label = "positive"
+    elif compound <= -0.05:
+        label = "negative"
+    else:
+        label = "neutral"
+    return _SENTIMENT_CODES[label], compound
+
+def _score_sentiment_chunk(texts):
+    return [_score_sentiment(t) for t in texts]
+
+def _cache_sentiment(digest, result):
+    with _SENTIMENT_CACHE_LOCK:
+        _SENTIMENT_CACHE[digest] = result
+        _SENTIMENT_CACHE.move_to_end(digest)
+        if len(_SENTIMENT_CACHE) > SENTIMENT_CACHE_SIZE:
+            _SENTIMENT_CACHE.popitem(last=False)
+
+def _cached_sentiment(digest):
+    with _SENTIMENT_CACHE_LOCK:
+        result = _SENTIMENT_CACHE.get(digest)
+        if result is not None:
+            _SENTIMENT_CACHE.move_to_end(digest)
+        return result
+
+class SentimentBatch(namedtuple("SentimentBatch", ["codes", "compounds"])):
+    """
+    Compact result of analyze_sentiment_batch: `codes` is an int8 array of
+    indexes into SENTIMENT_LABELS and `compounds` a float32 array of VADER
+    compound scores, both aligned with the input texts.
+    """
+    __slots__ = ()
+
+    @property
+    def labels(self):
+        return [SENTIMENT_LABELS[c] for c in self.codes]
+
+    def counts(self):
+        tally = np.bincount(self.codes, minlength=len(SENTIMENT_LABELS)) if len(self.codes) else [0] * len(SENTIMENT_LABELS)
+        return {label: int(tally[i]) for i, label in enumerate(SENTIMENT_LABELS)}
+
+def analyze_sentiment_batch(texts, processes=None, pool_threshold=SENTIMENT_POOL_THRESHOLD):
+    """
+    Score many texts at once. Identical texts are scored once, results are
+    cached per text digest across calls, and when `processes` > 1 and at least
+    `pool_threshold` texts still need scoring the work is spread over a
+    process pool. Returns a SentimentBatch aligned with `texts`.
+    """
+    n = len(texts)
+    codes = np.full(n, _NEUTRAL_CODE, dtype=np.int8)
+    compounds = np.zeros(n, dtype=np.float32)
+
+    pending = OrderedDict()  # digest -> (text, [positions])
+    for i, text in enumerate(texts):
+        if text is None:
+            continue
+        text = str(text)
+        if not text.strip():
+            continue
+        digest = _sentiment_digest(text)
+        entry = pending.get(digest)
+        if entry is not None:
+            entry[1].append(i)
+            continue
+        cached = _cached_sentiment(digest)
+        if cached is not None:
+            codes[i], compounds[i] = cached
+        else:
+            pending[digest] = (text, [i])
+
+    if pending:
+        to_score = [text for text, _ in pending.values()]
+        if processes and processes > 1 and len(to_score) >= pool_threshold:
+            from concurrent.futures import ProcessPoolExecutor
+            chunk = math.ceil(len(to_score) / (processes * 4))
+            chunks = [to_score[k:k + chunk] for k in range(0, len(to_score), chunk)]
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                results = [r for part in pool.map(_score_sentiment_chunk, chunks) for r in part]
+        else:
+            results = _score_sentiment_chunk(to_score)
+        for (digest, (_, positions)), result in zip(pending.items(), results):
+            _cache_sentiment(digest, result)
+            codes[positions] = result[0]
+            compounds[positions] = result[1]
+
+    return SentimentBatch(codes, compounds)
+
 def analyze_sentiment(text):
     # Ensure text is a string and handle None/float values
     if text is None:
@@ -90,15 +308,12 @@ def analyze_sentiment(text):
     text = str(text)
     if not text.strip():
         return "neutral"
-    scores = sia.polarity_scores(text)
-    compound = scores['compound']
-    if any(tok in text.lower() for tok in NEG_OVERRIDE):
-        return "negative"
-    if compound >= 0.05:
-        return "positive"
-    if compound <= -0.05:
-        return "negative"
-    return "neutral"
+    digest = _sentiment_digest(text)
+    result = _cached_sentiment(digest)
+    if result is None:
+        result = _score_sentiment(text)
+        _cache_sentiment(digest, result)
+    return SENTIMENT_LABELS[result[0]]
 
 def extract_packaging_keywords(text):
     words = set(re.findall(r"\w+", text.lower()))
@@ -137,16 +352,10 @@ def build_component_condition_cooccurrence(reviews, df_library):
     return df_pivot
 
 def update_packaging_library(packaging_filter_keywords, components_list, conditions_list, library_path, reviews):
-    try:
-        df_component_old = pd.read_excel(library_path, sheet_name="Component")
-    except Exception:
-        df_component_old = pd.DataFrame(columns=["Keyword", "Category"])
-    try:
-        df_condition_old = pd.read_excel(library_path, sheet_name="Condition")
-    except Exception:
-        df_condition_old = pd.DataFrame(columns=["Keyword", "Category"])
-    existing_components = set(df_component_old["Keyword"].str.lower()) if not df_component_old.empty else set()
-    existing_conditions = set(df_condition_old["Keyword"].str.lower()) if not df_condition_old.empty else set()
+    # The library is read from its in-memory index; the workbook is only written, as an export
+    library = get_packaging_library(library_path)
+    existing_components = set(library.component_set)
+    existing_conditions = set(library.condition_set)
     expanded_components_list = list(set(components_list + list(existing_components)))
     expanded_conditions_list = list(set(conditions_list + list(existing_conditions)))
     new_components, new_conditions = [], []
@@ -183,8 +392,9 @@ def update_packaging_library(packaging_filter_keywords, components_list, conditi
                     if r not in existing_conditions:
                         new_conditions.append({"Keyword": r, "Category": "condition"})
                         existing_conditions.add(r)
-    df_component_updated = pd.concat([df_component_old, pd.DataFrame(new_components)], ignore_index=True)
-    df_condition_updated = pd.concat([df_condition_old, pd.DataFrame(new_conditions)], ignore_index=True)
+    library.add([row["Keyword"] for row in new_components], [row["Keyword"] for row in new_conditions])
+    df_component_updated = library.component_frame()
+    df_condition_updated = library.condition_frame()
     df_library_combined = pd.concat([df_component_updated, df_condition_updated], ignore_index=True).drop_duplicates(subset=["Keyword"])
     df_pivot = build_component_condition_cooccurrence(reviews, df_library_combined)
     import xlsxwriter
@@ -209,82 +419,240 @@ def update_packaging_library(packaging_filter_keywords, components_list, conditi
             for i,(cond,row) in enumerate(df_pivot.iterrows()):
                 pivot_sheet.write(i+2,0,cond,row_fmt)
                 for j,val in enumerate(row): pivot_sheet.write(i+2,j+1,val,data_fmt)
+    library.mark_exported()
 
 def filter_packaging_keywords(keyword_list):
-    library_path = os.path.join("static","packaging_library.xlsx")
-    lib_comps, lib_conds = [], []
-    if os.path.exists(library_path):
-        try:
-            dfc = pd.read_excel(library_path,sheet_name="Component")
-            lib_comps = dfc["Keyword"].dropna().astype(str).tolist()
-        except: pass
-        try:
-            dfq = pd.read_excel(library_path,sheet_name="Condition")
-            lib_conds = dfq["Keyword"].dropna().astype(str).tolist()
-        except: pass
-    terms = set([x.lower() for x in components_list+conditions_list+lib_comps+lib_conds])
-    filtered = []
-    for itemset in keyword_list:
-        joined = " ".join(itemset).lower()
-        if any(t in joined for t in terms):
-            filtered.append(itemset)
-    return filtered
+    return get_packaging_library().filter_keywords(keyword_list)
 
-def map_keyword_to_images(reviews, keywords):
+def _review_image_names(review) -> list:
+    """Image file names of a review: image_links ("a.jpg, b.jpg") or the review_images list"""
+    # Try image_links first, then review_images as fallback
+    image_links = review.get("image_links", "")
+    if image_links is None:
+        image_links = ""
+    else:
+        image_links = str(image_links)
+    
+    # If image_links is empty, try review_images
+    if not image_links:
+        review_images = review.get("review_images", [])
+        if isinstance(review_images, list):
+            image_links = ", ".join([str(img) for img in review_images if img])
+        else:
+            image_links = str(review_images) if review_images else ""
+    
+    return image_links.split(", ") if image_links else []
+
+def _sentence_spans(txt: str) -> list:
+    r"""(start, end) of each piece re.split(r'(?<=[.!?])\s+', txt) would return"""
+    spans, start = [], 0
+    for m in _SENTENCE_SPLIT_RE.finditer(txt):
+        spans.append((start, m.start()))
+        start = m.end()
+    spans.append((start, len(txt)))
+    return spans
+
+def build_keyword_maps(reviews, keywords):
+    """
+    Build the keyword -> images and keyword -> sentences maps together.
+    Each review is lowercased and scanned once with a compiled phrase matcher;
+    hits are assigned to sentences by offset. Same output as calling
+    map_keyword_to_images and build_keyword_sentence_map (case-insensitive
+    substring matching, same key and list order).
+    """
+    keywords = list(keywords)
     kw_images = {}
-    for review in reviews:
-        # Ensure review_text is a string before calling lower()
-        review_text = review.get("review_text", "")
-        if review_text is None:
-            review_text = ""
+    kw_map = {kw: [] for kw in keywords}
+    # lowercase phrase -> positions in `keywords`, duplicates kept
+    positions = defaultdict(list)
+    for pos, kw in enumerate(keywords):
+        positions[kw.lower()].append(pos)
+    # the empty string is a substring of every sentence
+    always = positions.pop("", [])
+    matcher = _PhraseMatcher(positions)
+    
+    for i, review in enumerate(reviews):
+        # Ensure review_text is a string
+        txt = review.get("review_text", "")
+        if txt is None:
+            txt = ""
         else:
-            review_text = str(review_text)
-        text = review_text.lower()
+            txt = str(txt)
+        low = txt.lower()
+        spans = _sentence_spans(txt)
         
-        # Try image_links first, then review_images as fallback
-        image_links = review.get("image_links", "")
-        if image_links is None:
-            image_links = ""
+        # Keyword positions matched in each sentence and in the whole text
+        sentence_hits = [set(always) for _ in spans]
+        if len(low) == len(txt):
+            hits = list(matcher.finditer(low))
+            review_hits = {pos for phrase, _ in hits for pos in positions[phrase]}
+            bounds = [start for start, _ in spans]
+            for phrase, start in hits:
+                k = bisect_right(bounds, start) - 1
+                if start + len(phrase) <= spans[k][1]:
+                    sentence_hits[k].update(positions[phrase])
         else:
-            image_links = str(image_links)
+            # lower() changed the length, so offsets do not line up; match per sentence
+            review_hits = {pos for phrase, _ in matcher.finditer(low) for pos in positions[phrase]}
+            for k, (start, end) in enumerate(spans):
+                for phrase, _ in matcher.finditer(txt[start:end].lower()):
+                    sentence_hits[k].update(positions[phrase])
+        review_hits.update(always)
         
-        # If image_links is empty, try review_images
-        if not image_links:
-            review_images = review.get("review_images", [])
-            if isinstance(review_images, list):
-                image_links = ", ".join([str(img) for img in review_images if img])
-            else:
-                image_links = str(review_images) if review_images else ""
+        if review_hits:
+            imgs = [img for img in _review_image_names(review) if img]
+            for pos in sorted(review_hits):
+                kw_images.setdefault(keywords[pos], []).extend(imgs)
         
-        imgs = image_links.split(", ") if image_links else []
-        for kw in keywords:
-            if kw.lower() in text:
-                kw_images.setdefault(kw,[]).extend([i for i in imgs if i])
-    return kw_images
+        for (start, end), found in zip(spans, sentence_hits):
+            if not found:
+                continue
+            sent = txt[start:end]
+            for pos in sorted(found):
+                kw_map[keywords[pos]].append({
+                    "sentence": sent.strip(),
+                    "review_text": txt.strip(),
+                    "review_title": review.get("review_title",""),
+                    "review_index": i
+                })
+    return kw_images, kw_map
+
+def map_keyword_to_images(reviews, keywords):
+    return build_keyword_maps(reviews, keywords)[0]
 
 def build_keyword_sentence_map(reviews, keywords):
-    kw_map = {kw:[] for kw in keywords}
-    for i,review in enumerate(reviews):
-        # Ensure review_text is a string
-        txt = review.get("review_text","")
-        if txt is None:
-            txt = ""
-        else:
-            txt = str(txt)
-        sents = re.split(r'(?<=[.!?])\s+', txt)
-        for sent in sents:
-            low = sent.lower()
-            for kw in keywords:
-                if kw.lower() in low:
-                    kw_map[kw].append({
-                        "sentence": sent.strip(),
-                        "review_text": txt.strip(),
-                        "review_title": review.get("review_title",""),
-                        "review_index": i
-                    })
-    return kw_map
-
-def analyze_reviews_with_tfidf(reviews, threshold=0.05, min_support=0.05):
+    return build_keyword_maps(reviews, keywords)[1]
+
+_TERM_TOKEN_PATTERN = r"(?u)\b\w+\b"
+_TERM_TOKEN_RE = re.compile(_TERM_TOKEN_PATTERN)
+_WORD_TERM_RE = re.compile(r"(?u)^\w+$")
+
+def build_term_document_matrix(texts, terms):
+    """
+    Binary sparse (texts x terms) CSR matrix marking which terms occur in which
+    text, with the same substring semantics as `term in text.lower()` ("leak"
+    matches "leaking", "bottle" matches "bottles"). Every text is tokenized
+    once; a one-word term's column is the union of the vocabulary tokens that
+    contain it. Terms with spaces or punctuation are scanned for directly.
+    """
+    from sklearn.feature_extraction.text import CountVectorizer
+    from scipy.sparse import csr_matrix
+
+    texts = ["" if t is None else str(t).lower() for t in texts]
+    normalized = [str(t).lower() for t in terms]
+    word_terms = {norm for norm in normalized if _WORD_TERM_RE.match(norm)}
+    n_docs, n_terms = len(texts), len(normalized)
+    if not texts or not normalized:
+        return csr_matrix((n_docs, n_terms), dtype=np.int32)
+
+    token_rows, token_cols = [], []
+    if word_terms:
+        vectorizer = CountVectorizer(binary=True, lowercase=False, token_pattern=_TERM_TOKEN_PATTERN, dtype=np.int32)
+        try:
+            doc_tokens = vectorizer.fit_transform(texts).tocsc()
+            vocabulary = vectorizer.vocabulary_
+        except ValueError:
+            # every text is empty
+            doc_tokens, vocabulary = None, {}
+        # A \w-only term is a substring of the text exactly when it is a substring of one of its tokens
+        lengths = sorted({len(term) for term in word_terms})
+        for token, token_id in vocabulary.items():
+            found = set()
+            for length in lengths:
+                if length > len(token):
+                    break
+                for start in range(len(token) - length + 1):
+                    piece = token[start:start + length]
+                    if piece in word_terms:
+                        found.add(piece)
+            for piece in found:
+                token_rows.append(token_id)
+                token_cols.append(piece)
+
+    columns = {}
+    for norm in normalized:
+        columns.setdefault(norm, len(columns))
+    blocks = []
+    if token_rows:
+        token_terms = csr_matrix(
+            (np.ones(len(token_rows), dtype=np.int32), (token_rows, [columns[t] for t in token_cols])),
+            shape=(doc_tokens.shape[1], len(columns))
+        )
+        blocks.append(((doc_tokens @ token_terms) > 0).astype(np.int32))
+    other_rows, other_cols = [], []
+    for norm, col in columns.items():
+        if norm and norm not in word_terms:
+            for i, text in enumerate(texts):
+                if norm in text:
+                    other_rows.append(i)
+                    other_cols.append(col)
+    if other_rows:
+        blocks.append(csr_matrix(
+            (np.ones(len(other_rows), dtype=np.int32), (other_rows, other_cols)), shape=(n_docs, len(columns))
+        ))
+    unique = sum(blocks) if blocks else csr_matrix((n_docs, len(columns)), dtype=np.int32)
+    unique = csr_matrix(unique, dtype=np.int32)
+    if len(columns) == n_terms:
+        unique.sort_indices()
+        return unique
+    # Duplicate terms share a column
+    matrix = unique.tocsc()[:, [columns[norm] for norm in normalized]].tocsr()
+    matrix.sort_indices()
+    return matrix
+
+def build_term_cooccurrence(texts, terms, min_count=1):
+    """
+    Single-pass co-occurrence engine.
+
+    Builds a binary term-document matrix (each text tokenized once) and derives
+    every pair count with one sparse product X^T X. Returns
+    (cooccurrence_data, term_counts) where cooccurrence_data is
+    {term1: {term2: n_texts_containing_both}} for terms appearing in at least
+    `min_count` texts, and term_counts maps each term to its document frequency.
+    """
+    terms = list(dict.fromkeys(t for t in terms if t))
+    if not terms or not texts:
+        return {}, {}
+
+    matrix = build_term_document_matrix(texts, terms)
+    doc_freq = np.asarray(matrix.sum(axis=0)).ravel()
+    term_counts = {terms[i]: int(doc_freq[i]) for i in range(len(terms)) if doc_freq[i] > 0}
+
+    keep = np.flatnonzero(doc_freq >= max(min_count, 1))
+    if len(keep) == 0:
+        return {}, term_counts
+    kept = matrix[:, keep]
+    pairs = (kept.T @ kept).tocsr()
+    pairs.sort_indices()
+
+    cooccurrence_data = {}
+    for row in range(pairs.shape[0]):
+        start, end = pairs.indptr[row], pairs.indptr[row + 1]
+        connections = {}
+        for col, count in zip(pairs.indices[start:end], pairs.data[start:end]):
+            if col != row and count > 0:
+                connections[terms[keep[col]]] = int(count)
+        if connections:
+            cooccurrence_data[terms[keep[row]]] = connections
+    return cooccurrence_data, term_counts
+
+def build_transaction_frame(tfidf_matrix, feature_names, threshold=0.05, min_support=None):
+    """
+    Threshold a sparse TF-IDF matrix into a boolean sparse DataFrame for fpgrowth.
+    When min_support is given, terms whose document frequency is below it are
+    dropped up front; fpgrowth would discard them anyway, so itemsets and rules
+    are unchanged while memory scales with the number of non-zeros.
+    """
+    transactions = (tfidf_matrix.tocsr() > threshold).astype(bool)
+    feature_names = np.asarray(feature_names)
+    if min_support is not None and transactions.shape[0] > 0:
+        doc_freq = np.bincount(transactions.indices, minlength=transactions.shape[1])
+        keep = np.flatnonzero(doc_freq / transactions.shape[0] >= min_support)
+        transactions = transactions[:, keep]
+        feature_names = feature_names[keep]
+    return pd.DataFrame.sparse.from_spmatrix(transactions, columns=list(feature_names))
+
+def analyze_reviews_with_tfidf(reviews, threshold=0.05, min_support=0.05, prune_vocabulary=True):
     vectorizer = TfidfVectorizer(stop_words='english')
     tfidf_matrix = vectorizer.fit_transform(reviews)
     feature_names = vectorizer.get_feature_names_out()
@@ -295,10 +663,15 @@ def analyze_reviews_with_tfidf(reviews, threshold=0.05, min_support=0.05):
         top_words = [(feature_names[i],scores[i]) for i in idxs]
     else:
         top_words=[]
-    # fpgrowth
-    transactions = [[1 if s>threshold else 0 for s in row] for row in tfidf_matrix.toarray()]
-    df_trans = pd.DataFrame(transactions,columns=feature_names).astype(bool)
-    fi = fpgrowth(df_trans, min_support=min_support, use_colnames=True)
+    # fpgrowth on a sparse boolean transaction table, no dense copy of the matrix
+    df_trans = build_transaction_frame(
+        tfidf_matrix, feature_names, threshold=threshold,
+        min_support=min_support if prune_vocabulary else None
+    )
+    if df_trans.shape[1] == 0:
+        fi = pd.DataFrame(columns=['support', 'itemsets'])
+    else:
+        fi = fpgrowth(df_trans, min_support=min_support, use_colnames=True)
     fi['itemsets']=fi['itemsets'].apply(lambda x:list(x))
     if fi.empty:
         rules=pd.DataFrame()
@@ -366,32 +739,52 @@ def build_cooccurrence_data(frequent_itemsets):
 # Import os for file operations
 import os 
 
-def analyze_recursive_packaging_reviews(reviews_data: dict) -> dict:
+def analyze_recursive_packaging_reviews(reviews_data: dict, previous_results: dict = None) -> dict:
     """
     NLP-Based Analysis for Recursive Review Extraction Strategy:
     1. Apply sentiment analysis (Positive / Neutral / Negative) on all extracted reviews
     2. Identify and highlight packaging-related reviews among the full dataset
     3. Return comprehensive analysis results
+    
+    previous_results (review_store.load_snapshot_results of the product's
+    previous snapshot) lets unchanged reviews keep their sentiment, so only
+    new or edited reviews are scored.
     """
-    initial_reviews = reviews_data.get('initial_reviews', [])
-    packaging_reviews = reviews_data.get('packaging_reviews', [])
+    from review_store import review_key
+    
+    # Each review is analyzed once: keyword hits belong to the packaging group only
+    packaging_reviews, packaging_ids = [], set()
+    for review in reviews_data.get('packaging_reviews', []):
+        if review_key(review) not in packaging_ids:
+            packaging_ids.add(review_key(review))
+            packaging_reviews.append(review)
+    initial_reviews = [r for r in reviews_data.get('initial_reviews', []) if review_key(r) not in packaging_ids]
     
     print("Starting NLP-Based Analysis...")
     
     # Step 1: Apply sentiment analysis on all extracted reviews
     print("Step 1: Applying sentiment analysis on all reviews...")
     
-    # Analyze initial reviews
-    initial_sentiments = []
-    for review in initial_reviews:
-        sentiment = analyze_sentiment(review.get('review_text', ''))
-        initial_sentiments.append(sentiment)
+    # Reuse labels of reviews unchanged since the previous snapshot
+    scanned_reviews = initial_reviews + packaging_reviews
+    all_labels = [None] * len(scanned_reviews)
+    if previous_results:
+        from review_store import match_previous_reviews
+        for i, match in enumerate(match_previous_reviews(scanned_reviews, previous_results)):
+            if match is not None and match.get('sentiment') in ('positive', 'negative', 'neutral'):
+                all_labels[i] = match['sentiment']
     
-    # Analyze packaging reviews
-    packaging_sentiments = []
-    for review in packaging_reviews:
-        sentiment = analyze_sentiment(review.get('review_text', ''))
-        packaging_sentiments.append(sentiment)
+    # Score the rest of the initial and packaging reviews in one batch (overlapping texts are scored once)
+    to_score = [i for i, label in enumerate(all_labels) if label is None]
+    sentiment_batch = analyze_sentiment_batch(
+        [scanned_reviews[i].get('review_text', '') for i in to_score]
+    )
+    for i, label in zip(to_score, sentiment_batch.labels):
+        all_labels[i] = label
+    if previous_results:
+        print(f"Sentiment: {len(scanned_reviews) - len(to_score)} reused, {len(to_score)} scored")
+    initial_sentiments = all_labels[:len(initial_reviews)]
+    packaging_sentiments = all_labels[len(initial_reviews):]
     
     # Calculate statistics
     initial_sentiment_counts = {
@@ -482,7 +875,9 @@ def analyze_recursive_packaging_reviews(reviews_data: dict) -> dict:
             'keywords_found': list(set([r.get('search_term', '') for r in packaging_reviews if r.get('search_term')]))
         },
         'all_reviews': all_reviews,
-        'packaging_terms_searched': reviews_data.get('packaging_terms_searched', [])
+        'packaging_terms_searched': reviews_data.get('packaging_terms_searched', []),
+        # Terms whose search failed even after a retry, with the error
+        'failed_terms': reviews_data.get('failed_terms', {})
     }
     
     print(f"NLP analysis completed successfully!")
@@ -568,6 +963,9 @@ def filter_reviews_by_keyword(reviews: list, keyword: str) -> list:
     """
     return [review for review in reviews if keyword.lower() in review.get('review_text', '').lower()] 
 
+# Reviews scoring at least this in classify_reviews_as_packaging are packaging-related
+PACKAGING_SCORE_THRESHOLD = 0.3
+
 def classify_reviews_as_packaging(reviews: list, components_list: list, conditions_list: list) -> list:
     """
     Comprehensive algorithm to classify reviews as packaging-related or not.
@@ -613,6 +1011,9 @@ def classify_reviews_as_packaging(reviews: list, components_list: list, conditio
     
     packaging_vocabulary.update(packaging_phrases)
     
+    # Every vocabulary term and scoring phrase is found in one scan per review
+    matcher = _packaging_matcher(frozenset(packaging_vocabulary))
+    
     classified_reviews = []
     packaging_count = 0
     non_packaging_count = 0
@@ -621,6 +1022,7 @@ def classify_reviews_as_packaging(reviews: list, components_list: list, conditio
         review_text = str(review.get("review_text", "")).lower()
         review_title = str(review.get("review_title", "")).lower()
         full_text = f"{review_title} {review_text}"
+        hits = _PackagingHits(matcher, full_text, len(review_title) + 1)
         
         # Calculate classification score using multiple methods
         score = 0
@@ -628,27 +1030,27 @@ def classify_reviews_as_packaging(reviews: list, components_list: list, conditio
         classification_methods = []
         
         # Method 1: Direct keyword matching
-        keyword_score = calculate_keyword_score(full_text, packaging_vocabulary)
+        keyword_score = _keyword_score(set(full_text.split()).intersection(packaging_vocabulary), hits.counts.__getitem__)
         score += keyword_score * 0.4  # 40% weight
         classification_methods.append(f"Keyword: {keyword_score:.2f}")
         
         # Method 2: Phrase and context analysis
-        phrase_score = analyze_packaging_phrases(full_text)
+        phrase_score = _phrase_score_from_hits(hits)
         score += phrase_score * 0.3  # 30% weight
         classification_methods.append(f"Phrase: {phrase_score:.2f}")
         
         # Method 3: Review structure analysis
-        structure_score = analyze_review_structure(review_text, review_title)
+        structure_score = _structure_score_from_hits(hits, review_title)
         score += structure_score * 0.2  # 20% weight
         classification_methods.append(f"Structure: {structure_score:.2f}")
         
         # Method 4: Sentiment-context analysis
-        sentiment_score = analyze_sentiment_context(review_text, review.get("sentiment", ""))
+        sentiment_score = _sentiment_context_score_from_hits(hits, review.get("sentiment", ""))
         score += sentiment_score * 0.1  # 10% weight
         classification_methods.append(f"Sentiment: {sentiment_score:.2f}")
         
         # Determine classification threshold
-        threshold = 0.3  # Reviews with score >= 0.3 are classified as packaging-related
+        threshold = PACKAGING_SCORE_THRESHOLD  # Reviews with score >= 0.3 are classified as packaging-related
         
         is_packaging = score >= threshold
         confidence = min(score, 1.0)  # Confidence is the score, capped at 1.0
@@ -726,11 +1128,67 @@ def expand_packaging_keywords(keywords: list) -> list:
     
     return list(expanded)
 
+# Scoring vocabularies shared by the per-text helpers below and the single-scan
+# matcher used by classify_reviews_as_packaging
+_IMPORTANT_PACKAGING_TERMS = {'leak', 'damage', 'broken', 'spill', 'mess', 'packaging', 'container'}
+
+_PACKAGING_PHRASE_WEIGHTS = {
+    'damaged during shipping': 0.8,
+    'arrived damaged': 0.8,
+    'packaging was': 0.7,
+    'container was': 0.7,
+    'bottle was': 0.7,
+    'box was': 0.7,
+    'leaked out': 0.8,
+    'spilled out': 0.8,
+    'came broken': 0.8,
+    'was broken': 0.7,
+    'got damaged': 0.7,
+    'easy to pour': 0.6,
+    'hard to open': 0.6,
+    'difficult to open': 0.6,
+    'messy to use': 0.7,
+    'clean to use': 0.5,
+    'secure packaging': 0.6,
+    'protective packaging': 0.6,
+    'well packaged': 0.5,
+    'poorly packaged': 0.7,
+    'packaging design': 0.6,
+    'container design': 0.6,
+    'bottle design': 0.6,
+    'cap was loose': 0.8,
+    'lid was loose': 0.8,
+    'seal was broken': 0.8,
+    'tape was': 0.6,
+    'label was': 0.6,
+    'plastic container': 0.6,
+    'glass bottle': 0.6,
+    'cardboard box': 0.6,
+    'metal can': 0.6
+}
+
+_PACKAGING_TITLE_WORDS = {'packaging', 'bottle', 'container', 'damaged', 'leak', 'broken', 'arrived'}
+
+_REVIEW_STRUCTURE_PATTERNS = [
+    'arrived', 'shipping', 'delivery', 'packaged', 'wrapped',
+    'damaged', 'broken', 'leaked', 'spilled', 'mess',
+    'container', 'bottle', 'box', 'package', 'packaging'
+]
+
+_COMPLAINT_INDICATORS = ['but', 'however', 'unfortunately', 'disappointed', 'problem', 'issue']
+_COMPLAINT_PACKAGING_TERMS = ['packaging', 'container', 'bottle', 'damage', 'leak', 'broken']
+
+_NEGATIVE_CONTEXT_TERMS = ['packaging', 'container', 'bottle', 'damage', 'leak', 'broken', 'spill', 'mess']
+_POSITIVE_CONTEXT_TERMS = ['packaging', 'container', 'bottle', 'design', 'easy', 'convenient', 'secure']
+
 def calculate_keyword_score(text: str, vocabulary: set) -> float:
     """Calculate keyword-based score for packaging classification."""
     words = set(text.split())
     matches = words.intersection(vocabulary)
     
+    return _keyword_score(matches, text.count)
+
+def _keyword_score(matches, count_of) -> float:
     if not matches:
         return 0.0
     
@@ -741,13 +1199,12 @@ def calculate_keyword_score(text: str, vocabulary: set) -> float:
         base_score = 0.1
         
         # Bonus for multiple occurrences
-        count = text.count(match)
+        count = count_of(match)
         if count > 1:
             base_score += min(count * 0.05, 0.2)  # Cap at 0.2 bonus
         
         # Bonus for important terms
-        important_terms = {'leak', 'damage', 'broken', 'spill', 'mess', 'packaging', 'container'}
-        if match in important_terms:
+        if match in _IMPORTANT_PACKAGING_TERMS:
             base_score += 0.1
         
         score += base_score
@@ -756,100 +1213,167 @@ def calculate_keyword_score(text: str, vocabulary: set) -> float:
 
 def analyze_packaging_phrases(text: str) -> float:
     """Analyze text for packaging-related phrases and context."""
+    return _phrase_score(lambda phrase: phrase in text)
+
+def _phrase_score(contains) -> float:
     score = 0.0
-    
-    # Packaging-specific phrases with weights
-    packaging_phrases = {
-        'damaged during shipping': 0.8,
-        'arrived damaged': 0.8,
-        'packaging was': 0.7,
-        'container was': 0.7,
-        'bottle was': 0.7,
-        'box was': 0.7,
-        'leaked out': 0.8,
-        'spilled out': 0.8,
-        'came broken': 0.8,
-        'was broken': 0.7,
-        'got damaged': 0.7,
-        'easy to pour': 0.6,
-        'hard to open': 0.6,
-        'difficult to open': 0.6,
-        'messy to use': 0.7,
-        'clean to use': 0.5,
-        'secure packaging': 0.6,
-        'protective packaging': 0.6,
-        'well packaged': 0.5,
-        'poorly packaged': 0.7,
-        'packaging design': 0.6,
-        'container design': 0.6,
-        'bottle design': 0.6,
-        'cap was loose': 0.8,
-        'lid was loose': 0.8,
-        'seal was broken': 0.8,
-        'tape was': 0.6,
-        'label was': 0.6,
-        'plastic container': 0.6,
-        'glass bottle': 0.6,
-        'cardboard box': 0.6,
-        'metal can': 0.6
-    }
-    
-    for phrase, weight in packaging_phrases.items():
-        if phrase in text:
+    for phrase, weight in _PACKAGING_PHRASE_WEIGHTS.items():
+        if contains(phrase):
             score += weight
     
     return min(score, 1.0)
 
 def analyze_review_structure(review_text: str, review_title: str) -> float:
     """Analyze review structure for packaging-related indicators."""
+    return _structure_score(lambda term: term in review_text, review_title)
+
+def _structure_score(text_contains, review_title: str) -> float:
     score = 0.0
     
     # Check title for packaging indicators
     title_words = review_title.split()
     if len(title_words) <= 5:  # Short titles are more likely to be specific
-        packaging_title_words = {'packaging', 'bottle', 'container', 'damaged', 'leak', 'broken', 'arrived'}
-        if any(word in packaging_title_words for word in title_words):
+        if any(word in _PACKAGING_TITLE_WORDS for word in title_words):
             score += 0.3
     
     # Check for specific review patterns
-    patterns = [
-        'arrived', 'shipping', 'delivery', 'packaged', 'wrapped',
-        'damaged', 'broken', 'leaked', 'spilled', 'mess',
-        'container', 'bottle', 'box', 'package', 'packaging'
-    ]
-    
-    for pattern in patterns:
-        if pattern in review_text:
+    for pattern in _REVIEW_STRUCTURE_PATTERNS:
+        if text_contains(pattern):
             score += 0.1
     
     # Check for complaint patterns (often packaging-related)
-    complaint_indicators = ['but', 'however', 'unfortunately', 'disappointed', 'problem', 'issue']
-    if any(indicator in review_text for indicator in complaint_indicators):
+    if any(text_contains(indicator) for indicator in _COMPLAINT_INDICATORS):
         # If complaint + packaging terms, higher score
-        packaging_terms = ['packaging', 'container', 'bottle', 'damage', 'leak', 'broken']
-        if any(term in review_text for term in packaging_terms):
+        if any(text_contains(term) for term in _COMPLAINT_PACKAGING_TERMS):
             score += 0.2
     
     return min(score, 1.0)
 
 def analyze_sentiment_context(review_text: str, sentiment: str) -> float:
     """Analyze sentiment in context of packaging terms."""
+    return _sentiment_context_score(lambda term: term in review_text, sentiment)
+
+def _sentiment_context_score(text_contains, sentiment: str) -> float:
     score = 0.0
     
     # Negative sentiment + packaging terms = likely packaging complaint
     if sentiment == "negative":
-        packaging_terms = ['packaging', 'container', 'bottle', 'damage', 'leak', 'broken', 'spill', 'mess']
-        if any(term in review_text for term in packaging_terms):
+        if any(text_contains(term) for term in _NEGATIVE_CONTEXT_TERMS):
             score += 0.4
     
     # Positive sentiment + packaging terms = likely packaging praise
     elif sentiment == "positive":
-        packaging_terms = ['packaging', 'container', 'bottle', 'design', 'easy', 'convenient', 'secure']
-        if any(term in review_text for term in packaging_terms):
+        if any(text_contains(term) for term in _POSITIVE_CONTEXT_TERMS):
             score += 0.2
     
     return min(score, 1.0)
 
+def _trie_pattern(phrases) -> str:
+    """Regex matching the longest of `phrases` at a position, built as a character trie"""
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[''] = True
+
+    def build(node):
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch != '']
+        if not alts:
+            return ''
+        body = alts[0] if len(alts) == 1 else '(?:' + '|'.join(alts) + ')'
+        # greedy optional continuation: longer phrases win, shorter ones still match
+        return '(?:' + body + ')?' if '' in node else body
+
+    return build(trie)
+
+class _PhraseMatcher:
+    """
+    Compiled multi-pattern matcher. A zero-width lookahead over a trie regex
+    reports the longest phrase starting at every position in one C-level scan;
+    shorter phrases that are prefixes of it are expanded from a lookup table,
+    which yields the same hits as an Aho-Corasick automaton.
+    """
+
+    def __init__(self, phrases):
+        self.phrases = sorted({p for p in phrases if p})
+        self._regex = re.compile('(?=(' + _trie_pattern(self.phrases) + '))') if self.phrases else None
+        phrase_set = set(self.phrases)
+        self._prefixes = {
+            p: [p[:k] for k in range(1, len(p) + 1) if p[:k] in phrase_set]
+            for p in self.phrases
+        }
+
+    def finditer(self, text):
+        """Yield (phrase, start) for every occurrence, overlaps included"""
+        if self._regex is None:
+            return
+        for m in self._regex.finditer(text):
+            start = m.start()
+            for phrase in self._prefixes[m.group(1)]:
+                yield phrase, start
+
+def term_review_membership(texts, terms) -> dict:
+    """
+    Map each term to the indices of the texts containing it (case-insensitive
+    substring match), scanning every text once with a compiled matcher.
+    """
+    by_lower = defaultdict(list)
+    for term in dict.fromkeys(terms):
+        by_lower[str(term).lower()].append(term)
+    matcher = _PhraseMatcher(by_lower)
+    membership = {term: [] for term in terms}
+    # the empty string is a substring of everything
+    for term in by_lower.pop("", []):
+        membership[term] = list(range(len(texts)))
+    for index, text in enumerate(texts):
+        found = {phrase for phrase, _ in matcher.finditer(str(text).lower())}
+        for phrase in found:
+            for term in by_lower[phrase]:
+                membership[term].append(index)
+    return membership
+
+@lru_cache(maxsize=8)
+def _packaging_matcher(vocabulary: frozenset) -> _PhraseMatcher:
+    return _PhraseMatcher(
+        set(vocabulary)
+        | set(_PACKAGING_PHRASE_WEIGHTS)
+        | set(_REVIEW_STRUCTURE_PATTERNS)
+        | set(_COMPLAINT_INDICATORS)
+        | set(_COMPLAINT_PACKAGING_TERMS)
+        | set(_NEGATIVE_CONTEXT_TERMS)
+        | set(_POSITIVE_CONTEXT_TERMS)
+    )
+
+class _PackagingHits:
+    """All matcher hits for one review, split into full-text and body-only views"""
+
+    __slots__ = ("in_full", "in_text", "counts")
+
+    def __init__(self, matcher, full_text, text_offset):
+        self.in_full = set()
+        self.in_text = set()
+        self.counts = Counter()
+        last_end = {}
+        for phrase, start in matcher.finditer(full_text):
+            end = start + len(phrase)
+            self.in_full.add(phrase)
+            if start >= text_offset:
+                self.in_text.add(phrase)
+            # str.count semantics: non-overlapping occurrences
+            if start >= last_end.get(phrase, 0):
+                self.counts[phrase] += 1
+                last_end[phrase] = end
+
+def _phrase_score_from_hits(hits) -> float:
+    return _phrase_score(hits.in_full.__contains__)
+
+def _structure_score_from_hits(hits, review_title: str) -> float:
+    return _structure_score(hits.in_text.__contains__, review_title)
+
+def _sentiment_context_score_from_hits(hits, sentiment: str) -> float:
+    return _sentiment_context_score(hits.in_text.__contains__, sentiment)
+
 def get_packaging_classification_summary(reviews: list) -> dict:
     """Generate a summary of the packaging classification results."""
     packaging_reviews = [r for r in reviews if r.get('is_packaging_related', False)]
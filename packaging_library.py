@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import re
+import threading
+from typing import Iterable, Optional
+
+import pandas as pd
+
+from cache_utils import atomic_write_bytes
+from config import components_list, conditions_list
+
+# The packaging vocabulary (Component and Condition sheets of
+# static/packaging_library.xlsx) kept in memory. Its working copy is a JSON
+# file next to the workbook; the workbook stays the downloadable export and
+# is imported again only when someone edits it (its mtime no longer matches
+# the one recorded at the last sync).
+PACKAGING_LIBRARY_PATH = os.path.join("static", "packaging_library.xlsx")
+PACKAGING_LIBRARY_STORE_VERSION = 1
+
+def _mtime_ns(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def _read_sheet_keywords(library_path: str, sheet_name: str) -> list:
+    try:
+        df = pd.read_excel(library_path, sheet_name=sheet_name)
+        return df["Keyword"].dropna().astype(str).tolist()
+    except Exception as e:
+        print(f"Could not read sheet {sheet_name} of {library_path}: {e}")
+        return []
+
+class PackagingLibrary:
+    """
+    Component and condition keywords of one library workbook, reloaded only
+    when its JSON store or the workbook changes on disk. Lookups are
+    lowercased sets and one compiled pattern over every term.
+    """
+
+    def __init__(self, library_path: str = PACKAGING_LIBRARY_PATH):
+        self.library_path = library_path
+        self.store_path = os.path.splitext(library_path)[0] + ".json"
+        self.components = []
+        self.conditions = []
+        self._loaded_mtimes = None
+        self._excel_mtime = None
+        self._pattern = None
+        self._lock = threading.RLock()
+
+    def _index(self):
+        self.component_set = {k.lower() for k in self.components}
+        self.condition_set = {k.lower() for k in self.conditions}
+        terms = {t.lower() for t in components_list + conditions_list} | self.component_set | self.condition_set
+        # One alternation matches wherever any term is a substring, as the old per-term scan did
+        ordered = sorted((t for t in terms if t), key=len, reverse=True)
+        self._pattern = re.compile("|".join(map(re.escape, ordered))) if ordered else None
+
+    def _load_store(self) -> Optional[dict]:
+        if not os.path.exists(self.store_path):
+            return None
+        try:
+            with open(self.store_path, "r", encoding="utf-8") as f:
+                store = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable packaging library store {self.store_path}: {e}")
+            return None
+        return store if store.get("version") == PACKAGING_LIBRARY_STORE_VERSION else None
+
+    def _save_store(self):
+        store = {
+            "version": PACKAGING_LIBRARY_STORE_VERSION,
+            "excel_mtime_ns": self._excel_mtime,
+            "components": self.components,
+            "conditions": self.conditions,
+        }
+        atomic_write_bytes(self.store_path, json.dumps(store, indent=1).encode("utf-8"))
+
+    def refresh(self) -> "PackagingLibrary":
+        """Reload from disk if the store or the workbook changed since the last load"""
+        with self._lock:
+            mtimes = (_mtime_ns(self.store_path), _mtime_ns(self.library_path))
+            if mtimes == self._loaded_mtimes:
+                return self
+            store = self._load_store()
+            excel_mtime = mtimes[1]
+            if store is not None and (excel_mtime is None or store.get("excel_mtime_ns") == excel_mtime):
+                self.components = store.get("components", [])
+                self.conditions = store.get("conditions", [])
+                self._excel_mtime = store.get("excel_mtime_ns")
+            elif excel_mtime is not None:
+                print(f"Importing packaging library from {self.library_path}...")
+                self.components = _read_sheet_keywords(self.library_path, "Component")
+                self.conditions = _read_sheet_keywords(self.library_path, "Condition")
+                self._excel_mtime = excel_mtime
+                try:
+                    self._save_store()
+                except OSError as e:
+                    print(f"Error saving packaging library store {self.store_path}: {e}")
+            else:
+                self.components, self.conditions, self._excel_mtime = [], [], None
+            self._index()
+            self._loaded_mtimes = (_mtime_ns(self.store_path), excel_mtime)
+            return self
+
+    def matches(self, text: str) -> bool:
+        """Whether any library or config term occurs in `text` (already lowercased)"""
+        return self._pattern is not None and self._pattern.search(text) is not None
+
+    def filter_keywords(self, keyword_list: Iterable) -> list:
+        """Keyword itemsets that mention at least one packaging term"""
+        self.refresh()
+        return [itemset for itemset in keyword_list if self.matches(" ".join(itemset).lower())]
+
+    def add(self, new_components: Iterable[str], new_conditions: Iterable[str]):
+        """Append keywords not yet in the library and persist the store"""
+        with self._lock:
+            self.refresh()
+            added = False
+            for keywords, known, target in ((new_components, self.component_set, self.components),
+                                            (new_conditions, self.condition_set, self.conditions)):
+                for kw in keywords:
+                    if kw.lower() not in known:
+                        known.add(kw.lower())
+                        target.append(kw)
+                        added = True
+            if added:
+                self._index()
+                self._save_store()
+                self._loaded_mtimes = (_mtime_ns(self.store_path), self._loaded_mtimes[1])
+
+    def component_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({"Keyword": self.components, "Category": "component"}, columns=["Keyword", "Category"])
+
+    def condition_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({"Keyword": self.conditions, "Category": "condition"}, columns=["Keyword", "Category"])
+
+    def mark_exported(self):
+        """Record the workbook just written from this library so it is not re-imported"""
+        with self._lock:
+            self._excel_mtime = _mtime_ns(self.library_path)
+            self._save_store()
+            self._loaded_mtimes = (_mtime_ns(self.store_path), self._excel_mtime)
+
+_libraries = {}
+_libraries_lock = threading.Lock()
+
+def get_packaging_library(library_path: str = PACKAGING_LIBRARY_PATH) -> PackagingLibrary:
+    """Process-wide library for a workbook path, refreshed if its files changed"""
+    key = os.path.abspath(library_path)
+    with _libraries_lock:
+        library = _libraries.get(key)
+        if library is None:
+            library = _libraries[key] = PackagingLibrary(library_path)
+    return library.refresh()
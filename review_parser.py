@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+import re
+from typing import Optional
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# Parses Amazon review pages from their HTML alone: one page_source read
+# replaces the per-field WebDriver lookups of scraper.extract_reviews_from_page,
+# and saved pages can be reprocessed offline. Selectors mirror the WebDriver
+# path, including its image fallbacks, so both produce the same fields.
+
+_STAR_RE = re.compile(r'a-star-(\d+(?:-\d)?)')
+_BACKGROUND_RE = re.compile(r'url\(["\']?([^"\']+)["\']?\)')
+_SRCSET_RE = re.compile(r'([^\s,]+)')
+# Screen-reader-only spans that WebElement.text leaves out
+_HIDDEN_CLASSES = ["a-icon-alt", "a-offscreen"]
+
+def _class(tag) -> str:
+    classes = tag.get("class") or []
+    return " ".join(classes) if isinstance(classes, list) else str(classes)
+
+def element_text(tag) -> str:
+    """
+    Text of an element roughly as WebElement.text renders it: hidden helper
+    spans dropped, <br> as a newline, runs of whitespace collapsed. Mutates `tag`.
+    """
+    if tag is None:
+        return ""
+    for hidden in tag.find_all(["script", "style"]) + tag.find_all(class_=_HIDDEN_CLASSES):
+        hidden.decompose()
+    for br in tag.find_all("br"):
+        br.replace_with("\n")
+    lines = [" ".join(line.split()) for line in tag.get_text().split("\n")]
+    return "\n".join(lines).strip()
+
+def find_review_blocks(soup) -> list:
+    """Review blocks in page order, with the same fallback as the WebDriver path"""
+    blocks = soup.select('[data-hook="review"]')
+    if not blocks:
+        review_list = soup.find(id="cm_cr-review_list")
+        if review_list is not None:
+            blocks = [div for div in review_list.find_all("div") if "review" in _class(div)]
+    return blocks
+
+def image_source(img) -> Optional[str]:
+    """src, then data-src, then the first srcset URL"""
+    src = img.get("src") or img.get("data-src")
+    if not src:
+        srcset = img.get("srcset")
+        if srcset and "amazon.com" in srcset:
+            match = _SRCSET_RE.search(srcset)
+            if match:
+                src = match.group(1)
+    return src or None
+
+def _images_in(block, container_test) -> list:
+    return [img for div in block.find_all("div") if container_test(_class(div)) for img in div.find_all("img")]
+
+def review_image_urls(block) -> list:
+    """Image URLs of one review block, trying the WebDriver path's selectors in the same order"""
+    all_imgs = block.find_all("img")
+    candidates = [
+        lambda: [img for img in all_imgs
+                 if "review-image" in _class(img) or "review-image" in (img.get("data-hook") or "")],
+        lambda: _images_in(block, lambda cls: "review-image-tile-section" in cls),
+        lambda: [img for img in all_imgs if (img.get("src") or "").startswith("http")],
+        lambda: _images_in(block, lambda cls: "image" in cls or "photo" in cls),
+        lambda: [img for img in all_imgs if "amazon.com" in (img.get("src") or "")],
+        lambda: _images_in(block, lambda cls: any(word in cls for word in ("review", "image", "photo", "media"))),
+        lambda: [img for img in all_imgs if (img.get("data-src") or "").startswith("http")],
+        lambda: [img for img in all_imgs if "amazon.com" in (img.get("srcset") or "")],
+        lambda: all_imgs,
+    ]
+    for candidate in candidates:
+        imgs = candidate()
+        if imgs:
+            # nested matching containers can yield the same <img> twice
+            return [image_source(img) for img in dict.fromkeys(imgs)]
+
+    urls = []
+    for element in block.find_all(style=re.compile("background-image")):
+        match = _BACKGROUND_RE.search(element["style"])
+        if match and "amazon.com" in match.group(1):
+            urls.append(match.group(1))
+    return urls
+
+def parse_review_block(block) -> dict:
+    """Scraped fields of one review block, plus its image URLs and whether it links to more images"""
+    title = block.find("a", attrs={"data-hook": "review-title"}) or block.find("span", attrs={"data-hook": "review-title"})
+    body = block.find("span", attrs={"data-hook": "review-body"})
+    star = block.find("i", class_=lambda cls: cls and "a-icon-star" in cls)
+    reviewer = block.find("span", class_="a-profile-name")
+    date = block.find("span", attrs={"data-hook": "review-date"})
+
+    rating = ""
+    if star is not None:
+        match = _STAR_RE.search(_class(star))
+        if match:
+            rating = f"{match.group(1).replace('-', '.')} out of 5"
+
+    see_all = any(
+        "see all" in link.get_text().lower() or "view all" in link.get_text().lower()
+        for link in block.find_all("a")
+    )
+    return {
+        "review_title": element_text(title),
+        "review_text": element_text(body),
+        "reviewer_name": element_text(reviewer) if reviewer is not None else "anonymous",
+        "review_date": element_text(date),
+        "rating": rating,
+        "verified": block.find(string=re.compile("Verified Purchase")) is not None,
+        "image_urls": review_image_urls(block),
+        "has_see_all": see_all,
+    }
+
+def parse_reviews_html(html: str) -> list:
+    """Parse every review block of a review page's HTML"""
+    soup = BeautifulSoup(html, HTML_PARSER)
+    return [parse_review_block(block) for block in find_review_blocks(soup)]
+
+def parse_reviews_file(path: str) -> list:
+    """Parse a saved review page"""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return parse_reviews_html(f.read())
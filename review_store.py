@@ -0,0 +1,607 @@
+#!/usr/bin/env python3
+
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Iterator, Optional, Tuple
+
+from cache_utils import artifact_key, atomic_write_bytes, cached_file_digest
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    REVIEW_STORE_AVAILABLE = True
+except ImportError:
+    pa = pc = pq = None
+    REVIEW_STORE_AVAILABLE = False
+
+# Columnar copy of a snapshot's reviews, written next to recursive_analysis.json.
+# The JSON stays the export format; the Parquet file stores every review once
+# (all_reviews is initial + packaging reviews) plus derived columns, so routes
+# can read just the columns they need.
+REVIEW_STORE_FILENAME = "reviews.parquet"
+SOURCE_FILENAME = "recursive_analysis.json"
+# Scraped reviews keyed by review_id, merged across scraping passes and runs
+REVIEW_INDEX_FILENAME = "review_index.json"
+
+# Bump when the table layout or derived columns change
+REVIEW_STORE_VERSION = "2"
+
+REVIEW_GROUPS = ("initial", "packaging", "all")
+_GROUP_KEYS = {"initial": "initial_reviews", "packaging": "packaging_reviews"}
+
+# Columns computed at write time rather than copied from the scraped review
+DERIVED_COLUMNS = ("review_id", "group", "position", "rating_value", "packaging_score", "term_ids", "_fields")
+
+# Rows decoded per step when streaming reviews out of the store
+STREAM_BATCH_ROWS = 512
+
+_METADATA_KEY = b"packsense"
+_RATING_RE = re.compile(r"(\d+(?:\.\d+)?)")
+# Snapshot folders are "<product>_<YYYY-MM-DD>"
+_SNAPSHOT_RE = re.compile(r"^(?P<product>.+)_(?P<date>\d{4}-\d{2}-\d{2})$")
+
+def review_store_path(product_folder: str) -> str:
+    return os.path.join("static", product_folder, REVIEW_STORE_FILENAME)
+
+def review_identity(review: dict) -> str:
+    """Stable id for a review from its title, text, author and date"""
+    parts = [
+        review.get("review_title", review.get("title", "")),
+        review.get("review_text", ""),
+        review.get("reviewer_name", ""),
+        review.get("review_date", review.get("date", "")),
+    ]
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(str(part or "").strip().encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+def review_key(review: dict) -> str:
+    """The review_id stamped at extraction, or computed for reviews scraped before ids were"""
+    return review.get("review_id") or review_identity(review)
+
+def parse_rating(rating) -> Optional[float]:
+    """'4.0 out of 5 stars' -> 4.0"""
+    if rating is None:
+        return None
+    if isinstance(rating, (int, float)):
+        return float(rating)
+    match = _RATING_RE.search(str(rating))
+    return float(match.group(1)) if match else None
+
+def _vocabulary_digest() -> str:
+    """packaging_score depends on the configured vocabulary, so stores are rebuilt when it changes"""
+    from config import components_list, conditions_list
+    # config builds these lists from sets, so their order differs between processes
+    return artifact_key(sorted(components_list), sorted(conditions_list))
+
+def previous_snapshot(product_folder: str) -> Optional[str]:
+    """Latest earlier-dated folder of the same product that has a recursive analysis"""
+    match = _SNAPSHOT_RE.match(product_folder)
+    if not match or not os.path.isdir("static"):
+        return None
+    candidates = []
+    for name in os.listdir("static"):
+        other = _SNAPSHOT_RE.match(name)
+        if (other and other.group("product") == match.group("product")
+                and other.group("date") < match.group("date")
+                and os.path.exists(os.path.join("static", name, SOURCE_FILENAME))):
+            candidates.append((other.group("date"), name))
+    return max(candidates)[1] if candidates else None
+
+def load_snapshot_results(product_folder: str) -> Optional[dict]:
+    """
+    Per-review results already stored for a snapshot: sentiment, packaging_score
+    and term_ids keyed by review_id, with the inputs they were computed from.
+    Only reads an existing store; returns None rather than building one.
+    """
+    if not REVIEW_STORE_AVAILABLE or not product_folder:
+        return None
+    path = review_store_path(product_folder)
+    metadata = _read_metadata(path) if os.path.exists(path) else None
+    if not metadata or metadata.get("version") != REVIEW_STORE_VERSION:
+        return None
+    source = set(metadata.get("source_columns", []))
+    inputs = [name for name in ("review_text", "review_title", "sentiment") if name in source]
+    data = pq.read_table(path, columns=["review_id", "packaging_score", "term_ids"] + inputs).to_pydict()
+    reviews = {}
+    for i, review_id in enumerate(data["review_id"]):
+        reviews[review_id] = {
+            "review_text": data["review_text"][i] if "review_text" in data else None,
+            "review_title": data["review_title"][i] if "review_title" in data else None,
+            "sentiment": data["sentiment"][i] if "sentiment" in data else None,
+            "packaging_score": data["packaging_score"][i],
+            "term_ids": data["term_ids"][i],
+        }
+    return {
+        "folder": product_folder,
+        "vocabulary_digest": metadata.get("vocabulary_digest"),
+        "terms": metadata.get("summary", {}).get("packaging_terms_searched") or [],
+        "reviews": reviews,
+    }
+
+def match_previous_reviews(reviews, previous: Optional[dict]) -> list:
+    """
+    For each review, the previous snapshot's entry for the same review (same
+    review_id and identical text and title), or None for new or edited reviews.
+    """
+    if not previous:
+        return [None] * len(reviews)
+    known = previous.get("reviews", {})
+    matches = []
+    for review in reviews:
+        entry = known.get(review_key(review))
+        if entry is not None and (entry["review_text"] != review.get("review_text")
+                                  or entry["review_title"] != review.get("review_title")):
+            entry = None
+        matches.append(entry)
+    current = {review_key(review) for review in reviews}
+    removed = sum(1 for review_id in known if review_id not in current)
+    reused = sum(1 for entry in matches if entry is not None)
+    print(f"Snapshot diff against {previous.get('folder')}: {reused} unchanged, "
+          f"{len(reviews) - reused} new or edited, {removed} no longer present")
+    return matches
+
+def _packaging_scores(reviews):
+    from config import components_list, conditions_list
+    from nlp_utils import classify_reviews_as_packaging
+    classified = classify_reviews_as_packaging([dict(r) for r in reviews], components_list, conditions_list)
+    return [float(r.get("packaging_score", 0.0)) for r in classified]
+
+def _term_ids(reviews, terms):
+    from nlp_utils import build_term_document_matrix
+    if not reviews or not terms:
+        return [[] for _ in reviews]
+    matrix = build_term_document_matrix([r.get("review_text", "") for r in reviews], terms)
+    return [matrix.indices[matrix.indptr[i]:matrix.indptr[i + 1]].tolist() for i in range(matrix.shape[0])]
+
+def _source_columns(reviews):
+    """One Arrow column per scraped field; fields Arrow cannot type are stored as JSON text"""
+    names = []
+    for review in reviews:
+        for key in review:
+            if key not in names and key not in DERIVED_COLUMNS:
+                names.append(key)
+    columns, json_columns = {}, []
+    for name in names:
+        values = [review.get(name) for review in reviews]
+        try:
+            columns[name] = pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+            columns[name] = pa.array([None if v is None else json.dumps(v, default=str) for v in values], pa.string())
+            json_columns.append(name)
+    return columns, json_columns
+
+def _reuse_or_compute(rows, reused: list, compute) -> list:
+    """Fill the None slots of `reused` with compute() over just those rows"""
+    missing = [i for i, value in enumerate(reused) if value is None]
+    if missing:
+        for i, value in zip(missing, compute([rows[i] for i in missing])):
+            reused[i] = value
+    return reused
+
+def build_review_table(analysis_results: dict, source_digest: Optional[str] = None,
+                       previous: Optional[dict] = None):
+    """
+    Flatten a recursive analysis result into one Arrow table plus summary
+    metadata. With `previous` (load_snapshot_results of an earlier snapshot),
+    packaging scores and term ids of unchanged reviews are carried over and
+    only new or edited reviews are scored.
+    """
+    groups = []
+    summary = {}
+    # Review lists are replaced by None placeholders so the export keeps its key order
+    for key, value in analysis_results.items():
+        if key == "all_reviews":
+            summary[key] = None
+        elif key in _GROUP_KEYS.values() and isinstance(value, dict):
+            summary[key] = {k: (None if k == "reviews" else v) for k, v in value.items()}
+        else:
+            summary[key] = value
+    for group, key in _GROUP_KEYS.items():
+        group_data = analysis_results.get(key)
+        if isinstance(group_data, dict):
+            groups.append((group, group_data.get("reviews", []) or []))
+
+    # all_reviews is normally initial + packaging; only store it separately when it is not
+    all_reviews = analysis_results.get("all_reviews", []) or []
+    if all_reviews != [r for _, reviews in groups for r in reviews]:
+        groups.append(("all", all_reviews))
+
+    rows, row_groups, positions = [], [], []
+    for group, reviews in groups:
+        for position, review in enumerate(reviews):
+            rows.append(review)
+            row_groups.append(group)
+            positions.append(position)
+
+    columns, json_columns = _source_columns(rows)
+    source_columns = list(columns)
+    columns["review_id"] = pa.array([review_key(r) for r in rows], pa.string())
+    columns["group"] = pa.array(row_groups, pa.string()).dictionary_encode()
+    columns["position"] = pa.array(positions, pa.int32())
+    columns["rating_value"] = pa.array([parse_rating(r.get("rating")) for r in rows], pa.float32())
+    terms = analysis_results.get("packaging_terms_searched", []) or []
+    matches = match_previous_reviews(rows, previous) if previous else [None] * len(rows)
+    # Scores depend on the vocabulary and the review's sentiment; term ids index the searched terms
+    same_vocabulary = bool(previous) and previous.get("vocabulary_digest") == _vocabulary_digest()
+    same_terms = bool(previous) and previous.get("terms") == terms
+    scores = [
+        m["packaging_score"] if same_vocabulary and m and m["sentiment"] == r.get("sentiment") else None
+        for m, r in zip(matches, rows)
+    ]
+    term_ids = [m["term_ids"] if same_terms and m else None for m in matches]
+    columns["packaging_score"] = pa.array(_reuse_or_compute(rows, scores, _packaging_scores), pa.float64())
+    columns["term_ids"] = pa.array(
+        _reuse_or_compute(rows, term_ids, lambda subset: _term_ids(subset, terms)),
+        pa.list_(pa.int16())
+    )
+    # Key order of each original review, so exported dicts round-trip exactly
+    columns["_fields"] = pa.array([",".join(r.keys()) for r in rows], pa.string()).dictionary_encode()
+
+    metadata = {
+        "version": REVIEW_STORE_VERSION,
+        "source_digest": source_digest,
+        "vocabulary_digest": _vocabulary_digest(),
+        "groups": [group for group, _ in groups],
+        "source_columns": source_columns,
+        "json_columns": json_columns,
+        "previous_snapshot": previous.get("folder") if previous else None,
+        "summary": summary,
+    }
+    table = pa.table(columns)
+    return table.replace_schema_metadata({_METADATA_KEY: json.dumps(metadata, default=str).encode("utf-8")})
+
+def write_review_store(product_folder: str, analysis_results: dict, source_digest: Optional[str] = None,
+                       previous: Optional[dict] = None) -> Optional[str]:
+    """
+    Write the columnar store for a snapshot; returns its path, or None without
+    pyarrow. Per-review results are reused from `previous`, or by default from
+    the product's previous dated snapshot when it has a store.
+    """
+    if not REVIEW_STORE_AVAILABLE:
+        return None
+    if source_digest is None:
+        source_digest = cached_file_digest(os.path.join("static", product_folder, SOURCE_FILENAME))
+    if previous is None:
+        previous = load_snapshot_results(previous_snapshot(product_folder))
+    table = build_review_table(analysis_results, source_digest, previous)
+    sink = pa.BufferOutputStream()
+    pq.write_table(table, sink, compression="zstd")
+    path = review_store_path(product_folder)
+    atomic_write_bytes(path, sink.getvalue().to_pybytes())
+    return path
+
+def save_recursive_analysis(product_folder: str, analysis_results: dict, previous: Optional[dict] = None) -> str:
+    """Write recursive_analysis.json (the export) and its columnar store"""
+    analysis_file = os.path.join("static", product_folder, SOURCE_FILENAME)
+    os.makedirs(os.path.dirname(analysis_file), exist_ok=True)
+    exported = json.dumps(analysis_results, indent=2, default=str)
+    with open(analysis_file, 'w') as f:
+        f.write(exported)
+    try:
+        # Build from the exported JSON so the store holds exactly what the export holds
+        write_review_store(product_folder, json.loads(exported), previous=previous)
+    except Exception as e:
+        print(f"Error writing review store: {e}")
+    return analysis_file
+
+def _read_metadata(path: str) -> Optional[dict]:
+    try:
+        raw = (pq.read_schema(path).metadata or {}).get(_METADATA_KEY)
+    except (OSError, pa.ArrowException) as e:
+        print(f"Ignoring unreadable review store {path}: {e}")
+        return None
+    return json.loads(raw) if raw else None
+
+def ensure_review_store(product_folder: str) -> Optional[dict]:
+    """
+    Make sure the columnar store matches recursive_analysis.json, rebuilding it
+    from the JSON when missing or stale. Returns the store metadata, or None if
+    there is no source data or pyarrow is not installed.
+    """
+    if not REVIEW_STORE_AVAILABLE:
+        return None
+    source_path = os.path.join("static", product_folder, SOURCE_FILENAME)
+    if not os.path.exists(source_path):
+        return None
+    digest = cached_file_digest(source_path)
+    path = review_store_path(product_folder)
+    if os.path.exists(path):
+        metadata = _read_metadata(path)
+        if (metadata and metadata.get("version") == REVIEW_STORE_VERSION
+                and metadata.get("source_digest") == digest
+                and metadata.get("vocabulary_digest") == _vocabulary_digest()):
+            return metadata
+    print(f"Building review store for {product_folder}...")
+    try:
+        with open(source_path, "r", encoding="utf-8") as f:
+            analysis_results = json.load(f)
+        write_review_store(product_folder, analysis_results, digest)
+    except Exception as e:
+        print(f"Error building review store: {e}")
+        return None
+    return _read_metadata(path)
+
+def _group_filter(metadata: dict, group: str):
+    """Row groups making up `group` in the order they appear in the JSON export"""
+    if group not in REVIEW_GROUPS:
+        raise ValueError(f"Unknown review group: {group}")
+    stored = metadata.get("groups", [])
+    if group == "all" and "all" not in stored:
+        return [g for g in stored if g != "all"]
+    return [group] if group in stored else []
+
+def _read_rows(product_folder: str, metadata: dict, group: str, columns: list):
+    groups = _group_filter(metadata, group)
+    # Rows are written group by group in export order, and filtered reads keep file order
+    return pq.read_table(
+        review_store_path(product_folder),
+        columns=list(dict.fromkeys(columns)),
+        filters=[("group", "in", groups or [""])]
+    )
+
+def read_review_columns(product_folder: str, group: str, columns: list):
+    """Read only `columns` for one review group as an Arrow table, in export order"""
+    metadata = ensure_review_store(product_folder)
+    if metadata is None:
+        return None
+    return _read_rows(product_folder, metadata, group, columns)
+
+def _review_columns(metadata: dict, derived=()) -> list:
+    """Columns needed to rebuild exported review dicts (review_id is exported when it was scraped)"""
+    columns = [name for name in metadata.get("source_columns", []) if name not in DERIVED_COLUMNS]
+    return columns + [name for name in ("review_id", "_fields", *derived) if name not in columns]
+
+def _rows_to_reviews(table, json_columns, derived=()):
+    reviews = []
+    data = table.to_pydict()
+    for i, fields in enumerate(data["_fields"]):
+        review = {}
+        for key in fields.split(",") if fields else []:
+            value = data[key][i]
+            review[key] = json.loads(value) if key in json_columns and value is not None else value
+        for key in derived:
+            review[key] = data[key][i]
+        reviews.append(review)
+    return reviews
+
+def load_reviews_at(product_folder: str, group: str, indices) -> Optional[list]:
+    """Reconstruct only the reviews at the given row indices of a group"""
+    metadata = ensure_review_store(product_folder)
+    if metadata is None:
+        return None
+    table = _read_rows(product_folder, metadata, group, _review_columns(metadata))
+    return _rows_to_reviews(table.take(pa.array(list(indices), pa.int64())), metadata.get("json_columns", []))
+
+def _match_mask(table, source: set, sentiment: Optional[str], keyword: Optional[str]):
+    """Boolean mask of rows matching the filters, or None when a filtered column does not exist"""
+    mask = pa.array([True] * table.num_rows, pa.bool_())
+    if sentiment:
+        if "sentiment" not in source:
+            return None
+        mask = pc.and_(mask, pc.fill_null(pc.equal(_combined(table, "sentiment"), sentiment), False))
+    if keyword:
+        if "review_text" not in source:
+            return None
+        text = pc.utf8_lower(pc.fill_null(_combined(table, "review_text"), ""))
+        mask = pc.and_(mask, pc.match_substring(text, keyword.lower()))
+    return mask
+
+def _combined(table, name: str):
+    column = table.column(name)
+    return column.combine_chunks() if isinstance(column, pa.ChunkedArray) else column
+
+def iter_reviews(product_folder: str, group: str, sentiment: Optional[str] = None,
+                 keyword: Optional[str] = None, start: int = 0,
+                 batch_size: int = STREAM_BATCH_ROWS) -> Optional[Iterator[Tuple[int, dict]]]:
+    """
+    Stream (index, review) for the reviews of a group matching the filters,
+    skipping the first `start` reviews of the group. `index` is the review's
+    position in the group, usable as a resume point. The store is read one
+    record batch at a time, so memory stays flat however many reviews match.
+    """
+    metadata = ensure_review_store(product_folder)
+    if metadata is None:
+        return None
+    groups = pa.array(_group_filter(metadata, group), pa.string())
+    source = set(metadata.get("source_columns", []))
+    json_columns = metadata.get("json_columns", [])
+    columns = _review_columns(metadata, ("group",))
+    path = review_store_path(product_folder)
+
+    def generate():
+        parquet_file = pq.ParquetFile(path)
+        try:
+            offset = 0
+            for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+                rows = batch.filter(pc.is_in(batch.column("group"), value_set=groups))
+                first, offset = offset, offset + rows.num_rows
+                if offset <= start or rows.num_rows == 0:
+                    continue
+                if first < start:
+                    rows = rows.slice(start - first)
+                    first = start
+                mask = _match_mask(rows, source, sentiment, keyword)
+                if mask is None:
+                    return
+                positions = pc.indices_nonzero(mask)
+                if len(positions) == 0:
+                    continue
+                matches = _rows_to_reviews(rows.take(positions), json_columns)
+                for position, review in zip(positions.to_pylist(), matches):
+                    yield first + position, review
+        finally:
+            parquet_file.close()
+
+    return generate()
+
+def iter_json_reviews(path: str, group: str, sentiment: Optional[str] = None,
+                      keyword: Optional[str] = None, start: int = 0) -> Iterator[Tuple[int, dict]]:
+    """
+    Same contract as iter_reviews over an analysis JSON export. With ijson
+    installed the review list is parsed incrementally; otherwise the file is
+    loaded whole.
+    """
+    key = _GROUP_KEYS.get(group, "all_reviews")
+    prefix = f"{key}.item" if group == "all" else f"{key}.reviews.item"
+    keyword = keyword.lower() if keyword else None
+
+    def matches(review):
+        if sentiment and review.get("sentiment") != sentiment:
+            return False
+        return not keyword or keyword in str(review.get("review_text") or "").lower()
+
+    with open(path, "rb") as f:
+        if ijson is not None:
+            reviews = ijson.items(f, prefix, use_float=True)
+        else:
+            data = json.load(f)
+            reviews = data.get(key, []) if group == "all" else (data.get(key) or {}).get("reviews", [])
+        for index, review in enumerate(reviews):
+            if index >= start and matches(review):
+                yield index, review
+
+def review_store_summary(product_folder: str) -> Optional[dict]:
+    """Snapshot-level fields of recursive_analysis.json (counts, percentages, terms) without any reviews"""
+    metadata = ensure_review_store(product_folder)
+    return None if metadata is None else metadata.get("summary", {})
+
+def load_analysis_data(product_folder: str) -> Optional[dict]:
+    """
+    Rebuild the recursive_analysis.json structure from the columnar store.
+    Falls back to parsing the JSON export when pyarrow is not installed.
+    """
+    metadata = ensure_review_store(product_folder)
+    if metadata is None:
+        source_path = os.path.join("static", product_folder, SOURCE_FILENAME)
+        if not os.path.exists(source_path):
+            return None
+        with open(source_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    table = pq.read_table(review_store_path(product_folder), columns=_review_columns(metadata, ("group",)))
+    reviews = _rows_to_reviews(table, metadata.get("json_columns", []))
+    by_group = {g: [] for g in metadata.get("groups", [])}
+    for review, group in zip(reviews, table["group"].to_pylist()):
+        by_group[group].append(review)
+    if "all" not in by_group:
+        # separate dicts, as in the JSON, so callers can mutate one list safely
+        by_group["all"] = [dict(r) for g in ("initial", "packaging") for r in by_group.get(g, [])]
+
+    data = {}
+    for key, value in metadata.get("summary", {}).items():
+        if key == "all_reviews":
+            value = by_group["all"]
+        elif key in _GROUP_KEYS.values() and isinstance(value, dict):
+            group = next(g for g, k in _GROUP_KEYS.items() if k == key)
+            value = {k: (by_group.get(group, []) if k == "reviews" else v) for k, v in value.items()}
+        data[key] = value
+    return data
+
+class ReviewIndex:
+    """
+    Per-snapshot dedupe index of scraped reviews, persisted as
+    static/<folder>/review_index.json. Each review is kept once under its
+    review_id together with the passes that returned it: the general listing
+    and/or any number of keyword searches. Scraping into the same folder again
+    merges into the existing index rather than starting over. Safe to share
+    between crawl worker threads.
+    """
+
+    def __init__(self, product_folder: str):
+        self.path = os.path.join("static", product_folder, REVIEW_INDEX_FILENAME)
+        self._lock = threading.RLock()
+        self._reviews = {}
+        self._terms = {}
+        self._general = set()
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    entries = json.load(f).get("reviews", [])
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable review index {self.path}: {e}")
+                entries = []
+            for entry in entries:
+                review_id = review_key(entry["review"])
+                self._reviews[review_id] = dict(entry["review"], review_id=review_id)
+                self._terms[review_id] = list(entry.get("search_terms", []))
+                if entry.get("general"):
+                    self._general.add(review_id)
+            print(f"Loaded review index with {len(self._reviews)} reviews from {self.path}")
+
+    def __len__(self):
+        with self._lock:
+            return len(self._reviews)
+
+    def __contains__(self, review_id):
+        with self._lock:
+            return review_id in self._reviews
+
+    def add(self, review: dict, search_term: Optional[str] = None) -> bool:
+        """
+        Record that a pass returned `review` (the general listing when
+        search_term is None). Stamps its review_id and returns True only the
+        first time the review is seen.
+        """
+        review_id = review_key(review)
+        review["review_id"] = review_id
+        with self._lock:
+            is_new = review_id not in self._reviews
+            if is_new:
+                self._reviews[review_id] = review
+                self._terms[review_id] = []
+            if search_term is None:
+                self._general.add(review_id)
+            elif search_term not in self._terms[review_id]:
+                self._terms[review_id].append(search_term)
+        return is_new
+
+    def reviews(self) -> list:
+        """Every indexed review, in the order first seen"""
+        with self._lock:
+            return list(self._reviews.values())
+
+    def initial_reviews(self) -> list:
+        """Reviews from the general listing that no keyword search returned"""
+        with self._lock:
+            return [review for review_id, review in self._reviews.items()
+                    if review_id in self._general and not self._terms[review_id]]
+
+    def packaging_reviews(self, term_order: Optional[list] = None) -> list:
+        """
+        Reviews returned by keyword searches, each once, tagged with every term
+        that found it. With `term_order` a review's terms follow that order
+        rather than the order parallel searches happened to finish in.
+        """
+        rank = {term: i for i, term in enumerate(term_order or [])}
+        packaging = []
+        with self._lock:
+            for review_id, review in self._reviews.items():
+                terms = sorted(self._terms[review_id], key=lambda t: rank.get(t, len(rank)))
+                if terms:
+                    review.update(search_term=terms[0], search_terms=terms, is_packaging_related=True)
+                    packaging.append(review)
+        return packaging
+
+    def save(self):
+        with self._lock:
+            entries = [
+                {"review": review, "general": review_id in self._general, "search_terms": list(self._terms[review_id])}
+                for review_id, review in self._reviews.items()
+            ]
+            # Written under the lock so concurrent saves cannot land out of order
+            try:
+                atomic_write_bytes(self.path, json.dumps({"reviews": entries}, indent=2, default=str).encode("utf-8"))
+            except OSError as e:
+                print(f"Error saving review index {self.path}: {e}")
@@ -1,3 +1,5 @@
+import io
+import json
 import os
 import re
 import time
@@ -8,6 +10,7 @@ import urllib.parse
 from datetime import datetime
 from PIL import Image, ImageDraw, ImageFont
 import math
+from functools import lru_cache, partial
 
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -21,9 +24,75 @@ from collections import Counter, defaultdict
 
 # Import required functions from nlp_utils
 from nlp_utils import determine_category
+from cache_utils import artifact_key, atomic_write_bytes, file_digest
+from download_utils import ImageDownloader, get_default_downloader
+from review_store import ReviewIndex, review_identity, review_key
+from crawl_utils import CrawlCoordinator
+from review_parser import parse_reviews_html
 from config import components_list, conditions_list
 from nltk.stem import WordNetLemmatizer
 
+# Review pages load asynchronously; wait on these instead of sleeping a fixed time
+REVIEW_LIST_ID = "cm_cr-review_list"
+REVIEW_BLOCK_XPATH = "//*[@data-hook='review']"
+PAGE_READY_TIMEOUT = 15
+
+# "html" parses one page_source snapshot per page; "webdriver" looks up every field live
+REVIEW_PARSE_MODE = os.environ.get("PACKSENSE_PARSE_MODE", "html")
+
+# Reviews search box, most specific first
+REVIEW_SEARCH_SELECTORS = [
+    "//input[@placeholder='Search reviews']",
+    "//input[@id='search-reviews']",
+    "//input[@name='search-reviews']",
+    "//input[@aria-label='Search reviews']",
+    "//input[@data-action='search-reviews']",
+    "//input[contains(@placeholder, 'review')]",
+    "//input[contains(@placeholder, 'Search')]",
+    "//input[@aria-label*='review']",
+    "//input[@aria-label*='Search']",
+    "//input[contains(@class, 'search')]",
+    "//input[@type='text']"
+]
+
+def first_review_block(driver):
+    """The first review on the page, used to notice when the page has been replaced"""
+    blocks = driver.find_elements(By.XPATH, REVIEW_BLOCK_XPATH)
+    return blocks[0] if blocks else None
+
+def wait_for_reviews(driver, previous=None, timeout=PAGE_READY_TIMEOUT) -> bool:
+    """
+    Wait until the review list is on the page. With `previous` (a review block
+    from before a search or page change), first wait for it to go stale so the
+    new results are read rather than the old ones.
+    """
+    try:
+        if previous is not None:
+            WebDriverWait(driver, timeout).until(EC.staleness_of(previous))
+        WebDriverWait(driver, timeout).until(EC.presence_of_element_located((By.ID, REVIEW_LIST_ID)))
+        return True
+    except TimeoutException:
+        return False
+
+def find_review_search_box(driver, preferred=None):
+    """
+    Locate the reviews search box, trying the selector that worked last time
+    first. Returns (element, selector) or (None, None).
+    """
+    selectors = list(REVIEW_SEARCH_SELECTORS)
+    if preferred in selectors:
+        selectors.remove(preferred)
+        selectors.insert(0, preferred)
+    for i, selector in enumerate(selectors):
+        try:
+            box = driver.find_element(By.XPATH, selector)
+        except NoSuchElementException:
+            print(f"❌ Search box selector {i+1} failed: {selector}")
+            continue
+        print(f"✅ Found search box with selector {i+1}: {selector}")
+        return box, selector
+    return None, None
+
 def click_next_if_available(driver):
     try:
         li = driver.find_element(
@@ -54,8 +123,10 @@ def scrape_reviews_for_keywords(
     3) For each keyword: type it into the on‑page filter box → paginate & collect
     Returns the merged list of review‑dicts.
     """
-    all_reviews = []
-    seen_texts  = set()
+    # Every pass records into the folder's review index, so each review is kept once.
+    # Keywords still come from every review this scrape saw, known to the index or not.
+    index = ReviewIndex(product_folder)
+    base_reviews = []
 
     # — build & load base reviews URL —
     m    = re.search(r'/(?:dp|product-reviews)/([A-Z0-9]{10})', review_url)
@@ -72,62 +143,68 @@ def scrape_reviews_for_keywords(
     img_folder = os.path.join("static", product_folder, "review_images")
     os.makedirs(img_folder, exist_ok=True)
 
-    # — scrape ALL unfiltered pages —
-    seen_src = set()
-    while True:
-        ensure_signed_in(driver, email, password, base_url)
-        prs, seen_src = extract_reviews_from_page(driver, img_folder, seen_src = seen_src)
-        if not prs:
-            break
-        all_reviews.extend(prs)
+    # Review images download in the background while pages are walked
+    downloader = ImageDownloader()
 
-        # click Next if available
-        if not click_next_if_available(driver):
-            break
-        time.sleep(2)
-
-    # — pick top_n condition‑keywords from all text —
-    blob   = " ".join(r["review_text"] for r in all_reviews).lower()
-    tokens = re.findall(r"\w+", blob)
-    conds  = [t for t in tokens if determine_category(t, components_list, conditions_list) == "condition"]
-    lem    = WordNetLemmatizer()
-    counts = Counter(lem.lemmatize(w) for w in conds)
-    top_k  = [kw for kw,_ in counts.most_common(top_n)]
-
-    # — for each keyword, re‑filter & collect those reviews —
-    for kw in top_k:
-        # type into filter box
-        ensure_signed_in(driver, email, password, base_url)
-        box = WebDriverWait(driver,10).until(
-            EC.presence_of_element_located((By.XPATH, "//input[contains(@placeholder,'Search customer reviews')]"))
-        )
-        box.clear()
-        box.send_keys(kw)
-        box.send_keys(Keys.RETURN)
-        time.sleep(5)
-
-        sub_seen = set()
+    try:
+        # — scrape ALL unfiltered pages —
+        seen_src = set()
         while True:
             ensure_signed_in(driver, email, password, base_url)
-            prs, sub_seen = extract_reviews_from_page(driver, img_folder, seen_src = sub_seen)
+            prs, seen_src = extract_reviews_from_page(driver, img_folder, seen_src = seen_src, downloader = downloader)
             if not prs:
                 break
             for r in prs:
-                txt = r["review_text"].strip()
-                if txt and txt not in seen_texts:
-                    seen_texts.add(txt)
-                    all_reviews.append(r)
+                index.add(r)
+                base_reviews.append(r)
 
+            # click Next if available
             if not click_next_if_available(driver):
                 break
             time.sleep(2)
 
-        # reset back to unfiltered page
-        driver.get(base_url)
-        time.sleep(5)
-        ensure_signed_in(driver, email, password, base_url)
+        # — pick top_n condition‑keywords from all text —
+        blob   = " ".join(r["review_text"] for r in base_reviews).lower()
+        tokens = re.findall(r"\w+", blob)
+        conds  = [t for t in tokens if determine_category(t, components_list, conditions_list) == "condition"]
+        lem    = WordNetLemmatizer()
+        counts = Counter(lem.lemmatize(w) for w in conds)
+        top_k  = [kw for kw,_ in counts.most_common(top_n)]
+
+        # — for each keyword, re‑filter & collect those reviews —
+        for kw in top_k:
+            # type into filter box
+            ensure_signed_in(driver, email, password, base_url)
+            box = WebDriverWait(driver,10).until(
+                EC.presence_of_element_located((By.XPATH, "//input[contains(@placeholder,'Search customer reviews')]"))
+            )
+            box.clear()
+            box.send_keys(kw)
+            box.send_keys(Keys.RETURN)
+            time.sleep(5)
+
+            sub_seen = set()
+            while True:
+                ensure_signed_in(driver, email, password, base_url)
+                prs, sub_seen = extract_reviews_from_page(driver, img_folder, seen_src = sub_seen, downloader = downloader)
+                if not prs:
+                    break
+                for r in prs:
+                    if r["review_text"].strip():
+                        index.add(r, kw)
+
+                if not click_next_if_available(driver):
+                    break
+                time.sleep(2)
 
-    return all_reviews
+            # reset back to unfiltered page
+            driver.get(base_url)
+            time.sleep(5)
+            ensure_signed_in(driver, email, password, base_url)
+    finally:
+        downloader.close()
+    index.save()
+    return index.reviews()
 
 def build_full_component_map(image_path, hand_tuned, all_components):
     """
@@ -163,6 +240,7 @@ def generate_defect_overlay(image_path, defect_pairs, coords_map, output_path):
     """
     Draw numbered X's at each defect location using an inverted
     color sampled from the product image underneath each mark.
+    The file is written atomically; the rendered image is returned.
     """
     img = Image.open(image_path).convert("RGBA")
     w, h = img.size
@@ -218,40 +296,114 @@ def generate_defect_overlay(image_path, defect_pairs, coords_map, output_path):
             num_y = ty - X_half - th - 2
             draw.text((num_x, num_y), txt, fill=color, font=font)
 
-    base.save(output_path)
+    buf = io.BytesIO()
+    base.save(buf, format=Image.registered_extensions().get(os.path.splitext(output_path)[1].lower(), "PNG"))
+    atomic_write_bytes(output_path, buf.getvalue())
+    return base
+
+# Bump when the overlay drawing changes so cached overlays are re-rendered
+DEFECT_OVERLAY_VERSION = "1"
+DEFECT_OVERLAY_THUMB_WIDTH = 480
+
+def cached_defect_overlay(image_path, defect_pairs, folder):
+    """
+    Render the defect overlay for `image_path` into `folder` under a name
+    derived from the image bytes, the pairs and their coordinates, plus a
+    WebP copy and a WebP thumbnail. Unchanged inputs reuse the files already
+    there. Returns {"png", "webp", "thumb", "width", "thumb_width"} with file
+    names relative to `folder`.
+    """
+    coords_map = build_defect_coords_map(image_path, defect_pairs)
+    key = artifact_key(
+        DEFECT_OVERLAY_VERSION,
+        file_digest(image_path),
+        json.dumps([list(pair) for pair in defect_pairs]),
+        json.dumps(sorted((comp, list(point)) for comp, point in coords_map.items()))
+    )[:16]
+    names = {
+        "png": f"defects_overlay-{key}.png",
+        "webp": f"defects_overlay-{key}.webp",
+        "thumb": f"defects_overlay-{key}-thumb.webp",
+    }
+    paths = {kind: os.path.join(folder, name) for kind, name in names.items()}
+
+    if all(os.path.exists(path) for path in paths.values()):
+        with Image.open(paths["png"]) as img:
+            width = img.width
+        with Image.open(paths["thumb"]) as thumb:
+            thumb_width = thumb.width
+    else:
+        print(f"Rendering defect overlay {names['png']}...")
+        overlay = generate_defect_overlay(image_path, defect_pairs, coords_map, paths["png"])
+        width = overlay.width
+        buf = io.BytesIO()
+        overlay.save(buf, format="WEBP", quality=85, method=4)
+        atomic_write_bytes(paths["webp"], buf.getvalue())
+        thumb = overlay.copy()
+        thumb.thumbnail((DEFECT_OVERLAY_THUMB_WIDTH, DEFECT_OVERLAY_THUMB_WIDTH * overlay.height // max(overlay.width, 1) or 1))
+        thumb_width = thumb.width
+        buf = io.BytesIO()
+        thumb.save(buf, format="WEBP", quality=80, method=4)
+        atomic_write_bytes(paths["thumb"], buf.getvalue())
+        # Older overlays of this folder are superseded
+        for fname in os.listdir(folder):
+            if fname.startswith("defects_overlay-") and fname not in names.values() and not fname.endswith(".tmp"):
+                try:
+                    os.remove(os.path.join(folder, fname))
+                except OSError:
+                    pass
+
+    return dict(names, width=width, thumb_width=thumb_width)
    
-def build_defect_coords_map(image_path, defect_pairs):
+def defect_ray_hits(mask, count):
     """
-    For each component in defect_pairs, march a ray inward
-    to find the first non-white pixel and use that as (tx,ty).
+    Cast `count` rays from the image centre at evenly spaced angles and march
+    each inward from just outside the image; return the first product pixel
+    (True in `mask`) each ray meets, or the centre if it meets none. All rays
+    and radii are sampled as one array lookup.
     """
+    h, w = mask.shape
+    center = (w//2, h//2)
+    if count == 0:
+        return ()
+    # math.cos/sin per ray so sample points match the scalar march bit for bit
+    angles = [2 * math.pi * i / count for i in range(count)]
+    dx = np.array([math.cos(a) for a in angles])[:, None]
+    dy = np.array([math.sin(a) for a in angles])[:, None]
+    radii = np.arange(int(max(w, h) * 0.5 + 20), 0, -1, dtype=np.float64)[None, :]
+
+    xs = (center[0] + dx * radii).astype(np.int64)
+    ys = (center[1] + dy * radii).astype(np.int64)
+    inside = (xs >= 0) & (xs < w) & (ys >= 0) & (ys < h)
+    hit = np.zeros(xs.shape, dtype=bool)
+    hit[inside] = mask[ys[inside], xs[inside]]
+
+    first = hit.argmax(axis=1)
+    rows = np.arange(count)
+    found = hit[rows, first]
+    return tuple(
+        (int(xs[i, first[i]]), int(ys[i, first[i]])) if found[i] else center
+        for i in rows
+    )
+
+@lru_cache(maxsize=32)
+def _cached_defect_ray_hits(image_digest, count, image_path):
     img = Image.open(image_path).convert("RGBA")
-    w, h = img.size
     pix = np.array(img)[..., :3]
     mask = ~np.all(pix > 245, axis=2)      # True where the product is
-    center = (w//2, h//2)
+    return defect_ray_hits(mask, count)
 
+def build_defect_coords_map(image_path, defect_pairs):
+    """
+    For each component in defect_pairs, march a ray inward
+    to find the first non-white pixel and use that as (tx,ty).
+    Hits depend only on the image and the number of pairs, so they are
+    cached per (image hash, pair count).
+    """
+    hits = _cached_defect_ray_hits(file_digest(image_path), len(defect_pairs), image_path)
     coords = {}
-    n = len(defect_pairs)
-    for idx, (comp, cond) in enumerate(defect_pairs, start=1):
-        angle = 2 * math.pi * (idx - 1) / n
-        dx, dy = math.cos(angle), math.sin(angle)
-
-        tx = ty = None
-        radius = max(w, h) * 0.5 + 20
-        for r in range(int(radius), 0, -1):
-            x = int(center[0] + dx * r)
-            y = int(center[1] + dy * r)
-            if 0 <= x < w and 0 <= y < h and mask[y, x]:
-                tx, ty = x, y
-                break
-
-        # fallback to center if we never hit the mask
-        if tx is None:
-            tx, ty = center
-
-        coords[comp] = (tx, ty)
-
+    for (comp, cond), point in zip(defect_pairs, hits):
+        coords[comp] = point
     return coords
 
 def amazon_sign_in(driver, email, password, return_url):
@@ -325,109 +477,165 @@ def get_product_name(driver, asin):
         return "Unknown_Product"
 
 def download_image(image_url, folder, filename):
+    """Blocking download through the shared pooled session; returns the saved path or None"""
     try:
-        print(f"Attempting to download: {image_url}")
-        
-        # Add headers to mimic a real browser
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Referer': 'https://www.amazon.com/',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'image',
-            'Sec-Fetch-Mode': 'no-cors',
-            'Sec-Fetch-Site': 'cross-site',
-        }
-        
-        # Try different URL patterns for Amazon images
-        urls_to_try = [image_url]
-        
-        # If it's an Amazon image URL, try different size variants
-        if 'amazon.com' in image_url:
-            # Try to get a larger version by modifying the URL
-            if '_SY88' in image_url:
-                urls_to_try.extend([
-                    image_url.replace('_SY88', '_AC_SL1500'),
-                    image_url.replace('_SY88', '_AC_SL1000'),
-                    image_url.replace('_SY88', '_AC_UL1500')
-                ])
-            if '_AC_SL1500' in image_url:
-                urls_to_try.extend([
-                    image_url.replace('_AC_SL1500', '_AC_SL1000'),
-                    image_url.replace('_AC_SL1500', '_AC_UL1500')
-                ])
-            if 'images-na.ssl-images-amazon.com' in image_url:
-                urls_to_try.append(image_url.replace('images-na.ssl-images-amazon.com', 'm.media-amazon.com'))
-            if 'm.media-amazon.com' in image_url:
-                urls_to_try.append(image_url.replace('m.media-amazon.com', 'images-na.ssl-images-amazon.com'))
+        downloader = get_default_downloader()
+        path = downloader.download(image_url, folder, filename)
+        downloader.flush_index()
+        return path
+    except Exception as e:
+        print(f"Exception in download_image: {e}")
+        return None
+
+def safe_name(reviewer: str) -> str:
+    """Reviewer name as used in image filenames"""
+    return re.sub(r'[^a-zA-Z0-9_]', '', reviewer.replace(" ", "_"))
+
+def collect_modal_images(driver, block, image_folder, safe, gi, seen_src, downloader) -> list:
+    """
+    Open a review block's "see all" image links and queue the extra images
+    they show. Returns (filename, future) pairs like the block's own images.
+    """
+    local_images = []
+    try:
+        see_all_links = block.find_elements(
+            By.XPATH,
+            ".//a[contains(translate(.,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'see all') or contains(translate(.,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'view all')]"
+        )
         
-        for url in urls_to_try:
+        for see_all in see_all_links:
             try:
-                print(f"Trying URL: {url}")
-                resp = requests.get(url, headers=headers, stream=True, timeout=20)
-                print(f"Response status for {url}: {resp.status_code}")
+                print(f"Clicking 'see all' link for more images...")
+                driver.execute_script("arguments[0].click();", see_all)
+                
+                # Wait for modal to appear
+                modal = WebDriverWait(driver, 10).until(
+                    EC.visibility_of_element_located(
+                        (By.XPATH, "//div[contains(@class,'a-popover-inner') or contains(@class,'modal') or contains(@class,'overlay')]")
+                    )
+                )
+                time.sleep(2)
+                
+                modal_imgs = modal.find_elements(By.XPATH, ".//img")
+                print(f"Found {len(modal_imgs)} additional images in modal")
                 
-                if resp.status_code == 200:
-                    # Check if the response is actually an image
-                    content_type = resp.headers.get('content-type', '')
-                    if not content_type.startswith('image/'):
-                        print(f"Not an image: {content_type}")
+                for j, mimg in enumerate(modal_imgs):
+                    msrc = mimg.get_attribute("src")
+                    if not msrc:
+                        msrc = mimg.get_attribute("data-src")
+                    if not msrc or msrc in seen_src:
                         continue
-                    
-                    os.makedirs(folder, exist_ok=True)
-                    path = os.path.join(folder, filename)
-                    
-                    with open(path, "wb") as f:
-                        for chunk in resp.iter_content(chunk_size=8192):
-                            if chunk:
-                                f.write(chunk)
-                    
-                    # Verify the file was created and has content
-                    if os.path.exists(path) and os.path.getsize(path) > 0:
-                        print(f"Successfully downloaded: {path}")
-                        return path
-                    else:
-                        print(f"File created but empty or missing: {path}")
-                        if os.path.exists(path):
-                            os.remove(path)
-                elif resp.status_code == 403:
-                    print(f"Access forbidden (403) for {url} - Amazon may be blocking")
-                elif resp.status_code == 404:
-                    print(f"Image not found (404) for {url}")
-                else:
-                    print(f"HTTP {resp.status_code} for {url}")
-                    
-            except requests.exceptions.Timeout:
-                print(f"Timeout downloading from {url}")
-                continue
-            except requests.exceptions.ConnectionError:
-                print(f"Connection error downloading from {url}")
-                continue
+                    seen_src.add(msrc)
+
+                    fname = f"{safe}_review{gi}_modal_{j}.jpg"
+                    local_images.append((fname, downloader.submit(msrc, image_folder, fname)))
+
+                # Close the modal
+                try:
+                    close_btn = driver.find_element(
+                        By.XPATH, "//button[contains(@class,'a-button-close') or contains(@class,'close') or contains(@aria-label,'Close')]"
+                    )
+                    driver.execute_script("arguments[0].click();", close_btn)
+                    time.sleep(1)
+                except:
+                    # Try pressing Escape key
+                    from selenium.webdriver.common.keys import Keys
+                    driver.find_element(By.TAG_NAME, "body").send_keys(Keys.ESCAPE)
+                    time.sleep(1)
+
             except Exception as e:
-                print(f"Exception downloading from {url}: {e}")
+                print(f"Error processing 'see all' link: {e}")
                 continue
-        
-        print(f"All download attempts failed for {filename}")
-        return None
-        
+
     except Exception as e:
-        print(f"Exception in download_image: {e}")
-        return None
+        print(f"Error looking for 'see all' links: {e}")
+        pass
+    return local_images
+
+def resolve_image_links(reviews_data):
+    """Wait for a page's downloads; a URL already saved earlier resolves to that file"""
+    for review in reviews_data:
+        saved = []
+        for fname, future in review["image_links"]:
+            path = future.result()
+            if path:
+                saved.append(os.path.basename(path))
+            else:
+                print(f"Failed to download {fname}")
+        review["image_links"] = ", ".join(saved)
+
+def make_review(title, text, reviewer, date, rating, verified, image_links) -> dict:
+    """The scraped review dict; its id hashes the content so every pass agrees on it"""
+    review = {
+        "review_title": title,
+        "review_text": text,
+        "reviewer_name": reviewer,
+        "review_date": date,
+        "rating": rating,
+        "verified": verified,
+        "image_links": image_links
+    }
+    review["review_id"] = review_identity(review)
+    return review
+
+def extract_reviews_from_html(html, image_folder, review_offset=0, seen_src=None, downloader=None, driver=None):
+    """
+    Build the review dicts of one review page from its HTML with a single
+    parse, queueing image downloads like extract_reviews_from_page. With a
+    live `driver`, blocks that link to more images still have their "see
+    all" modal opened; without one (saved pages) those extra images are skipped.
+    image_links hold (filename, future) pairs until resolve_image_links.
+    """
+    if seen_src is None:
+        seen_src = set()
+    if downloader is None:
+        downloader = get_default_downloader()
+    os.makedirs(image_folder, exist_ok=True)
 
-def extract_reviews_from_page(driver, image_folder, review_offset=0, seen_src=None):
+    parsed_reviews = parse_reviews_html(html)
+    live_blocks = None
+    reviews_data = []
+    for idx, parsed in enumerate(parsed_reviews):
+        gi = review_offset + idx
+        safe = safe_name(parsed["reviewer_name"])
+        local_images = []
+        for i, src in enumerate(parsed["image_urls"]):
+            if not src or src in seen_src:
+                continue
+            seen_src.add(src)
+            fname = f"{safe}_review{gi}_{i}.jpg"
+            local_images.append((fname, downloader.submit(src, image_folder, fname)))
+
+        if parsed["has_see_all"] and driver is not None:
+            if live_blocks is None:
+                live_blocks = driver.find_elements(By.XPATH, REVIEW_BLOCK_XPATH)
+            # only trust the index when the live page lists the same blocks
+            if len(live_blocks) == len(parsed_reviews):
+                local_images.extend(collect_modal_images(driver, live_blocks[idx], image_folder, safe, gi, seen_src, downloader))
+
+        reviews_data.append(make_review(
+            parsed["review_title"], parsed["review_text"], parsed["reviewer_name"], parsed["review_date"],
+            parsed["rating"], parsed["verified"], local_images
+        ))
+    print(f"Parsed {len(reviews_data)} reviews from page HTML")
+    return reviews_data
+
+def extract_reviews_from_page(driver, image_folder, review_offset=0, seen_src=None, downloader=None, parse_mode=None):
     """
     Scrolls the page, finds all reviews, extracts their text and metadata,
     downloads any new images (avoiding duplicates via seen_src), and returns
     a list of review dicts plus the updated seen_src set.
+    Images are fetched by `downloader` in the background while the rest of
+    the page is walked; image_links are filled in once the page is done.
+    In "html" parse_mode (the default, see REVIEW_PARSE_MODE) the page
+    source is read once and parsed offline; "webdriver" queries each field.
     """
 
     # Initialize seen_src on first call
     if seen_src is None:
         seen_src = set()
+    if downloader is None:
+        downloader = get_default_downloader()
 
     # 1) Scroll to bottom to load lazy‐loaded reviews
     SCROLL_PAUSE_TIME = 2
@@ -448,7 +656,22 @@ def extract_reviews_from_page(driver, image_folder, review_offset=0, seen_src=No
     except:
         return [], seen_src
 
-    # 3) Locate all individual review blocks
+    # 3) One page_source read instead of per-field lookups; live lookups remain the fallback
+    if (parse_mode or REVIEW_PARSE_MODE) == "html":
+        # Parse against a copy: a failed or empty parse must not mark images seen for the fallback
+        page_seen = set(seen_src)
+        try:
+            reviews_data = extract_reviews_from_html(driver.page_source, image_folder, review_offset,
+                                                     page_seen, downloader, driver)
+        except Exception as e:
+            print(f"Error parsing page HTML, falling back to WebDriver lookups: {e}")
+            reviews_data = []
+        if reviews_data:
+            seen_src |= page_seen
+            resolve_image_links(reviews_data)
+            return reviews_data, seen_src
+
+    # Locate all individual review blocks
     review_blocks = driver.find_elements(By.XPATH, "//*[@data-hook='review']")
     if not review_blocks:
         review_blocks = driver.find_elements(
@@ -659,83 +882,16 @@ def extract_reviews_from_page(driver, image_folder, review_offset=0, seen_src=No
                 continue
             seen_src.add(src)
 
-            safe = re.sub(r'[^a-zA-Z0-9_]', '', reviewer.replace(" ", "_"))
-            fname = f"{safe}_review{gi}_{i}.jpg"
-            print(f"Attempting to download as: {fname}")
-            if download_image(src, image_folder, fname):
-                local_images.append(fname)
-                print(f"Successfully added {fname} to local_images")
-            else:
-                print(f"Failed to download {fname}")
+            fname = f"{safe_name(reviewer)}_review{gi}_{i}.jpg"
+            print(f"Queueing download as: {fname}")
+            local_images.append((fname, downloader.submit(src, image_folder, fname)))
 
         # Try to find "see all" links for more images
-        try:
-            see_all_links = block.find_elements(
-                By.XPATH,
-                ".//a[contains(translate(.,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'see all') or contains(translate(.,'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),'view all')]"
-            )
-            
-            for see_all in see_all_links:
-                try:
-                    print(f"Clicking 'see all' link for more images...")
-                    driver.execute_script("arguments[0].click();", see_all)
-                    
-                    # Wait for modal to appear
-                    modal = WebDriverWait(driver, 10).until(
-                        EC.visibility_of_element_located(
-                            (By.XPATH, "//div[contains(@class,'a-popover-inner') or contains(@class,'modal') or contains(@class,'overlay')]")
-                        )
-                    )
-                    time.sleep(2)
-                    
-                    modal_imgs = modal.find_elements(By.XPATH, ".//img")
-                    print(f"Found {len(modal_imgs)} additional images in modal")
-                    
-                    for j, mimg in enumerate(modal_imgs):
-                        msrc = mimg.get_attribute("src")
-                        if not msrc:
-                            msrc = mimg.get_attribute("data-src")
-                        if not msrc or msrc in seen_src:
-                            continue
-                        seen_src.add(msrc)
-
-                        fname = f"{safe}_review{gi}_modal_{j}.jpg"
-                        if download_image(msrc, image_folder, fname):
-                            local_images.append(fname)
-                            print(f"Successfully added modal image {fname}")
-
-                    # Close the modal
-                    try:
-                        close_btn = driver.find_element(
-                            By.XPATH, "//button[contains(@class,'a-button-close') or contains(@class,'close') or contains(@aria-label,'Close')]"
-                        )
-                        driver.execute_script("arguments[0].click();", close_btn)
-                        time.sleep(1)
-                    except:
-                        # Try pressing Escape key
-                        from selenium.webdriver.common.keys import Keys
-                        driver.find_element(By.TAG_NAME, "body").send_keys(Keys.ESCAPE)
-                        time.sleep(1)
-
-                except Exception as e:
-                    print(f"Error processing 'see all' link: {e}")
-                    continue
+        local_images.extend(collect_modal_images(driver, block, image_folder, safe_name(reviewer), gi, seen_src, downloader))
 
-        except Exception as e:
-            print(f"Error looking for 'see all' links: {e}")
-            pass
-
-        # assemble the review dict
-        reviews_data.append({
-            "review_title": title,
-            "review_text": text,
-            "reviewer_name": reviewer,
-            "review_date": date,
-            "rating": rating,
-            "verified": verified,
-            "image_links": ", ".join(local_images)
-        })
+        reviews_data.append(make_review(title, text, reviewer, date, rating, verified, local_images))
 
+    resolve_image_links(reviews_data)
     return reviews_data, seen_src
 
 def scrape_all_conditions_once(
@@ -763,6 +919,7 @@ def scrape_all_conditions_once(
       "Chrome/112.0.0.0 Safari/537.36"
     )
     driver = webdriver.Chrome(options=opts)
+    downloader = ImageDownloader()
     try:
         # 1) sign in once
         amazon_sign_in(driver, email, password, review_url)
@@ -788,8 +945,7 @@ def scrape_all_conditions_once(
         img_folder= os.path.join(folder, "review_images")
         os.makedirs(img_folder, exist_ok=True)
 
-        all_reviews = []
-        seen_texts  = set()
+        index = ReviewIndex(f"{asin}_{today}")
 
         # 3) for each condition keyword
         for kw in condition_keywords:
@@ -810,16 +966,15 @@ def scrape_all_conditions_once(
                 prs, seen_src = extract_reviews_from_page(
                     driver,
                     img_folder,
-                    review_offset=len(all_reviews),
-                    seen_src=seen_src
+                    review_offset=len(index),
+                    seen_src=seen_src,
+                    downloader=downloader
                 )
                 if not prs:
                     break
                 for r in prs:
-                    txt = r["review_text"].strip()
-                    if txt and txt not in seen_texts:
-                        seen_texts.add(txt)
-                        all_reviews.append(r)
+                    if r["review_text"].strip():
+                        index.add(r, kw)
 
                 # click "Next"
                 try:
@@ -839,9 +994,11 @@ def scrape_all_conditions_once(
             ensure_signed_in(driver, email, password, review_url)
             time.sleep(2)
 
-        return all_reviews
+        index.save()
+        return index.reviews()
 
     finally:
+        downloader.close()
         driver.quit()
 
 def scrape_all_amazon_reviews(review_url, email, password, review_type="all", use_headless=False, filter_keyword: str = None,):
@@ -860,6 +1017,7 @@ def scrape_all_amazon_reviews(review_url, email, password, review_type="all", us
         "Chrome/112.0.0.0 Safari/537.36"
     )
     driver = webdriver.Chrome(options=options)
+    downloader = ImageDownloader()
     
     try:
         # 1) extract ASIN from whatever URL they gave us:
@@ -974,7 +1132,7 @@ def scrape_all_amazon_reviews(review_url, email, password, review_type="all", us
 
         while True:
             print(f"Processing page {page_num}...")
-            reviews_data, seen_src = extract_reviews_from_page(driver, img_folder, len(all_reviews), seen_src)
+            reviews_data, seen_src = extract_reviews_from_page(driver, img_folder, len(all_reviews), seen_src, downloader=downloader)
             
             if not reviews_data:
                 print(f"No reviews found on page {page_num}")
@@ -1012,6 +1170,7 @@ def scrape_all_amazon_reviews(review_url, email, password, review_type="all", us
         traceback.print_exc()
         return None, [], None, None
     finally:
+        downloader.close()
         driver.quit()
 
 def handle_captcha(driver):
@@ -1026,6 +1185,107 @@ def handle_captcha(driver):
 def sanitize_filename(name):
     return re.sub(r'[^a-zA-Z0-9_]','',name.replace(" ","_")) 
 
+def new_chrome_driver(use_headless: bool = False):
+    """Chrome configured like every scraping browser in this module"""
+    options = Options()
+    if use_headless: 
+        options.add_argument("--headless")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument(
+        "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/112.0.0.0 Safari/537.36"
+    )
+    return webdriver.Chrome(options=options)
+
+def scrape_term_reviews(driver, term, budget=None, *, base_url, img_folder, downloader, index, selectors=None):
+    """
+    Search the reviews at `base_url` for `term` and page through the results,
+    adding every review to `index` under the term. Stops at the first page
+    that only repeats reviews this term already returned. `selectors` caches the working search-box selector
+    across calls and browsers; every page load first draws from `budget`
+    (a crawl_utils.RateBudget). Returns the number of reviews new to the index.
+    """
+    selectors = {} if selectors is None else selectors
+    acquire = budget.acquire if budget is not None else (lambda: None)
+    print(f"Searching for term: {term}")
+
+    # The search box is on every results page, so only go back to base_url without it
+    search_box = None
+    if selectors.get("search"):
+        try:
+            search_box = driver.find_element(By.XPATH, selectors["search"])
+        except NoSuchElementException:
+            search_box = None
+    if search_box is None:
+        acquire()
+        driver.get(base_url)
+        wait_for_reviews(driver)
+        print(f"Looking for reviews search box for term '{term}'...")
+        search_box, selector = find_review_search_box(driver, selectors.get("search"))
+        if selector:
+            selectors["search"] = selector
+
+    if not search_box:
+        print(f"❌ Could not find reviews search box for term '{term}'")
+        print("Available input elements on page:")
+        try:
+            inputs = driver.find_elements(By.TAG_NAME, "input")
+            for inp in inputs[:10]:  # Show first 10 inputs
+                placeholder = inp.get_attribute('placeholder') or 'No placeholder'
+                id_attr = inp.get_attribute('id') or 'No id'
+                aria_label = inp.get_attribute('aria-label') or 'No aria-label'
+                print(f"  Input: placeholder='{placeholder}', id='{id_attr}', aria-label='{aria_label}'")
+        except Exception as e:
+            print(f"Error listing inputs: {e}")
+        return 0
+
+    print(f"Searching for term '{term}' in reviews search bar...")
+    previous = first_review_block(driver)
+    search_box.clear()
+    search_box.send_keys(term)
+    acquire()
+    search_box.send_keys(Keys.RETURN)
+    ready = wait_for_reviews(driver, previous)
+
+    # Extract reviews for this term (recursively through all pages)
+    new_reviews = 0
+    page_count = 0
+    # Reviews this term has returned. The index also holds the general listing,
+    # other terms' hits and earlier runs, so "new to the index" cannot end a term.
+    term_seen = set()
+
+    while ready:
+        page_count += 1
+        print(f"  Extracting page {page_count} for term '{term}'...")
+
+        page_reviews, _ = extract_reviews_from_page(driver, img_folder, seen_src=set(), downloader=downloader)
+
+        if not page_reviews:
+            break
+
+        # A review found by several terms stays one entry listing all of them
+        new_reviews += sum(index.add(review, term) for review in page_reviews)
+
+        # A page that only repeats this term's earlier results means pagination stopped advancing
+        page_keys = {review_key(review) for review in page_reviews}
+        if page_keys <= term_seen:
+            print(f"  Page {page_count} for term '{term}' repeated earlier results, moving on")
+            break
+        term_seen |= page_keys
+
+        # Try to go to next page
+        previous = first_review_block(driver)
+        acquire()
+        if not click_next_if_available(driver):
+            break
+        ready = wait_for_reviews(driver, previous)
+
+    index.save()
+    print(f"  Found {new_reviews} new reviews for term '{term}'")
+    return new_reviews
+
 def scrape_recursive_packaging_reviews(
     review_url: str,
     email: str,
@@ -1041,17 +1301,8 @@ def scrape_recursive_packaging_reviews(
     """
     print("Starting Recursive Packaging Review Extraction Strategy...")
     
-    options = Options()
-    if use_headless: 
-        options.add_argument("--headless")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument(
-        "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/112.0.0.0 Safari/537.36"
-    )
-    driver = webdriver.Chrome(options=options)
+    driver = new_chrome_driver(use_headless)
+    downloader = ImageDownloader()
     
     try:
         # Extract ASIN and setup
@@ -1089,6 +1340,9 @@ def scrape_recursive_packaging_reviews(
         img_folder = os.path.join(folder, "review_images")
         os.makedirs(img_folder, exist_ok=True)
         
+        # Every pass records into the snapshot's review index, which keeps each review once
+        index = ReviewIndex(product_folder)
+        
         # Step 1: Extract initial batch of 100 reviews (general extraction)
         print("Step 1: Extracting initial batch of 100 reviews...")
         initial_reviews = []
@@ -1097,7 +1351,7 @@ def scrape_recursive_packaging_reviews(
         # Navigate to reviews page
         base_url = f"https://www.amazon.com/product-reviews/{asin}/?reviewerType=all_reviews&filterByStar=all_stars&pageNumber=1"
         driver.get(base_url)
-        time.sleep(3)
+        wait_for_reviews(driver)
         
         # Extract initial 100 reviews (no need to re-authenticate)
         page_count = 0
@@ -1105,29 +1359,32 @@ def scrape_recursive_packaging_reviews(
             page_count += 1
             print(f"Extracting page {page_count}...")
             
-            page_reviews, seen_src = extract_reviews_from_page(driver, img_folder, seen_src=seen_src)
+            page_reviews, seen_src = extract_reviews_from_page(driver, img_folder, seen_src=seen_src, downloader=downloader)
             
             if not page_reviews:
                 print("No more reviews found")
                 break
                 
-            initial_reviews.extend(page_reviews)
+            for review in page_reviews[:100 - len(initial_reviews)]:
+                index.add(review)
+                initial_reviews.append(review)
             print(f"Total reviews collected: {len(initial_reviews)}")
             
             if len(initial_reviews) >= 100:
-                initial_reviews = initial_reviews[:100]
                 break
                 
+            previous = first_review_block(driver)
             if not click_next_if_available(driver):
                 print("No more pages available")
                 break
-            time.sleep(2)
+            if not wait_for_reviews(driver, previous):
+                print("Next page did not load")
+                break
         
         print(f"Initial reviews extracted: {len(initial_reviews)}")
         
         # Step 2: Use predefined keyword sets to search in review search box
         print("Step 2: Searching for packaging-related terms...")
-        packaging_reviews = []
         all_packaging_terms = components_list + conditions_list
         
         # Combine all review text for keyword analysis
@@ -1143,102 +1400,25 @@ def scrape_recursive_packaging_reviews(
         
         # Step 3: Recursively extract all reviews associated with those keywords
         print("Step 3: Recursively extracting reviews for each keyword...")
-        seen_review_ids = set()
-        
-        for term in relevant_terms:
-            print(f"Searching for term: {term}")
-            
-            try:
-                # Navigate back to reviews page (maintain session)
-                driver.get(base_url)
-                time.sleep(3)
-                
-                # Find and use search box - improved selectors for reviews search bar
-                search_box = None
-                search_selectors = [
-                    # Most specific selectors for reviews search
-                    "//input[@placeholder='Search reviews']",
-                    "//input[@id='search-reviews']",
-                    "//input[@name='search-reviews']",
-                    "//input[@aria-label='Search reviews']",
-                    "//input[@data-action='search-reviews']",
-                    # More general selectors
-                    "//input[contains(@placeholder, 'review')]",
-                    "//input[contains(@placeholder, 'Search')]",
-                    "//input[@aria-label*='review']",
-                    "//input[@aria-label*='Search']",
-                    # Fallback selectors
-                    "//input[contains(@class, 'search')]",
-                    "//input[@type='text']"
-                ]
-                
-                print(f"Looking for reviews search box for term '{term}'...")
-                
-                for i, selector in enumerate(search_selectors):
-                    try:
-                        search_box = driver.find_element(By.XPATH, selector)
-                        print(f"✅ Found search box with selector {i+1}: {selector}")
-                        break
-                    except NoSuchElementException:
-                        print(f"❌ Selector {i+1} failed: {selector}")
-                        continue
-                
-                if search_box:
-                    print(f"Searching for term '{term}' in reviews search bar...")
-                    # Clear the search box and enter the term
-                    search_box.clear()
-                    time.sleep(1)
-                    search_box.send_keys(term)
-                    time.sleep(1)
-                    search_box.send_keys(Keys.RETURN)
-                    time.sleep(3)
-                    
-                    # Extract reviews for this term (recursively through all pages)
-                    term_reviews = []
-                    page_count = 0
-                    
-                    while True:
-                        page_count += 1
-                        print(f"  Extracting page {page_count} for term '{term}'...")
-                        
-                        page_reviews, _ = extract_reviews_from_page(driver, img_folder, seen_src=set())
-                        
-                        if not page_reviews:
-                            break
-                        
-                        # Add term information and filter duplicates
-                        for review in page_reviews:
-                            review_id = review.get('review_id', review.get('review_text', ''))
-                            if review_id not in seen_review_ids:
-                                seen_review_ids.add(review_id)
-                                review['search_term'] = term
-                                review['is_packaging_related'] = True
-                                term_reviews.append(review)
-                        
-                        # Try to go to next page
-                        if not click_next_if_available(driver):
-                            break
-                        time.sleep(2)
-                    
-                    packaging_reviews.extend(term_reviews)
-                    print(f"  Found {len(term_reviews)} unique reviews for term '{term}'")
-                else:
-                    print(f"❌ Could not find reviews search box for term '{term}'")
-                    print("Available input elements on page:")
-                    try:
-                        inputs = driver.find_elements(By.TAG_NAME, "input")
-                        for inp in inputs[:10]:  # Show first 10 inputs
-                            placeholder = inp.get_attribute('placeholder') or 'No placeholder'
-                            id_attr = inp.get_attribute('id') or 'No id'
-                            aria_label = inp.get_attribute('aria-label') or 'No aria-label'
-                            print(f"  Input: placeholder='{placeholder}', id='{id_attr}', aria-label='{aria_label}'")
-                    except Exception as e:
-                        print(f"Error listing inputs: {e}")
-                    
-            except Exception as e:
-                print(f"Error searching for term '{term}': {e}")
-                continue
+        # Terms are sharded across several browsers sharing this session and one rate budget
+        crawl_term = partial(scrape_term_reviews, base_url=base_url, img_folder=img_folder,
+                             downloader=downloader, index=index, selectors={})
+        coordinator = CrawlCoordinator(
+            driver,
+            driver_factory=lambda: new_chrome_driver(use_headless),
+            crawl_term=crawl_term,
+            origin=dp_url
+        )
+        coordinator.run(relevant_terms)
+        failed_terms = dict(coordinator.errors)
+        if failed_terms:
+            print(f"⚠️ {len(failed_terms)} packaging terms could not be searched: {sorted(failed_terms)}")
         
+        index.save()
+        # Each review lands in exactly one group: packaging if any term search returned it
+        initial_reviews = index.initial_reviews()
+        packaging_reviews = index.packaging_reviews(relevant_terms)
+        print(f"Review index holds {len(index)} unique reviews")
         print(f"Total unique packaging-related reviews found: {len(packaging_reviews)}")
         
         # Prepare results
@@ -1249,6 +1429,7 @@ def scrape_recursive_packaging_reviews(
             'initial_reviews': initial_reviews,
             'packaging_reviews': packaging_reviews,
             'packaging_terms_searched': relevant_terms,
+            'failed_terms': failed_terms,
             'total_initial_reviews': len(initial_reviews),
             'total_packaging_reviews': len(packaging_reviews),
             'scraping_timestamp': datetime.now().isoformat()
@@ -1264,4 +1445,5 @@ def scrape_recursive_packaging_reviews(
         print(f"Error in recursive scraping: {e}")
         return None
     finally:
+        downloader.close()
         driver.quit() 
\ No newline at end of file
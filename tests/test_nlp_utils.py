@@ -0,0 +1,60 @@
+import os
+import shutil
+
+import pytest
+from nltk.corpus import wordnet as wn
+from nltk.stem import WordNetLemmatizer
+
+import nlp_utils
+from config import components_list, conditions_list
+from packaging_library import PackagingLibrary
+
+try:
+    wn.ensure_loaded()
+except LookupError:
+    pytest.skip("WordNet data is not installed", allow_module_level=True)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def baseline_determine_category(word, comps, conds):
+    """determine_category as it was before the WordNet lookups were memoized"""
+    lemmatizer = WordNetLemmatizer()
+    w = word.lower()
+    lemma = lemmatizer.lemmatize(w)
+    in_c = (w in comps) or (lemma in comps)
+    in_d = (w in conds) or (lemma in conds)
+    if not in_c and not in_d:
+        rels = {lemmatizer.lemmatize(w)}
+        for syn in wn.synsets(w):
+            for l in syn.lemmas():
+                rels.add(l.name().replace('_', ' ').lower())
+                for ant in l.antonyms():
+                    rels.add(ant.name().replace('_', ' ').lower())
+        in_c = any(r in comps for r in rels)
+        in_d = any(r in conds for r in rels)
+    if in_c and in_d: return "both"
+    if in_c: return "component"
+    if in_d: return "condition"
+    return None
+
+def _library_vocabulary(folder):
+    # A copy, so importing the workbook does not write a store into static/
+    workbook = os.path.join(str(folder), "packaging_library.xlsx")
+    shutil.copy(os.path.join(ROOT, "static", "packaging_library.xlsx"), workbook)
+    library = PackagingLibrary(workbook).refresh()
+    return list(components_list) + library.components, list(conditions_list) + library.conditions
+
+def test_determine_category_matches_baseline(tmp_path):
+    comps, conds = _library_vocabulary(tmp_path)
+    words = {"sealed", "broken", "cracked", "leaking", "torn", "dented", "spilled", "crushed", "saw"}
+    for term in comps + conds:
+        for word in term.lower().split():
+            words.update((word, word + "s", word + "ed", word + "ing"))
+            for syn in wn.synsets(word):
+                words.update(l.name().lower() for l in syn.lemmas())
+    mismatches = {
+        word: (nlp_utils.determine_category(word, comps, conds), expected)
+        for word in sorted(words)
+        if nlp_utils.determine_category(word, comps, conds) != (expected := baseline_determine_category(word, comps, conds))
+    }
+    assert not mismatches
@@ -0,0 +1,69 @@
+import json
+import os
+
+import scraper
+from review_store import REVIEW_INDEX_FILENAME, ReviewIndex, review_key
+
+PAGE = [
+    {"review_title": "Leaky", "review_text": "The cap started to leak after a week", "reviewer_name": "A", "review_date": "May 1"},
+    {"review_title": "Cracked", "review_text": "Box arrived with a crack and a leak", "reviewer_name": "B", "review_date": "May 2"},
+]
+
+class _Box:
+    def __init__(self, typed):
+        self.typed = typed
+
+    def clear(self):
+        pass
+
+    def send_keys(self, keys):
+        if keys != scraper.Keys.RETURN:
+            self.typed.append(keys)
+
+class _Driver:
+    def get(self, url):
+        pass
+
+class _Downloader:
+    def close(self):
+        pass
+
+class _Lemmatizer:
+    def lemmatize(self, word):
+        return word
+
+def _stub_browser(monkeypatch, typed):
+    pages = []
+
+    def extract(driver, folder, seen_src=None, downloader=None, **kwargs):
+        # The unfiltered listing has one page; keyword searches return nothing
+        page = pages.pop() if pages else []
+        return [dict(r) for r in page], seen_src
+
+    pages.append(PAGE)
+    monkeypatch.setattr(scraper.time, "sleep", lambda s: None)
+    monkeypatch.setattr(scraper, "ensure_signed_in", lambda *a: None)
+    monkeypatch.setattr(scraper, "extract_reviews_from_page", extract)
+    monkeypatch.setattr(scraper, "click_next_if_available", lambda d: False)
+    monkeypatch.setattr(scraper, "ImageDownloader", _Downloader)
+    monkeypatch.setattr(scraper, "WebDriverWait", lambda d, t: type("W", (), {"until": lambda self, c: _Box(typed)})())
+    monkeypatch.setattr(scraper, "WordNetLemmatizer", _Lemmatizer)
+    monkeypatch.setattr(scraper, "determine_category",
+                        lambda t, comps, conds: "condition" if t in ("leak", "crack") else "component")
+
+def test_keywords_chosen_when_reviews_already_indexed(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    folder = "Bottle_2026-10-17"
+    os.makedirs(os.path.join("static", folder))
+    seeded = [{"review": dict(r, review_id=review_key(r)), "general": True, "search_terms": []} for r in PAGE]
+    with open(os.path.join("static", folder, REVIEW_INDEX_FILENAME), "w", encoding="utf-8") as f:
+        json.dump({"reviews": seeded}, f)
+
+    typed = []
+    _stub_browser(monkeypatch, typed)
+    reviews = scraper.scrape_reviews_for_keywords(
+        _Driver(), "https://www.amazon.com/dp/B000000001", "", "", folder, top_n=2)
+
+    assert typed == ["leak", "crack"]
+    assert len(reviews) == len(PAGE)
+    assert len(ReviewIndex(folder)) == len(PAGE)